@@ -27,6 +27,9 @@ try
     // Add SignalR
     builder.Services.AddSignalR();
     
+    // Health endpoint (run-dev.py waits on it after a restart)
+    builder.Services.AddHealthChecks();
+    
     // Add Monitoring services
     // builder.Services.AddSingleton<IMetricsCollector, MetricsCollector>();
     // builder.Services.AddHostedService<MetricsBackgroundService>();
@@ -57,6 +60,8 @@ try
     app.MapHub<ChatHub>("/chatHub");
     app.MapHub<DiscoveryHub>("/discoveryHub");
     // app.MapHub<WorkflowHub>("/workflowHub"); // Removed
+    
+    app.MapHealthChecks("/health");
 
     Console.WriteLine("OptimalyAI application started successfully");
     app.Run();
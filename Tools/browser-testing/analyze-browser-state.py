@@ -2,177 +2,2232 @@
 """
 Browser State Analyzer
 Analyzes the JSON output from browser-inspector.js
+
+Usage:
+    analyze-browser-state.py <state.json>
+    analyze-browser-state.py --stream <state.json>   # constant memory, for large dumps
+    cat state.json | analyze-browser-state.py [--stream] -
+    analyze-browser-state.py [-j N] <dir|glob|file>...  # aggregate report over many dumps
+                                                        # (unchanged files come from the result cache)
+    analyze-browser-state.py --format json|ndjson ...   # machine-readable output
+    analyze-browser-state.py ingest <dir|glob|file>...  # load dumps into the local store
+    analyze-browser-state.py query errors --page /Projects --days 7
+    analyze-browser-state.py query endpoints|pages|logs ...
+    analyze-browser-state.py baseline <dir|glob|file>...  # page weight vs. rolling baseline,
+                                                          # exit 1 on regressions
+    analyze-browser-state.py --profile [--cprofile out.prof] <state.json> >/dev/null
+                                                        # time/memory per phase on stderr
+    analyze-browser-state.py generate --events 500000 synthetic.json  # benchmark input
 """
 
+import argparse
+import cProfile
+import glob
+import hashlib
 import json
+import math
+import os
+import random
+import re
+import sqlite3
+import statistics
 import sys
-from datetime import datetime
-from collections import Counter
-
-def analyze_console_logs(logs):
-    """Analyze console logs"""
-    print("\n📝 CONSOLE LOGS:")
-    print("-" * 50)
-    
-    if not logs:
-        print("No console logs found")
-        return
-    
+import time
+import tracemalloc
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from json.decoder import WHITESPACE
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Sections of getPageState() that are arrays of events
+EVENT_SECTIONS = ('consoleLogs', 'networkRequests', 'errors', 'forms')
+
+
+# Path segments that identify a record rather than a route:
+# numbers, GUIDs and long hex ids
+ID_SEGMENT = re.compile(
+    r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{24,})$')
+
+
+# Variable parts of error messages that should not split a cluster
+MESSAGE_URL = re.compile(r'https?://[^\s\'"<>()]+')
+MESSAGE_NOISE = (
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '{id}'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{24,}\b'), '{hex}'),
+    (re.compile(r'\b\d+(\.\d+)?\b'), '{n}'),
+)
+
+# Stack frame location (Chrome "at fn (file:1:2)", Firefox/Safari "fn@file:1:2")
+FRAME_LOCATION = re.compile(r'(?P<file>[^\s()@]+?):(?P<line>\d+)(?::\d+)?\)?\s*$')
+FRAME_FUNCTION = re.compile(r'^\s*(?:at\s+(?P<chrome>[^\s(]+)\s+\(|(?P<gecko>[^@\s]+)@)')
+
+
+def _clock(timestamp):
+    """HH:MM:SS part of an ISO timestamp"""
+    return timestamp.split('T')[1].split('.')[0]
+
+
+def _parse_iso(timestamp):
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+
+def normalize_route(url):
+    """Route template of a request URL, e.g. /api/projects/123 -> /api/projects/{id}"""
+    path = urlsplit(str(url)).path or '/'
+    return '/'.join('{id}' if ID_SEGMENT.match(segment) else segment
+                    for segment in path.split('/'))
+
+
+def request_duration(req):
+    """Request duration in ms, from the inspector's duration or start/end times"""
+    if req.get('duration') is not None:
+        return float(req['duration'])
+    if req.get('startTime') and req.get('endTime'):
+        delta = _parse_iso(req['endTime']) - _parse_iso(req['startTime'])
+        return delta.total_seconds() * 1000
+    return None
+
+
+def request_size(req):
+    """Response size in characters, from the inspector's size or the captured body"""
+    if req.get('size') is not None:
+        return int(req['size'])
+    if req.get('response') is not None:
+        return len(req['response'])
+    return None
+
+
+def normalize_error_message(message):
+    """Error message with URLs reduced to route templates and ids/numbers masked"""
+    message = MESSAGE_URL.sub(lambda match: normalize_route(match.group()), str(message))
+    message = re.sub(r'^Uncaught\s+', '', message.strip())
+    for pattern, replacement in MESSAGE_NOISE:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+def top_stack_frames(error, limit=3):
+    """Normalized top frames of an error as 'function /path/file.js:line'
+
+    Falls back to the reported source and line when there is no stack.
+    """
+    frames = []
+    stack = error.get('stack') or error.get('error') or ''
+    for line in str(stack).splitlines():
+        location = FRAME_LOCATION.search(line)
+        if not location:
+            continue
+        function = FRAME_FUNCTION.match(line)
+        name = (function.group('chrome') or function.group('gecko')) if function else None
+        frames.append(f"{name or '<anonymous>'} {urlsplit(location.group('file')).path}:{location.group('line')}")
+        if len(frames) == limit:
+            return frames
+    if not frames and error.get('source'):
+        frames.append(f"{urlsplit(error['source']).path}:{error.get('line', '?')}")
+    return frames
+
+
+def error_fingerprint(error):
+    """(fingerprint, normalized message, top frames) identifying an error cluster"""
+    message = normalize_error_message(error.get('message', ''))
+    frames = top_stack_frames(error)
+    digest = hashlib.sha1('\n'.join([message, *frames]).encode('utf-8')).hexdigest()
+    return digest[:12], message, frames
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+# ---------------------------------------------------------------------------
+# Section statistics
+#
+# Each section keeps running counters that are fed one item at a time, so the
+# same code serves both a fully loaded dump and the streaming reader.
+# ---------------------------------------------------------------------------
+
+class ConsoleLogStats:
+    """Running statistics for console logs"""
+
+    RECENT = 10
+
+    def __init__(self):
+        self.total = 0
+        self.types = Counter()
+        self.recent = deque(maxlen=self.RECENT)
+
+    def add(self, log):
+        self.total += 1
+        self.types[log['type']] += 1
+        self.recent.append({
+            'timestamp': log['timestamp'],
+            'type': log['type'],
+            'message': log['message'][:100],
+        })
+
+    def merge(self, other):
+        self.total += other.total
+        self.types.update(other.types)
+        self.recent.extend(other.recent)
+
+    def to_dict(self):
+        return {'total': self.total, 'types': dict(self.types), 'recent': list(self.recent)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.types = Counter(data['types'])
+        stats.recent.extend(data['recent'])
+        return stats
+
+    def summary(self):
+        return {'total': self.total, 'types': dict(self.types), 'recent': list(self.recent)}
+
+
+class LatencyHistogram:
+    """Log-scale latency histogram
+
+    Buckets grow by 5%, so percentiles are accurate to about 2.5% while memory
+    stays constant and histograms merge by adding counters.
+    """
+
+    GROWTH = 1.05
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = Counter()
+
+    def add(self, ms):
+        self.count += 1
+        self.buckets[0 if ms < 1 else 1 + int(math.log(ms, self.GROWTH))] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.buckets.update(other.buckets)
+
+    def to_dict(self):
+        return {'count': self.count, 'buckets': list(self.buckets.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.count = data['count']
+        histogram.buckets = Counter(dict(data['buckets']))
+        return histogram
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Geometric middle of the bucket
+                return 0.5 if bucket == 0 else self.GROWTH ** (bucket - 0.5)
+
+
+class RouteStats:
+    """Counters for one method + route template"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.sized = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+
+    def add(self, status, duration, size):
+        self.count += 1
+        if isinstance(status, int) and status >= 400:
+            self.errors += 1
+        if duration is not None:
+            self.latency.add(duration)
+        if size is not None:
+            self.sized += 1
+            self.bytes += size
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        self.sized += other.sized
+        self.bytes += other.bytes
+        self.latency.merge(other.latency)
+
+    def to_dict(self):
+        return {'count': self.count, 'errors': self.errors, 'sized': self.sized,
+                'bytes': self.bytes, 'latency': self.latency.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.errors = data['errors']
+        stats.sized = data['sized']
+        stats.bytes = data['bytes']
+        stats.latency = LatencyHistogram.from_dict(data['latency'])
+        return stats
+
+
+class NetworkStats:
+    """Running statistics for network requests"""
+
+    RECENT = 5
+
+    def __init__(self):
+        self.total = 0
+        self.statuses = Counter()
+        self.recent = deque(maxlen=self.RECENT)
+        self.routes = {}
+
+    def add(self, req):
+        status = req.get('status', 'pending')
+        self.total += 1
+        self.statuses[status] += 1
+        self.recent.append({
+            'timestamp': req['timestamp'],
+            'method': req['method'],
+            'url': req['url'][:50],
+            'status': status,
+        })
+
+        route = f"{req['method'].upper()} {normalize_route(req['url'])}"
+        if route not in self.routes:
+            self.routes[route] = RouteStats()
+        self.routes[route].add(status, request_duration(req), request_size(req))
+
+    def merge(self, other):
+        self.total += other.total
+        self.statuses.update(other.statuses)
+        self.recent.extend(other.recent)
+        for route, stats in other.routes.items():
+            if route in self.routes:
+                self.routes[route].merge(stats)
+            else:
+                self.routes[route] = stats
+
+    def to_dict(self):
+        # Status codes are ints except 'pending', so keep them as pairs
+        return {
+            'total': self.total,
+            'statuses': list(self.statuses.items()),
+            'recent': list(self.recent),
+            'routes': {route: stats.to_dict() for route, stats in self.routes.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.statuses = Counter(dict(data['statuses']))
+        stats.recent.extend(data['recent'])
+        stats.routes = {route: RouteStats.from_dict(route_data)
+                        for route, route_data in data['routes'].items()}
+        return stats
+
+    def summary(self):
+        # Slowest first; routes without timing data sort last by request count
+        ranked = sorted(self.routes.items(),
+                        key=lambda item: (item[1].latency.percentile(95) or -1, item[1].count),
+                        reverse=True)
+        return {
+            'total': self.total,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'recent': list(self.recent),
+            'timed': sum(stats.latency.count for stats in self.routes.values()),
+            'bytes': sum(stats.bytes for stats in self.routes.values()),
+            'routes': [{
+                'route': route,
+                'count': stats.count,
+                'errors': stats.errors,
+                'timed': stats.latency.count,
+                'p50': stats.latency.percentile(50),
+                'p95': stats.latency.percentile(95),
+                'p99': stats.latency.percentile(99),
+                'bytes': stats.bytes,
+            } for route, stats in ranked],
+        }
+
+
+class ErrorStats:
+    """Page errors grouped into clusters by fingerprint
+
+    The fingerprint hashes the normalized message and top stack frames, so
+    repeats of the same error share one cluster and memory grows with the
+    number of distinct errors, not their occurrences.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.clusters = {}
+
+    def add(self, error):
+        self.total += 1
+        fingerprint, message, frames = error_fingerprint(error)
+        timestamp = error.get('timestamp')
+        cluster = self.clusters.get(fingerprint)
+        if cluster is None:
+            self.clusters[fingerprint] = {
+                'message': str(error.get('message', ''))[:200],
+                'normalized': message,
+                'frames': frames,
+                'source': error.get('source'),
+                'line': error.get('line', '?'),
+                'count': 1,
+                'first_seen': timestamp,
+                'last_seen': timestamp,
+            }
+            return
+        cluster['count'] += 1
+        if timestamp:
+            # ISO timestamps compare correctly as text
+            if not cluster['first_seen'] or timestamp < cluster['first_seen']:
+                cluster['first_seen'] = timestamp
+            if not cluster['last_seen'] or timestamp > cluster['last_seen']:
+                cluster['last_seen'] = timestamp
+
+    def merge(self, other):
+        self.total += other.total
+        for fingerprint, theirs in other.clusters.items():
+            ours = self.clusters.get(fingerprint)
+            if ours is None:
+                self.clusters[fingerprint] = dict(theirs)
+                continue
+            ours['count'] += theirs['count']
+            ours['first_seen'] = min(filter(None, (ours['first_seen'], theirs['first_seen'])), default=None)
+            ours['last_seen'] = max(filter(None, (ours['last_seen'], theirs['last_seen'])), default=None)
+
+    def ranked(self):
+        """(fingerprint, cluster) pairs, most frequent first"""
+        return sorted(self.clusters.items(), key=lambda item: item[1]['count'], reverse=True)
+
+    def to_dict(self):
+        return {'total': self.total, 'clusters': self.clusters}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.clusters = data['clusters']
+        return stats
+
+    def summary(self):
+        return {
+            'total': self.total,
+            'distinct': len(self.clusters),
+            'clusters': [dict(cluster, fingerprint=fingerprint) for fingerprint, cluster in self.ranked()],
+        }
+
+
+class FormStats:
+    """Collected form summaries"""
+
+    def __init__(self):
+        self.total = 0
+        self.forms = []
+
+    def add(self, form):
+        fields = form.get('fields', {})
+        self.total += 1
+        self.forms.append({
+            'id': form.get('id', 'none'),
+            'action': form.get('action', 'none'),
+            'method': form.get('method', 'GET'),
+            'fields': len(fields),
+            'values': [
+                (name, field['value'][:50])
+                for name, field in fields.items()
+                if field.get('value', '') and field.get('type') != 'password'
+            ],
+        })
+
+    def merge(self, other):
+        self.total += other.total
+        # Individual forms are only listed for single dumps
+        self.forms = []
+
+    def to_dict(self):
+        return {'total': self.total, 'forms': self.forms}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data['total']
+        stats.forms = data['forms']
+        return stats
+
+    def summary(self):
+        return {'total': self.total, 'forms': self.forms}
+
+
+class DomStats:
+    """DOM snapshot counters"""
+
+    COUNTERS = ('totalElements', 'forms', 'images', 'links', 'scripts', 'stylesheets')
+    FILLED = 5
+
+    def __init__(self):
+        self.counts = {}
+        self.inputs = 0
+        self.input_types = Counter()
+        self.filled = []
+
+    def set_field(self, key, value):
+        if key in self.COUNTERS:
+            self.counts[key] = value
+
+    def add_input(self, inp):
+        self.inputs += 1
+        self.input_types[inp['type']] += 1
+        if len(self.filled) < self.FILLED and inp.get('value') and inp['type'] != 'password':
+            self.filled.append((inp.get('id') or inp.get('name', 'unnamed'), inp['value'][:30]))
+
+    def add_snapshot(self, dom):
+        for key, value in dom.items():
+            self.set_field(key, value)
+        for inp in dom.get('inputs', []):
+            self.add_input(inp)
+
+    def merge(self, other):
+        for key, value in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        self.inputs += other.inputs
+        self.input_types.update(other.input_types)
+        self.filled = []
+
+    def to_dict(self):
+        return {'counts': self.counts, 'inputs': self.inputs,
+                'input_types': dict(self.input_types), 'filled': self.filled}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.counts = data['counts']
+        stats.inputs = data['inputs']
+        stats.input_types = Counter(data['input_types'])
+        stats.filled = [tuple(item) for item in data['filled']]
+        return stats
+
+    def summary(self):
+        return dict({key: self.counts.get(key, 0) for key in self.COUNTERS},
+                    inputs=self.inputs,
+                    inputTypes=dict(self.input_types),
+                    filled=[{'name': name, 'value': value} for name, value in self.filled])
+
+
+class StateReport:
+    """Statistics for one getPageState() dump"""
+
+    def __init__(self):
+        self.meta = {}
+        self.console = ConsoleLogStats()
+        self.network = NetworkStats()
+        self.errors = ErrorStats()
+        self.dom = DomStats()
+        self.forms = FormStats()
+        self.storage = {'localStorage': 0, 'sessionStorage': 0}
+
+    def section(self, key):
+        """Statistics object that consumes items of an event section"""
+        return {
+            'consoleLogs': self.console,
+            'networkRequests': self.network,
+            'errors': self.errors,
+            'forms': self.forms,
+        }[key]
+
+    @classmethod
+    def from_state(cls, data):
+        """Build the report from an already loaded dump"""
+        report = cls()
+        for key, value in data.items():
+            report.add_section(key, value)
+        return report
+
+    def add_section(self, key, value):
+        """Consume one top-level key of a loaded dump"""
+        if key in EVENT_SECTIONS:
+            stats = self.section(key)
+            for item in value:
+                stats.add(item)
+        elif key == 'dom':
+            self.dom.add_snapshot(value)
+        elif key in self.storage:
+            self.storage[key] = len(value)
+        else:
+            self.meta[key] = value
+
+    def compact(self):
+        """Drop per-item listings that only single-dump reports print"""
+        self.forms.forms = []
+        self.dom.filled = []
+        self.meta = {key: self.meta[key] for key in ('url', 'title', 'timestamp') if key in self.meta}
+        return self
+
+    def merge(self, other):
+        self.console.merge(other.console)
+        self.network.merge(other.network)
+        self.errors.merge(other.errors)
+        self.dom.merge(other.dom)
+        self.forms.merge(other.forms)
+        for key, count in other.storage.items():
+            self.storage[key] += count
+
+    def to_dict(self):
+        return {
+            'meta': self.meta,
+            'consoleLogs': self.console.to_dict(),
+            'networkRequests': self.network.to_dict(),
+            'errors': self.errors.to_dict(),
+            'dom': self.dom.to_dict(),
+            'forms': self.forms.to_dict(),
+            'storage': self.storage,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        report = cls()
+        report.meta = data['meta']
+        report.console = ConsoleLogStats.from_dict(data['consoleLogs'])
+        report.network = NetworkStats.from_dict(data['networkRequests'])
+        report.errors = ErrorStats.from_dict(data['errors'])
+        report.dom = DomStats.from_dict(data['dom'])
+        report.forms = FormStats.from_dict(data['forms'])
+        report.storage = data['storage']
+        return report
+
+    def summary(self):
+        """Structured result for this dump, shared by the text and JSON output"""
+        return {
+            'url': self.meta.get('url'),
+            'title': self.meta.get('title'),
+            'timestamp': self.meta.get('timestamp'),
+            'viewport': self.meta.get('viewport', {}),
+            'consoleLogs': self.console.summary(),
+            'networkRequests': self.network.summary(),
+            'errors': self.errors.summary(),
+            'dom': self.dom.summary(),
+            'forms': self.forms.summary(),
+            'storage': self.storage,
+        }
+
+    def section_summary(self, key):
+        stats = self.dom if key == 'dom' else self.section(key)
+        return stats.summary()
+
+
+# ---------------------------------------------------------------------------
+# Text rendering
+#
+# Renderers turn summary() dicts into lines, so the text report is a thin
+# layer over the same results as the JSON output and is written at once.
+# ---------------------------------------------------------------------------
+
+def render_console_logs(data):
+    lines = ["", "📝 CONSOLE LOGS:", "-" * 50]
+
+    if not data['total']:
+        return lines + ["No console logs found"]
+
     # Count by type
-    log_types = Counter(log['type'] for log in logs)
-    print(f"Total logs: {len(logs)}")
-    for log_type, count in log_types.items():
-        print(f"  {log_type}: {count}")
-    
+    lines.append(f"Total logs: {data['total']}")
+    for log_type, count in data['types'].items():
+        lines.append(f"  {log_type}: {count}")
+
     # Show recent logs
-    print("\nRecent logs:")
-    for log in logs[-10:]:
-        timestamp = log['timestamp'].split('T')[1].split('.')[0]
-        print(f"  [{timestamp}] {log['type'].upper()}: {log['message'][:100]}")
-
-def analyze_network_requests(requests):
-    """Analyze network requests"""
-    print("\n🌐 NETWORK REQUESTS:")
-    print("-" * 50)
-    
-    if not requests:
-        print("No network requests found")
-        return
-    
-    print(f"Total requests: {len(requests)}")
-    
+    lines += ["", "Recent logs:"]
+    for log in data['recent']:
+        lines.append(f"  [{_clock(log['timestamp'])}] {log['type'].upper()}: {log['message']}")
+    return lines
+
+
+def render_network_requests(data, top_routes=15):
+    lines = ["", "🌐 NETWORK REQUESTS:", "-" * 50]
+
+    if not data['total']:
+        return lines + ["No network requests found"]
+
+    lines.append(f"Total requests: {data['total']}")
+
     # Group by status
-    status_codes = Counter(req.get('status', 'pending') for req in requests)
-    print("\nBy status:")
-    for status, count in status_codes.items():
-        print(f"  {status}: {count}")
-    
+    lines += ["", "By status:"]
+    for status, count in data['statuses'].items():
+        lines.append(f"  {status}: {count}")
+
     # Show recent requests
-    print("\nRecent requests:")
-    for req in requests[-5:]:
-        timestamp = req['timestamp'].split('T')[1].split('.')[0]
-        status = req.get('status', 'pending')
-        print(f"  [{timestamp}] {req['method']} {req['url'][:50]} - Status: {status}")
-
-def analyze_errors(errors):
-    """Analyze errors"""
-    print("\n❌ ERRORS:")
-    print("-" * 50)
-    
-    if not errors:
-        print("No errors found ✅")
-        return
-    
-    print(f"Total errors: {len(errors)}")
-    
-    for error in errors:
-        timestamp = error['timestamp'].split('T')[1].split('.')[0]
-        print(f"\n[{timestamp}] {error['message']}")
-        if error.get('source'):
-            print(f"  Source: {error['source']}:{error.get('line', '?')}")
-        if error.get('stack'):
-            print(f"  Stack: {error['stack'][:200]}...")
-
-def analyze_forms(forms):
-    """Analyze form data"""
-    print("\n📋 FORMS:")
-    print("-" * 50)
-    
-    if not forms:
-        print("No forms found")
-        return
-    
-    print(f"Total forms: {len(forms)}")
-    
-    for i, form in enumerate(forms):
-        print(f"\nForm {i + 1}:")
-        print(f"  ID: {form.get('id', 'none')}")
-        print(f"  Action: {form.get('action', 'none')}")
-        print(f"  Method: {form.get('method', 'GET')}")
-        print(f"  Fields: {len(form.get('fields', {}))}")
-        
-        # Show field values
-        for name, field in form.get('fields', {}).items():
-            value = field.get('value', '')
-            if value and field.get('type') != 'password':
-                print(f"    {name}: {value[:50]}")
-
-def analyze_dom(dom):
-    """Analyze DOM snapshot"""
-    print("\n🌳 DOM SNAPSHOT:")
-    print("-" * 50)
-    
-    print(f"Total elements: {dom.get('totalElements', 0)}")
-    print(f"Forms: {dom.get('forms', 0)}")
-    print(f"Images: {dom.get('images', 0)}")
-    print(f"Links: {dom.get('links', 0)}")
-    print(f"Scripts: {dom.get('scripts', 0)}")
-    print(f"Stylesheets: {dom.get('stylesheets', 0)}")
-    
+    lines += ["", "Recent requests:"]
+    for req in data['recent']:
+        lines.append(f"  [{_clock(req['timestamp'])}] {req['method']} {req['url']} - Status: {req['status']}")
+
+    # Per-endpoint latency percentiles and response sizes
+    lines += ["", "⏱️  ENDPOINT LATENCY & SIZE:", "-" * 50]
+    routes = data['routes']
+    lines.append(f"Routes: {len(routes)}, timed requests: {data['timed']}/{data['total']}, "
+                 f"response size total: {_format_size(data['bytes'])}")
+
+    def ms(value):
+        return '-' if value is None else f"{value:.0f}ms"
+
+    lines += ["", f"  {'Route':<50} {'Count':>7} {'Err':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'Size':>10}"]
+    for route in routes[:top_routes]:
+        lines.append(f"  {route['route'][:50]:<50} {route['count']:>7} {route['errors']:>6} "
+                     f"{ms(route['p50']):>7} {ms(route['p95']):>7} "
+                     f"{ms(route['p99']):>7} {_format_size(route['bytes']):>10}")
+    if len(routes) > top_routes:
+        lines.append(f"  ... and {len(routes) - top_routes} more routes")
+    return lines
+
+
+def render_errors(data, top_clusters=20):
+    lines = ["", "❌ ERRORS:", "-" * 50]
+
+    if not data['total']:
+        return lines + ["No errors found ✅"]
+
+    lines.append(f"Total errors: {data['total']}")
+    lines.append(f"Distinct errors: {data['distinct']}")
+
+    def seen(timestamp):
+        return timestamp[:19].replace('T', ' ') if timestamp else '?'
+
+    clusters = data['clusters']
+    for cluster in clusters[:top_clusters]:
+        lines += ["", f"{cluster['count']:>6}x {cluster['message']}"]
+        lines.append(f"        [{cluster['fingerprint']}] first: {seen(cluster['first_seen'])}, "
+                     f"last: {seen(cluster['last_seen'])}")
+        if cluster['source']:
+            lines.append(f"        Source: {cluster['source']}:{cluster['line']}")
+        for frame in cluster['frames']:
+            lines.append(f"        at {frame}")
+    if len(clusters) > top_clusters:
+        lines += ["", f"... and {len(clusters) - top_clusters} more distinct errors"]
+    return lines
+
+
+def render_dom(data):
+    lines = ["", "🌳 DOM SNAPSHOT:", "-" * 50]
+
+    lines.append(f"Total elements: {data['totalElements']}")
+    lines.append(f"Forms: {data['forms']}")
+    lines.append(f"Images: {data['images']}")
+    lines.append(f"Links: {data['links']}")
+    lines.append(f"Scripts: {data['scripts']}")
+    lines.append(f"Stylesheets: {data['stylesheets']}")
+
     # Analyze inputs
-    inputs = dom.get('inputs', [])
-    if inputs:
-        print(f"\nInput fields: {len(inputs)}")
-        input_types = Counter(inp['type'] for inp in inputs)
-        for inp_type, count in input_types.items():
-            print(f"  {inp_type}: {count}")
-        
+    if data['inputs']:
+        lines += ["", f"Input fields: {data['inputs']}"]
+        for inp_type, count in data['inputTypes'].items():
+            lines.append(f"  {inp_type}: {count}")
+
         # Show filled inputs
-        filled_inputs = [inp for inp in inputs if inp.get('value') and inp['type'] != 'password']
-        if filled_inputs:
-            print("\nFilled inputs:")
-            for inp in filled_inputs[:5]:
-                print(f"  {inp.get('id') or inp.get('name', 'unnamed')}: {inp['value'][:30]}")
+        if data['filled']:
+            lines += ["", "Filled inputs:"]
+            for inp in data['filled']:
+                lines.append(f"  {inp['name']}: {inp['value']}")
+    return lines
+
+
+def render_forms(data):
+    lines = ["", "📋 FORMS:", "-" * 50]
+
+    if not data['total']:
+        return lines + ["No forms found"]
+
+    lines.append(f"Total forms: {data['total']}")
+
+    for i, form in enumerate(data['forms']):
+        lines += ["", f"Form {i + 1}:"]
+        lines.append(f"  ID: {form['id']}")
+        lines.append(f"  Action: {form['action']}")
+        lines.append(f"  Method: {form['method']}")
+        lines.append(f"  Fields: {form['fields']}")
+
+        # Show field values
+        for name, value in form['values']:
+            lines.append(f"    {name}: {value}")
+    return lines
+
+
+SECTION_RENDERERS = {
+    'consoleLogs': render_console_logs,
+    'networkRequests': render_network_requests,
+    'errors': render_errors,
+    'dom': render_dom,
+    'forms': render_forms,
+}
+
+# Order of the sections in the text report (and in getPageState())
+REPORT_SECTIONS = ('consoleLogs', 'networkRequests', 'errors', 'dom', 'forms')
+
+
+def render_header(data):
+    return [
+        "=" * 60,
+        "🔍 BROWSER STATE ANALYSIS",
+        "=" * 60,
+        f"URL: {data.get('url') or 'unknown'}",
+        f"Title: {data.get('title') or 'unknown'}",
+    ]
+
+
+def render_page_info(data):
+    viewport = data.get('viewport') or {}
+    return [
+        f"Timestamp: {data.get('timestamp') or 'unknown'}",
+        f"Viewport: {viewport.get('width')}x{viewport.get('height')}",
+        f"Scroll: X={viewport.get('scrollX')}, Y={viewport.get('scrollY')}",
+    ]
+
+
+def render_totals(data):
+    return [
+        "",
+        "=" * 60,
+        "📊 SUMMARY:",
+        f"✓ Console logs: {data['consoleLogs']['total']}",
+        f"✓ Network requests: {data['networkRequests']['total']}",
+        f"✓ Errors: {data['errors']['total']}",
+        f"✓ Forms: {data['forms']['total']}",
+        "=" * 60,
+    ]
+
+
+def render_footer(data):
+    storage = data['storage']
+    return [
+        "",
+        "💾 STORAGE:",
+        "-" * 50,
+        f"LocalStorage items: {storage['localStorage']}",
+        f"SessionStorage items: {storage['sessionStorage']}",
+    ] + render_totals(data)
+
+
+def render_state(data):
+    """Full text report for one dump"""
+    lines = render_header(data) + render_page_info(data)
+    for key in REPORT_SECTIONS:
+        lines += SECTION_RENDERERS[key](data[key])
+    return lines + render_footer(data)
+
+
+def write_lines(lines, out=None):
+    """Write rendered lines with a single write call"""
+    out = out or sys.stdout
+    out.write('\n'.join(lines) + '\n')
+
+
+# ---------------------------------------------------------------------------
+# Streaming reader
+# ---------------------------------------------------------------------------
+
+class StreamingJsonReader:
+    """Incremental reader over a JSON document
+
+    Containers are walked with iter_object()/iter_array() and every other value
+    is decoded on its own with read_value(), so only the current element is
+    held in memory no matter how large the document is.
+    """
+
+    def __init__(self, fp, chunk_size=64 * 1024):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _read_more(self, size=None):
+        """Append the next chunk, dropping the consumed part of the buffer"""
+        if self.eof:
+            return False
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character, or None at the end of input"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                return None
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found {found!r} in JSON stream")
+        self.pos += 1
+
+    def read_value(self):
+        """Decode the next complete JSON value"""
+        self._peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Value continues past the buffer; grow geometrically so
+                # re-decoding a large value stays linear overall
+                if not self._read_more(size):
+                    raise
+                size *= 2
+                continue
+            # A number or literal may continue in the next chunk
+            if end == len(self.buf) and self._read_more(size):
+                size *= 2
+                continue
+            self.pos = end
+            return value
+
+    def iter_object(self):
+        """Yield object keys; the caller must consume each value"""
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(':')
+            yield key
+            separator = self._peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' but found {separator!r} in JSON stream")
+
+    def iter_array(self):
+        """Yield once per array element; the caller must consume each element"""
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            separator = self._peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' but found {separator!r} in JSON stream")
+
+
+STORAGE_SECTIONS = ('localStorage', 'sessionStorage')
+
+
+def iter_state_events(fp):
+    """Walk a getPageState() dump as a stream of (kind, item) events
+
+    kind is one of:
+      an EVENT_SECTIONS key   item is one log/request/error/form
+      'dom.inputs'            item is one DOM input
+      'dom'                   item is a (key, value) DOM counter
+      a STORAGE_SECTIONS key  item is a storage key (values are skipped)
+      'meta'                  item is a top-level (key, value) pair
+      'end'                   item is the key of a section just consumed
+    """
+    reader = StreamingJsonReader(fp)
+    for key in reader.iter_object():
+        if key in EVENT_SECTIONS:
+            for _ in reader.iter_array():
+                yield key, reader.read_value()
+        elif key == 'dom':
+            for dom_key in reader.iter_object():
+                if dom_key == 'inputs':
+                    for _ in reader.iter_array():
+                        yield 'dom.inputs', reader.read_value()
+                else:
+                    yield 'dom', (dom_key, reader.read_value())
+        elif key in STORAGE_SECTIONS:
+            for storage_key in reader.iter_object():
+                reader.read_value()
+                yield key, storage_key
+        else:
+            yield 'meta', (key, reader.read_value())
+            continue
+        yield 'end', key
+
+
+def stream_state(fp, report, on_section=None):
+    """Feed a getPageState() dump into report without loading it whole
+
+    on_section(key) is called as soon as each section has been consumed.
+    """
+    for kind, item in iter_state_events(fp):
+        if kind in EVENT_SECTIONS:
+            report.section(kind).add(item)
+        elif kind == 'dom.inputs':
+            report.dom.add_input(item)
+        elif kind == 'dom':
+            report.dom.set_field(*item)
+        elif kind in STORAGE_SECTIONS:
+            # Only the item count is reported
+            report.storage[kind] += 1
+        elif kind == 'meta':
+            report.meta[item[0]] = item[1]
+        elif on_section:
+            on_section(item)
+    return report
+
+
+def ndjson_records(data):
+    """NDJSON records for one dump: one per section, then the page itself"""
+    for key in REPORT_SECTIONS:
+        yield {'type': 'section', 'section': key, 'url': data['url'], 'data': data[key]}
+    yield page_record(data)
+
+
+def page_record(data):
+    return {'type': 'page', **{key: data[key] for key in ('url', 'title', 'timestamp', 'viewport', 'storage')}}
+
+
+def write_json(record, out=None):
+    """Write one JSON document/NDJSON record as a single line"""
+    (out or sys.stdout).write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+def stream_report(fp, output_format='text', on_section_written=None):
+    """Report on a dump while it is being read
+
+    Text and NDJSON output is written section by section as soon as each
+    section has been consumed; JSON is written once at the end.
+    on_section_written(key) is called after each top-level section.
+    """
+    report = StateReport()
+    header_written = False
+
+    def on_section(key):
+        if key in SECTION_RENDERERS and output_format != 'json':
+            write_section(key)
+        if on_section_written:
+            on_section_written(key)
+
+    def write_section(key):
+        nonlocal header_written
+        if output_format == 'ndjson':
+            write_json({'type': 'section', 'section': key, 'url': report.meta.get('url'),
+                        'data': report.section_summary(key)})
+        else:
+            lines = [] if header_written else render_header(report.meta)
+            header_written = True
+            write_lines(lines + SECTION_RENDERERS[key](report.section_summary(key)))
+        sys.stdout.flush()
+
+    stream_state(fp, report, on_section)
+    data = report.summary()
+    if output_format == 'json':
+        write_json(data)
+    elif output_format == 'ndjson':
+        write_json(page_record(data))
+    else:
+        # timestamp and viewport come last in getPageState()
+        lines = [] if header_written else render_header(data)
+        write_lines(lines + [""] + render_page_info(data) + render_footer(data))
+
+
+# ---------------------------------------------------------------------------
+# Batch analysis
+# ---------------------------------------------------------------------------
+
+class BatchReport:
+    """Aggregate of many dumps, built by merging per-file counters"""
+
+    TOP_PAGES = 10
+
+    def __init__(self):
+        self.files = 0
+        self.cached = 0
+        self.failed = []
+        self.pages = Counter()
+        self.total = StateReport()
+
+    def add(self, report):
+        self.files += 1
+        self.pages[report.meta.get('url', 'unknown')] += 1
+        self.total.merge(report)
+
+    def summary(self):
+        data = self.total.summary()
+        for key in ('url', 'title', 'timestamp', 'viewport', 'dom'):
+            del data[key]
+        data.update({
+            'files': self.files,
+            'cached': self.cached,
+            'failed': [{'file': path, 'error': error} for path, error in self.failed],
+            'pages': [{'url': url, 'count': count} for url, count in self.pages.most_common()],
+        })
+        return data
+
+
+def render_batch(data, top=10):
+    """Text report for a batch run"""
+    lines = [
+        "=" * 60,
+        "🔍 BROWSER STATE BATCH ANALYSIS",
+        "=" * 60,
+        f"Files analyzed: {data['files']} ({data['cached']} from cache)",
+        f"Files failed: {len(data['failed'])}",
+    ]
+    for failure in data['failed'][:top]:
+        lines.append(f"  {failure['file']}: {failure['error']}")
+
+    lines += ["", f"Pages ({len(data['pages'])} distinct):"]
+    for page in data['pages'][:top]:
+        lines.append(f"  {page['count']:>6}x {page['url']}")
+
+    lines += render_console_logs(data['consoleLogs'])
+    lines += render_network_requests(data['networkRequests'])
+    lines += render_errors(data['errors'])
+    return lines + render_totals(data)
+
+
+def collect_state_files(inputs):
+    """Expand directories (recursively) and glob patterns into dump paths"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(str(p) for p in Path(item).rglob('*.json')))
+        elif glob.has_magic(item):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)
+    return paths
+
+
+def analyze_file(path, stream=False):
+    """Parse one dump into a compact StateReport
+
+    Runs inside worker processes, so it returns (path, report, error)
+    instead of raising.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as fp:
+            if stream:
+                report = stream_state(fp, StateReport())
+            else:
+                report = StateReport.from_state(json.load(fp))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+    return path, report.compact(), None
+
+
+# Bump when the per-file summary changes shape or meaning, so stale cache
+# entries are ignored
+CACHE_VERSION = 2
+
+DEFAULT_CACHE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'optimalyai', 'analyze-browser-state.db')
+
+
+class ResultCache:
+    """Persistent per-file summaries for batch mode
+
+    Entries are keyed by absolute path and validated by size + mtime, or by
+    a SHA-1 of the content with key_mode='hash' (survives copies and touch).
+    The least recently used entries are evicted once the cache grows past
+    max_bytes.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE, max_bytes=256 * 1024 * 1024, key_mode='mtime'):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.key_mode = key_mode
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used);
+        """)
+        self.hits = []
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def _key(self, path):
+        """(key, size, mtime_ns) of a file, or None if it cannot be read"""
+        try:
+            stat = os.stat(path)
+            if self.key_mode != 'hash':
+                return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+            digest = hashlib.sha1()
+            with open(path, 'rb') as fp:
+                for chunk in iter(partial(fp.read, 1024 * 1024), b''):
+                    digest.update(chunk)
+            return 'sha1:' + digest.hexdigest(), stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, path):
+        """(cached StateReport or None, key)
+
+        On a miss, pass the key to put() so the file is not hashed twice and
+        the entry is stored under the key that was looked up.
+        """
+        key = self._key(path)
+        if key is None:
+            return None, None
+        row = self.db.execute(
+            'SELECT size, mtime_ns, version, data FROM entries WHERE key = ?', (key[0],)).fetchone()
+        if not row or row[2] != CACHE_VERSION:
+            return None, key
+        if self.key_mode != 'hash' and (row[0], row[1]) != key[1:]:
+            return None, key
+        self.hits.append(key[0])
+        return StateReport.from_dict(json.loads(row[3])), key
+
+    def put(self, key, report):
+        if key is not None:
+            data = json.dumps(report.to_dict(), separators=(',', ':'))
+            self.pending.append((*key, CACHE_VERSION, data, len(data), time.time()))
+
+    def flush(self):
+        """Write new entries, refresh LRU times of hits and evict"""
+        now = time.time()
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                self.pending)
+            self.db.executemany('UPDATE entries SET last_used = ? WHERE key = ?',
+                                [(now, key) for key in self.hits])
+            self.pending, self.hits = [], []
+            self._evict()
+
+    def _evict(self):
+        total = self.db.execute('SELECT COALESCE(SUM(bytes), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in self.db.execute('SELECT key, bytes FROM entries ORDER BY last_used'):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self.db.executemany('DELETE FROM entries WHERE key = ?', victims)
+
+
+def run_batch(paths, jobs=None, stream=False, cache=None, on_file=None):
+    """Analyze dumps across a process pool and merge the results
+
+    With a cache, only new or changed files are parsed; the rest are merged
+    from their stored summaries. on_file(path, report) is called for every
+    file that was analyzed, in input order.
+    """
+    batch = BatchReport()
+    cached = {}
+    keys = {}
+    if cache:
+        for path in paths:
+            report, keys[path] = cache.get(path)
+            if report is not None:
+                cached[path] = report
+    todo = [path for path in paths if path not in cached]
+
+    worker = partial(analyze_file, stream=stream)
+    jobs = jobs or os.cpu_count() or 1
+    pool = None
+    if jobs == 1 or len(todo) <= 1:
+        results = map(worker, todo)
+    else:
+        # Large chunks keep IPC overhead low; enough of them keep all workers busy
+        chunksize = max(1, min(64, len(todo) // (jobs * 4)))
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        results = pool.map(worker, todo, chunksize=chunksize)
+
+    try:
+        # Merge in input order so the "recent" listings are deterministic
+        for path in paths:
+            if path in cached:
+                report = cached[path]
+                batch.cached += 1
+            else:
+                path, report, error = next(results)
+                if error:
+                    batch.failed.append((path, error))
+                    continue
+                if cache:
+                    cache.put(keys[path], report)
+            batch.add(report)
+            if on_file:
+                on_file(path, report)
+    finally:
+        if pool:
+            pool.shutdown()
+    return batch
+
+
+# ---------------------------------------------------------------------------
+# Capture store
+#
+# SQLite database of ingested dumps, so historical questions are answered
+# from indexes instead of re-reading every file.
+# ---------------------------------------------------------------------------
+
+DEFAULT_STORE = os.path.join('Test', 'browser-tests', 'browser-states.db')
+
+STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    file_size INTEGER NOT NULL,
+    file_mtime REAL NOT NULL,
+    url TEXT,
+    path TEXT,
+    title TEXT,
+    captured_at TEXT,
+    ingested_at TEXT NOT NULL,
+    console_count INTEGER NOT NULL DEFAULT 0,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_captures_url ON captures (url);
+CREATE INDEX IF NOT EXISTS ix_captures_path ON captures (path);
+CREATE INDEX IF NOT EXISTS ix_captures_captured_at ON captures (captured_at);
+
+CREATE TABLE IF NOT EXISTS console_logs (
+    capture_id INTEGER NOT NULL REFERENCES captures (id) ON DELETE CASCADE,
+    ts TEXT,
+    type TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_console_logs_capture ON console_logs (capture_id);
+CREATE INDEX IF NOT EXISTS ix_console_logs_type_ts ON console_logs (type, ts);
+
+CREATE TABLE IF NOT EXISTS requests (
+    capture_id INTEGER NOT NULL REFERENCES captures (id) ON DELETE CASCADE,
+    ts TEXT,
+    method TEXT,
+    url TEXT,
+    route TEXT,
+    status TEXT,
+    duration REAL,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_requests_capture ON requests (capture_id);
+CREATE INDEX IF NOT EXISTS ix_requests_status_ts ON requests (status, ts);
+CREATE INDEX IF NOT EXISTS ix_requests_route ON requests (route);
+
+-- Per-capture request aggregates, so endpoint queries scan one row per
+-- route and capture instead of every request
+CREATE TABLE IF NOT EXISTS route_stats (
+    capture_id INTEGER NOT NULL REFERENCES captures (id) ON DELETE CASCADE,
+    method TEXT,
+    route TEXT,
+    requests INTEGER,
+    failures INTEGER,
+    timed INTEGER,
+    duration_total REAL,
+    size_total INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_route_stats_capture ON route_stats (capture_id);
+
+CREATE TABLE IF NOT EXISTS errors (
+    capture_id INTEGER NOT NULL REFERENCES captures (id) ON DELETE CASCADE,
+    ts TEXT,
+    message TEXT,
+    source TEXT,
+    line INTEGER,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_errors_capture ON errors (capture_id);
+CREATE INDEX IF NOT EXISTS ix_errors_ts ON errors (ts);
+CREATE INDEX IF NOT EXISTS ix_errors_message ON errors (message);
+
+-- Page weight of every accepted baseline check, per page template
+CREATE TABLE IF NOT EXISTS page_weights (
+    page TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    url TEXT,
+    elements INTEGER,
+    scripts INTEGER,
+    stylesheets INTEGER,
+    inputs INTEGER,
+    requests INTEGER,
+    request_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_page_weights_page ON page_weights (page, checked_at);
+"""
+
+# Columns added after the first version of the store
+STORE_MIGRATIONS = (
+    ('errors', 'fingerprint', """
+        ALTER TABLE errors ADD COLUMN fingerprint TEXT;
+    """),
+)
+STORE_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_errors_fingerprint ON errors (fingerprint);
+"""
+
+# Rows are buffered and written with executemany in batches of this size
+INSERT_BATCH = 1000
+
+
+def _iso_utc(moment):
+    """Timestamp in the browser's toISOString() format, so text comparison orders correctly"""
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+
+class CaptureStore:
+    """SQLite store of ingested browser-state dumps"""
+
+    def __init__(self, db_path=DEFAULT_STORE):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute('PRAGMA synchronous = NORMAL')
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.executescript(STORE_SCHEMA)
+        for table, column, script in STORE_MIGRATIONS:
+            columns = [row[1] for row in self.db.execute(f'PRAGMA table_info({table})')]
+            if column not in columns:
+                self.db.executescript(script)
+        self.db.executescript(STORE_INDEXES)
+
+    def close(self):
+        self.db.close()
+
+    def ingest(self, path):
+        """Load one dump; returns False if it is already stored unchanged"""
+        stat = os.stat(path)
+        row = self.db.execute(
+            'SELECT id, file_size, file_mtime FROM captures WHERE file = ?', (path,)).fetchone()
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            return False
+
+        with self.db:
+            if row:
+                self.db.execute('DELETE FROM captures WHERE id = ?', (row[0],))
+            capture_id = self.db.execute(
+                'INSERT INTO captures (file, file_size, file_mtime, ingested_at) VALUES (?, ?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime, _iso_utc(datetime.now(timezone.utc)))).lastrowid
+
+            with open(path, 'r', encoding='utf-8') as fp:
+                self._ingest_events(capture_id, iter_state_events(fp))
+        return True
+
+    def _ingest_events(self, capture_id, events):
+        inserts = {
+            'consoleLogs': 'INSERT INTO console_logs VALUES (?, ?, ?, ?)',
+            'networkRequests': 'INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            'errors': 'INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?)',
+        }
+        pending = {kind: [] for kind in inserts}
+        counts = Counter()
+        routes = {}
+        meta = {}
+
+        for kind, item in events:
+            if kind == 'consoleLogs':
+                # Logs without a type are plain console.log calls
+                row = (capture_id, item.get('timestamp'), item.get('type') or 'log', item.get('message'))
+            elif kind == 'networkRequests':
+                status = item.get('status', 'pending')
+                method = item.get('method', 'GET').upper()
+                route = normalize_route(item.get('url', ''))
+                duration = request_duration(item)
+                size = request_size(item)
+                row = (capture_id, item.get('timestamp'), method, str(item.get('url')), route,
+                       str(status), duration, size)
+
+                totals = routes.setdefault((method, route), [0, 0, 0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += isinstance(status, int) and status >= 400
+                if duration is not None:
+                    totals[2] += 1
+                    totals[3] += duration
+                totals[4] += size or 0
+            elif kind == 'errors':
+                row = (capture_id, item.get('timestamp'), item.get('message'),
+                       item.get('source'), item.get('line'), error_fingerprint(item)[0])
+            else:
+                if kind == 'meta':
+                    meta[item[0]] = item[1]
+                continue
+
+            counts[kind] += 1
+            rows = pending[kind]
+            rows.append(row)
+            if len(rows) >= INSERT_BATCH:
+                self.db.executemany(inserts[kind], rows)
+                rows.clear()
+
+        for kind, rows in pending.items():
+            if rows:
+                self.db.executemany(inserts[kind], rows)
+        self.db.executemany(
+            'INSERT INTO route_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(capture_id, method, route, *totals) for (method, route), totals in routes.items()])
+
+        url = meta.get('url')
+        self.db.execute(
+            """UPDATE captures SET url = ?, path = ?, title = ?, captured_at = ?,
+                   console_count = ?, request_count = ?, error_count = ?
+               WHERE id = ?""",
+            (url, urlsplit(url).path if url else None, meta.get('title'), meta.get('timestamp'),
+             counts['consoleLogs'], counts['networkRequests'], counts['errors'], capture_id))
+
+    # -- queries -------------------------------------------------------------
+
+    @staticmethod
+    def _filters(page=None, days=None, ts_column='x.ts'):
+        """WHERE clause and parameters for the common --page/--days options
+
+        --page is a prefix of the page path (/Projects) or of the full URL.
+        Prefix matches are written as ranges so they can use the indexes.
+        """
+        clauses, params = [], []
+        if page:
+            column = 'c.url' if '://' in page else 'c.path'
+            clauses.append(f'{column} >= ? AND {column} < ?')
+            params += [page, page + '\U0010ffff']
+        if days:
+            clauses.append(f'{ts_column} >= ?')
+            params.append(_iso_utc(datetime.now(timezone.utc) - timedelta(days=days)))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def top_errors(self, page=None, days=None, limit=20):
+        """Error clusters; rows ingested before fingerprinting group by message"""
+        where, params = self._filters(page, days)
+        return self.db.execute(
+            f"""SELECT MIN(x.message), COUNT(*), COUNT(DISTINCT c.path), MIN(x.ts), MAX(x.ts),
+                       x.fingerprint
+                FROM errors x JOIN captures c ON c.id = x.capture_id{where}
+                GROUP BY COALESCE(x.fingerprint, x.message) ORDER BY COUNT(*) DESC LIMIT ?""",
+            params + [limit]).fetchall()
+
+    def failing_endpoints(self, page=None, days=None, limit=20):
+        where, params = self._filters(page, days, ts_column='c.captured_at')
+        return self.db.execute(
+            f"""SELECT x.method || ' ' || x.route, SUM(x.failures) AS failures, SUM(x.requests),
+                       SUM(x.duration_total) / NULLIF(SUM(x.timed), 0), MAX(c.captured_at)
+                FROM route_stats x JOIN captures c ON c.id = x.capture_id{where}
+                GROUP BY x.method, x.route HAVING failures > 0
+                ORDER BY failures DESC LIMIT ?""",
+            params + [limit]).fetchall()
+
+    def pages(self, page=None, days=None, limit=20):
+        where, params = self._filters(page, days, ts_column='c.captured_at')
+        return self.db.execute(
+            f"""SELECT c.path, COUNT(*), SUM(c.console_count), SUM(c.request_count),
+                       SUM(c.error_count), MAX(c.captured_at)
+                FROM captures c{where}
+                GROUP BY c.path ORDER BY SUM(c.error_count) DESC, COUNT(*) DESC LIMIT ?""",
+            params + [limit]).fetchall()
+
+    def logs(self, log_type=None, page=None, days=None, limit=20):
+        where, params = self._filters(page, days)
+        if log_type:
+            where += (' AND ' if where else ' WHERE ') + 'x.type = ?'
+            params.append(log_type)
+        return self.db.execute(
+            f"""SELECT x.type, x.message, COUNT(*), MAX(x.ts)
+                FROM console_logs x JOIN captures c ON c.id = x.capture_id{where}
+                GROUP BY x.type, x.message ORDER BY COUNT(*) DESC LIMIT ?""",
+            params + [limit]).fetchall()
+
+    # -- page weights --------------------------------------------------------
+
+    def weight_history(self, page, window):
+        """Last `window` recorded weights of a page, newest first"""
+        columns = ', '.join(column for _, column, _ in WEIGHT_METRICS)
+        rows = self.db.execute(
+            f'SELECT {columns} FROM page_weights WHERE page = ? ORDER BY checked_at DESC, rowid DESC LIMIT ?',
+            (page, window)).fetchall()
+        return [dict(zip((key for key, _, _ in WEIGHT_METRICS), row)) for row in rows]
+
+    def record_weight(self, weight):
+        columns = [column for _, column, _ in WEIGHT_METRICS]
+        with self.db:
+            self.db.execute(
+                f"INSERT INTO page_weights (page, checked_at, url, {', '.join(columns)}) "
+                f"VALUES (?, ?, ?{', ?' * len(columns)})",
+                (weight['page'], _iso_utc(datetime.now(timezone.utc)), weight['url'],
+                 *(weight[key] for key, _, _ in WEIGHT_METRICS)))
+
+
+# ---------------------------------------------------------------------------
+# Page weight baselines
+#
+# Heavy pages get slow gradually, a few elements and one more script per
+# change. Each check compares a snapshot with the median of the page's last
+# recorded runs, so one noisy run neither triggers nor hides a regression.
+# ---------------------------------------------------------------------------
+
+# (summary key, store column, smallest increase that counts as a regression)
+WEIGHT_METRICS = (
+    ('elements', 'elements', 50),
+    ('scripts', 'scripts', 1),
+    ('stylesheets', 'stylesheets', 1),
+    ('inputs', 'inputs', 5),
+    ('requests', 'requests', 3),
+    ('requestBytes', 'request_bytes', 50 * 1024),
+)
+
+
+def page_weight(report):
+    """DOM and network weight of one snapshot, keyed by the page's route template"""
+    url = report.meta.get('url')
+    return {
+        'page': normalize_route(url) if url else 'unknown',
+        'url': url,
+        'elements': report.dom.counts.get('totalElements', 0),
+        'scripts': report.dom.counts.get('scripts', 0),
+        'stylesheets': report.dom.counts.get('stylesheets', 0),
+        'inputs': report.dom.inputs,
+        'requests': report.network.total,
+        'requestBytes': sum(stats.bytes for stats in report.network.routes.values()),
+    }
+
+
+def check_weight(store, weight, window=10, threshold=10.0, min_runs=3, accept=False, record=True):
+    """Compare a page weight with the page's rolling baseline
+
+    A metric regresses when it exceeds the baseline median by more than
+    threshold percent and by at least its minimum increase. Checks without
+    regressions (or all of them with accept) become part of the baseline.
+    """
+    history = store.weight_history(weight['page'], window)
+    result = dict(weight, runs=len(history), baseline=None, regressions=[])
+    if len(history) < min_runs:
+        result['status'] = 'learning'
+    else:
+        result['baseline'] = {key: statistics.median(run[key] for run in history)
+                              for key, _, _ in WEIGHT_METRICS}
+        for key, _, min_increase in WEIGHT_METRICS:
+            base, value = result['baseline'][key], weight[key]
+            if value - base >= min_increase and value > base * (1 + threshold / 100):
+                result['regressions'].append({'metric': key, 'value': value, 'baseline': base,
+                                              'change': round((value / base - 1) * 100, 1) if base else None})
+        result['status'] = 'regressed' if result['regressions'] else 'ok'
+        if result['regressions'] and accept:
+            result['status'] = 'accepted'
+    if record and result['status'] != 'regressed':
+        store.record_weight(weight)
+    return result
+
+
+def render_weights(results, window, threshold):
+    lines = ["", f"📏 PAGE WEIGHT (baseline: median of the last {window} runs, threshold +{threshold:g}%):",
+             "-" * 50]
+    marks = {'ok': '✓', 'learning': '·', 'regressed': '✗', 'accepted': '!'}
+    for result in results:
+        parts = []
+        for key, _, _ in WEIGHT_METRICS:
+            value = result[key]
+            text = _format_size(value) if key == 'requestBytes' else str(value)
+            base = (result['baseline'] or {}).get(key)
+            if base:
+                text += f" ({(value / base - 1) * 100:+.0f}%)"
+            parts.append(f"{key} {text}")
+        lines.append(f"{marks[result['status']]} {result['page']}  " + "  ".join(parts))
+        if result['status'] == 'learning':
+            lines.append(f"    learning the baseline (runs recorded: {result['runs']})")
+        for regression in result['regressions']:
+            base = regression['baseline']
+            base = _format_size(base) if regression['metric'] == 'requestBytes' else f"{base:g}"
+            value = regression['value']
+            value = _format_size(value) if regression['metric'] == 'requestBytes' else value
+            change = f"+{regression['change']}%" if regression['change'] is not None else "new"
+            lines.append(f"    {regression['metric']}: {value} vs. baseline {base} ({change})")
+
+    regressed = sum(result['status'] == 'regressed' for result in results)
+    accepted = sum(result['status'] == 'accepted' for result in results)
+    lines += ["", f"Pages checked: {len(results)}, regressed: {regressed}"
+                  + (f", accepted into the baseline: {accepted}" if accepted else "")]
+    return lines
+
+
+def run_ingest(args):
+    """ingest subcommand"""
+    paths = collect_state_files(args.inputs)
+    store = CaptureStore(args.db)
+    started = time.perf_counter()
+    ingested = skipped = 0
+    failed = []
+    try:
+        for path in paths:
+            try:
+                if store.ingest(os.path.abspath(path)):
+                    ingested += 1
+                else:
+                    skipped += 1
+            except (OSError, ValueError, KeyError, TypeError, AttributeError, sqlite3.Error) as e:
+                failed.append((path, f"{type(e).__name__}: {e}"))
+    finally:
+        store.close()
+
+    print(f"📥 Ingested {ingested} dumps into {args.db} "
+          f"({skipped} unchanged, {len(failed)} failed) in {time.perf_counter() - started:.2f}s")
+    for path, error in failed:
+        print(f"  {path}: {error}")
+    if failed:
+        sys.exit(1)
+
+
+def run_query(args):
+    """query subcommand"""
+    if not os.path.exists(args.db):
+        print(f"No capture store at {args.db} - run 'ingest' first")
+        sys.exit(1)
+
+    store = CaptureStore(args.db)
+    started = time.perf_counter()
+    try:
+        if args.what == 'errors':
+            rows = store.top_errors(args.page, args.days, args.limit)
+            print("\n❌ TOP ERRORS:")
+            print("-" * 50)
+            for message, count, pages, first, last, fingerprint in rows:
+                print(f"  {count:>6}x {message[:100]}")
+                print(f"          [{fingerprint or '-'}] pages: {pages}, first: {first}, last: {last}")
+        elif args.what == 'endpoints':
+            rows = store.failing_endpoints(args.page, args.days, args.limit)
+            print("\n🌐 TOP FAILING ENDPOINTS:")
+            print("-" * 50)
+            for route, failures, total, avg_ms, last in rows:
+                avg = '-' if avg_ms is None else f"{avg_ms:.0f}ms"
+                print(f"  {failures:>6}/{total:<6} {route[:60]:<60} avg {avg:>7}  last {last}")
+        elif args.what == 'pages':
+            rows = store.pages(args.page, args.days, args.limit)
+            print("\n📄 PAGES:")
+            print("-" * 50)
+            for path, captures, logs, requests, errors, last in rows:
+                print(f"  {path or 'unknown'}: {captures} captures, {logs} logs, "
+                      f"{requests} requests, {errors} errors, last {last}")
+        else:
+            rows = store.logs(args.type, args.page, args.days, args.limit)
+            print("\n📝 CONSOLE LOGS:")
+            print("-" * 50)
+            for log_type, message, count, last in rows:
+                print(f"  {count:>6}x {(log_type or 'log').upper()}: {(message or '')[:100]}  (last {last})")
+    finally:
+        store.close()
+
+    if not rows:
+        print("No matching records")
+    print(f"\n({len(rows)} rows in {(time.perf_counter() - started) * 1000:.1f} ms)")
+
+
+def run_baseline(args):
+    """baseline subcommand"""
+    paths = collect_state_files(args.inputs)
+    if not paths:
+        print("No state files found")
+        sys.exit(1)
+
+    weights = []
+    batch = run_batch(paths, args.jobs, on_file=lambda path, report: weights.append(page_weight(report)))
+    store = CaptureStore(args.db)
+    try:
+        results = [check_weight(store, weight, args.window, args.threshold, args.min_runs,
+                                args.accept, record=not args.dry_run)
+                   for weight in weights]
+    finally:
+        store.close()
+
+    if args.format == 'json':
+        write_json({'pages': results,
+                    'failed': [{'file': path, 'error': error} for path, error in batch.failed]})
+    else:
+        lines = render_weights(results, args.window, args.threshold)
+        for path, error in batch.failed:
+            lines.append(f"  {path}: {error}")
+        write_lines(lines)
+    if batch.failed or any(result['status'] == 'regressed' for result in results):
+        sys.exit(1)
+
+
+def add_baseline_arguments(parser):
+    """Options of the page weight check (shared with browser-suite.py)"""
+    parser.add_argument('--window', type=int, default=10,
+                        help="baseline = median of the page's last N recorded runs (default: 10)")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="allowed growth over the baseline in percent (default: 10)")
+    parser.add_argument('--min-runs', type=int, default=3,
+                        help="recorded runs needed before a page is checked (default: 3)")
+    parser.add_argument('--accept', action='store_true',
+                        help="record regressed pages too (intended growth becomes the new baseline)")
+    parser.add_argument('--dry-run', action='store_true', help="compare only, record nothing")
+
+
+def store_main(argv):
+    """Entry point for the ingest/query/baseline subcommands"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=DEFAULT_STORE, help=f"store path (default: {DEFAULT_STORE})")
+
+    parser = argparse.ArgumentParser(
+        prog='analyze-browser-state.py',
+        description="Local store of historical browser-state captures")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', parents=[common], help="load dumps into the store")
+    ingest.add_argument('inputs', nargs='+', help="state files, directories or globs")
+
+    query = commands.add_parser('query', parents=[common], help="query stored captures")
+    query.add_argument('what', choices=('errors', 'endpoints', 'pages', 'logs'))
+    query.add_argument('--page', help="page path prefix (/Projects) or full URL prefix")
+    query.add_argument('--days', type=float, help="only the last N days")
+    query.add_argument('--type', help="console log type (logs only)")
+    query.add_argument('--limit', type=int, default=20)
+
+    baseline = commands.add_parser('baseline', parents=[common],
+                                   help="check page weight against the rolling baseline")
+    baseline.add_argument('inputs', nargs='+', help="state files, directories or globs")
+    add_baseline_arguments(baseline)
+    baseline.add_argument('-j', '--jobs', type=int, default=None,
+                          help="worker processes (default: CPU count)")
+    baseline.add_argument('--format', choices=('text', 'json'), default='text')
+
+    args = parser.parse_args(argv)
+    if args.command == 'ingest':
+        run_ingest(args)
+    elif args.command == 'baseline':
+        run_baseline(args)
+    else:
+        run_query(args)
+
+
+def analyze_single(path, stream=False, output_format='text'):
+    """Report on one dump (or stdin)"""
+    fp = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        if stream:
+            stream_report(fp, output_format)
+            return
+        data = StateReport.from_state(json.load(fp)).summary()
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+    write_single(data, output_format)
+
+
+def write_single(data, output_format='text', lines=None):
+    """Write a single-dump summary (lines: its already rendered text report)"""
+    if output_format == 'json':
+        write_json(data)
+    elif output_format == 'ndjson':
+        sys.stdout.write(''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n'
+                                 for record in ndjson_records(data)))
+    else:
+        write_lines(lines if lines is not None else render_state(data))
+
+
+# ---------------------------------------------------------------------------
+# Self-profiling
+#
+# --profile times the analyzer's own phases on one dump and `generate` writes
+# synthetic dumps of any size, which together make a repeatable benchmark of
+# how the analyzer scales.
+# ---------------------------------------------------------------------------
+
+class PhaseProfiler:
+    """Wall time, CPU time and Python memory per named phase
+
+    Memory comes from tracemalloc: the peak of traced allocations above the
+    level at the start of the phase, and what the phase left allocated.
+    Tracing slows allocation-heavy code down noticeably, so only compare
+    timings of runs made with the same setting.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.phases = []
+        self.current = None
+        if trace_memory:
+            tracemalloc.start()
+
+    def close(self):
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    def start(self, name=None):
+        memory = 0
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+        self.current = (name, time.perf_counter(), time.process_time(), memory)
+
+    def stop(self, name=None):
+        """End the running phase; name is for phases started without one"""
+        started_name, wall, cpu, memory = self.current
+        record = {
+            'phase': name or started_name,
+            'wall': time.perf_counter() - wall,
+            'cpu': time.process_time() - cpu,
+            'peak': None,
+            'retained': None,
+        }
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record.update(peak=peak - memory, retained=current - memory)
+        self.phases.append(record)
+        self.current = None
+
+    def lap(self, name):
+        """End the running phase as name and start the next one"""
+        self.stop(name)
+        self.start()
+
+    @contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def summary(self):
+        peaks = [phase['peak'] for phase in self.phases if phase['peak'] is not None]
+        return {
+            'phases': self.phases,
+            'wall': sum(phase['wall'] for phase in self.phases),
+            'cpu': sum(phase['cpu'] for phase in self.phases),
+            'peak': max(peaks) if peaks else None,
+        }
+
+
+def profile_single(path, profiler, stream=False, output_format='text'):
+    """analyze_single with its phases timed; returns the input size in bytes"""
+    if stream:
+        fp = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            # Reading, parsing, statistics and output are interleaved, so the
+            # phases are the stretches between the ends of top-level sections
+            profiler.start()
+            stream_report(fp, output_format, lambda key: profiler.lap(f"stream {key}"))
+            profiler.stop('summary + write')
+            return fp.buffer.tell() if path != '-' else None
+        finally:
+            if fp is not sys.stdin:
+                fp.close()
+
+    with profiler.phase('read'):
+        if path == '-':
+            raw = sys.stdin.buffer.read()
+        else:
+            with open(path, 'rb') as fp:
+                raw = fp.read()
+    size = len(raw)
+    with profiler.phase('parse'):
+        state = json.loads(raw)
+    raw = None
+
+    report = StateReport()
+    for key, value in state.items():
+        if key in SECTION_RENDERERS:
+            with profiler.phase(f"{key} stats"):
+                report.add_section(key, value)
+        else:
+            report.add_section(key, value)
+    with profiler.phase('summary'):
+        data = report.summary()
+
+    lines = None
+    if output_format == 'text':
+        lines = render_header(data) + render_page_info(data)
+        for key in REPORT_SECTIONS:
+            with profiler.phase(f"{key} render"):
+                lines += SECTION_RENDERERS[key](data[key])
+        lines += render_footer(data)
+    with profiler.phase('write'):
+        write_single(data, output_format, lines)
+        sys.stdout.flush()
+    return size
+
+
+def _format_signed_size(size):
+    return f"-{_format_size(-size)}" if size < 0 else _format_size(size)
+
+
+def render_profile(data, path, size):
+    def ms(seconds):
+        return f"{seconds * 1000:.1f}ms"
+
+    def memory(value):
+        return '-' if value is None else _format_signed_size(value)
+
+    title = f"{path} ({_format_size(size)})" if size is not None else path
+    lines = ["", f"⏱️  ANALYZER PROFILE: {title}", "-" * 50,
+             f"  {'Phase':<28} {'Wall':>10} {'CPU':>10} {'Peak mem':>11} {'Retained':>11}"]
+    for phase in data['phases']:
+        lines.append(f"  {phase['phase']:<28} {ms(phase['wall']):>10} {ms(phase['cpu']):>10} "
+                     f"{memory(phase['peak']):>11} {memory(phase['retained']):>11}")
+    lines.append(f"  {'total':<28} {ms(data['wall']):>10} {ms(data['cpu']):>10} {memory(data['peak']):>11}")
+    parse = next((phase for phase in data['phases'] if phase['phase'] == 'parse'), None)
+    if parse and size and parse['wall']:
+        lines.append(f"  JSON decoding: {size / parse['wall'] / 1024 / 1024:.1f} MB/s")
+    return lines
+
+
+def run_profiled(args):
+    """--profile: one dump with the phase table on stderr, optionally under cProfile"""
+    profiler = PhaseProfiler(trace_memory=not args.no_tracemalloc)
+    profile = cProfile.Profile() if args.cprofile else None
+    try:
+        if profile:
+            profile.enable()
+        size = profile_single(args.state[0], profiler, args.stream, args.format)
+    finally:
+        if profile:
+            profile.disable()
+        profiler.close()
+
+    lines = render_profile(profiler.summary(), args.state[0], size)
+    if profile:
+        profile.dump_stats(args.cprofile)
+        lines.append(f"  cProfile stats: {args.cprofile} (python -m pstats {args.cprofile})")
+    write_lines(lines, sys.stderr)
+
+
+# Share of each event section in a synthetic dump
+SYNTHETIC_MIX = (('consoleLogs', 0.5), ('networkRequests', 0.4), ('errors', 0.08), ('forms', 0.02))
+
+SYNTHETIC_PAGES = ('/', '/Projects', '/Projects/{id}', '/Customers/{id}', '/Orchestrators',
+                   '/WorkflowDesigner?projectId={guid}', '/RequestsMvc/{id}')
+SYNTHETIC_ENDPOINTS = (
+    ('GET', '/api/projects/{id}'), ('GET', '/api/customers'), ('POST', '/api/orchestrators/{guid}/execute'),
+    ('GET', '/api/workflows/{guid}/steps'), ('GET', '/api/tools'), ('PUT', '/api/requests/{id}'),
+    ('GET', '/api/chat/recent'), ('GET', '/api/models'),
+)
+# Call stacks as (function, script, line, column) frames; the same code
+# paths keep failing, so each error message comes from a few of them
+SYNTHETIC_STACKS = (
+    (('render', 'site.js', 112, 17), ('loadSteps', 'workflow-designer.js', 58, 9)),
+    (('loadSteps', 'workflow-designer.js', 204, 31), ('HubConnection.invoke', 'signalr.min.js', 1, 3442)),
+    (('onSubmit', 'projects.js', 77, 5), ('render', 'site.js', 112, 17)),
+    (('HubConnection.invoke', 'signalr.min.js', 1, 3442), ('onSubmit', 'projects.js', 91, 13)),
+)
+# Error messages with the indexes of the SYNTHETIC_STACKS they are thrown from
+SYNTHETIC_ERRORS = (
+    ("Uncaught TypeError: Cannot read properties of undefined (reading 'id')", (0, 2)),
+    ("Uncaught ReferenceError: workflowDesigner is not defined", (1,)),
+    ("Failed to load resource: the server responded with a status of {n} ()", (3,)),
+    ("Uncaught SyntaxError: Unexpected token '<', \"<!DOCTYPE \"... is not valid JSON", (2, 3)),
+    ("Unhandled Promise Rejection", (1,)),
+    ("Uncaught Error: Step {guid} not found", (0,)),
+)
+SYNTHETIC_LOGS = (
+    ('log', "SignalR connected"), ('log', "Loaded {n} projects"), ('info', "Workflow {guid} saved"),
+    ('warn', "Slow response from /api/projects/{id}: {n}ms"), ('error', "Request failed with status {n}"),
+    ('debug', "Render took {n}ms"),
+)
+
+
+class SyntheticState:
+    """Pseudo-random getPageState()-shaped items, reproducible from a seed"""
+
+    BASE_URL = 'https://localhost:5005'
+
+    def __init__(self, seed=1, body_bytes=2048):
+        self.rng = random.Random(seed)
+        self.body_bytes = body_bytes
+        self.moment = datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc)
+
+    def fill(self, template):
+        return (template.replace('{id}', str(self.rng.randrange(1, 100000)))
+                .replace('{n}', str(self.rng.randrange(1, 5000)))
+                .replace('{guid}', '%08x-%04x-%04x-%04x-%012x' % tuple(
+                    self.rng.getrandbits(bits) for bits in (32, 16, 16, 16, 48))))
+
+    def timestamp(self):
+        self.moment += timedelta(milliseconds=self.rng.random() * 50)
+        return _iso_utc(self.moment)
+
+    def stack(self, frames):
+        return "Error\n" + '\n'.join(f"    at {name} ({self.BASE_URL}/js/{script}:{line}:{column})"
+                                      for name, script, line, column in frames)
+
+    def item(self, section):
+        rng = self.rng
+        if section == 'consoleLogs':
+            log_type, message = rng.choice(SYNTHETIC_LOGS)
+            return {'type': log_type, 'message': self.fill(message), 'timestamp': self.timestamp(),
+                    'stack': self.stack(rng.choice(SYNTHETIC_STACKS))}
+        if section == 'networkRequests':
+            method, path = rng.choice(SYNTHETIC_ENDPOINTS)
+            started = self.timestamp()
+            duration = rng.lognormvariate(4, 1)
+            request = {'url': self.BASE_URL + self.fill(path), 'method': method, 'timestamp': started,
+                       'startTime': started, 'endTime': started,
+                       'status': rng.choice((200, 200, 200, 200, 201, 204, 304, 400, 404, 500)),
+                       'statusText': '', 'duration': round(duration, 1)}
+            if rng.random() < 0.5:
+                # XHR requests keep their response body
+                request['response'] = 'x' * rng.randrange(self.body_bytes // 2, self.body_bytes * 3 // 2 + 1)
+                request['size'] = len(request['response'])
+            return request
+        if section == 'errors':
+            message, stacks = rng.choice(SYNTHETIC_ERRORS)
+            frames = SYNTHETIC_STACKS[rng.choice(stacks)]
+            _, script, line, column = frames[0]
+            return {'message': self.fill(message), 'source': f"{self.BASE_URL}/js/{script}", 'line': line,
+                    'column': column, 'error': self.stack(frames), 'timestamp': self.timestamp()}
+        fields = {f"field{index}": {'type': 'text', 'value': self.fill('value {n}'), 'checked': False}
+                  for index in range(rng.randrange(1, 12))}
+        return {'index': 0, 'id': f"form{rng.randrange(100)}", 'name': '', 'action': self.BASE_URL + '/Projects/create',
+                'method': 'post', 'fields': fields}
+
+    def write(self, out, events, inputs=200):
+        """Write a dump with about `events` items split by SYNTHETIC_MIX"""
+        url = self.BASE_URL + self.fill(self.rng.choice(SYNTHETIC_PAGES))
+        out.write('{' + json.dumps('url') + ': ' + json.dumps(url) + ', "title": "Synthetic dump - OptimalyAI"')
+        for section, share in SYNTHETIC_MIX:
+            count = round(events * share)
+            out.write(f', "{section}": [')
+            for start in range(0, count, 1000):
+                chunk = ', '.join(json.dumps(self.item(section)) for _ in range(min(1000, count - start)))
+                out.write((', ' if start else '') + chunk)
+            out.write(']')
+        dom = {'totalElements': self.rng.randrange(500, 5000), 'forms': 3, 'images': 12, 'links': 80,
+               'scripts': 14, 'stylesheets': 6, 'visibleText': 'Synthetic page ' * 60,
+               'inputs': [{'type': self.rng.choice(('text', 'text', 'checkbox', 'select-one', 'password')),
+                           'id': f"input{index}", 'name': f"input{index}", 'value': self.fill('{n}'),
+                           'placeholder': '', 'required': False, 'disabled': False, 'visible': True}
+                          for index in range(inputs)]}
+        out.write(', "dom": ' + json.dumps(dom))
+        out.write(', "localStorage": {"theme": "dark"}, "sessionStorage": {}, "cookies": ""')
+        out.write(', "viewport": {"width": 1366, "height": 900, "scrollX": 0, "scrollY": 0}')
+        out.write(', "timestamp": ' + json.dumps(self.timestamp()) + '}\n')
+
+
+def events_for_size(size, seed=1, body_bytes=2048, sample=2000):
+    """Number of events that makes a synthetic dump of about size bytes"""
+    generator = SyntheticState(seed, body_bytes)
+    average = sum(len(json.dumps(generator.item(section))) + 2
+                  for section, share in SYNTHETIC_MIX
+                  for _ in range(round(sample * share))) / sample
+    return max(1, round(size / average))
+
+
+def generate_main(argv):
+    """generate subcommand: synthetic inspector-shaped dump"""
+    parser = argparse.ArgumentParser(
+        prog='analyze-browser-state.py generate',
+        description="Writes a synthetic getPageState() dump for benchmarking the analyzer")
+    parser.add_argument('output', help="output file, '-' for stdout")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--events', type=int, default=10000,
+                      help="console logs, requests, errors and forms in total (default: 10000)")
+    size.add_argument('--size', type=float, metavar='MB', help="approximate dump size instead of --events")
+    parser.add_argument('--body-bytes', type=int, default=2048,
+                        help="average response body kept on half of the requests (default: 2048)")
+    parser.add_argument('--seed', type=int, default=1, help="same seed, same dump (default: 1)")
+    args = parser.parse_args(argv)
+
+    events = args.events
+    if args.size is not None:
+        events = events_for_size(args.size * 1024 * 1024, args.seed, args.body_bytes)
+    started = time.perf_counter()
+    generator = SyntheticState(args.seed, args.body_bytes)
+    if args.output == '-':
+        generator.write(sys.stdout, events)
+        return
+    with open(args.output, 'w', encoding='utf-8') as out:
+        generator.write(out, events)
+    print(f"🧪 {args.output}: {events} events, {_format_size(os.path.getsize(args.output))} "
+          f"in {time.perf_counter() - started:.2f}s")
+
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python analyze-browser-state.py <state.json>")
-        print("Or pipe JSON: echo '{...}' | python analyze-browser-state.py -")
+    if len(sys.argv) > 1 and sys.argv[1] in ('ingest', 'query', 'baseline'):
+        store_main(sys.argv[1:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'generate':
+        generate_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Analyzes the JSON output from browser-inspector.js")
+    parser.add_argument('state', nargs='+',
+                        help="state JSON file, '-' to read stdin, or directories/globs for a batch report")
+    parser.add_argument('--stream', action='store_true',
+                        help="parse incrementally with constant memory (for large dumps)")
+    parser.add_argument('--format', choices=('text', 'json', 'ndjson'), default='text',
+                        help="text report, one JSON document, or NDJSON records "
+                             "(one per section, or one per file in batch mode)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="worker processes for batch mode (default: CPU count)")
+    parser.add_argument('--cache', default=DEFAULT_CACHE,
+                        help=f"batch result cache (default: {DEFAULT_CACHE})")
+    parser.add_argument('--no-cache', action='store_true', help="re-parse every file in batch mode")
+    parser.add_argument('--cache-key', choices=('mtime', 'hash'), default='mtime',
+                        help="detect changed files by size+mtime (fast) or content hash")
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help="cache size limit in MB; least recently used entries are evicted")
+    parser.add_argument('--profile', action='store_true',
+                        help="time the analyzer itself: wall/CPU time and peak memory per phase on stderr "
+                             "(single dump only)")
+    parser.add_argument('--no-tracemalloc', action='store_true',
+                        help="with --profile: skip memory tracing, which slows allocation-heavy phases")
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help="with --profile: also dump cProfile stats to FILE (adds its own overhead)")
+    args = parser.parse_args()
+
+    if args.profile or args.cprofile:
+        if len(args.state) != 1 or not (args.state[0] == '-' or os.path.isfile(args.state[0])):
+            parser.error("--profile works on a single dump")
+        run_profiled(args)
+        return
+
+    if len(args.state) == 1 and (args.state[0] == '-' or os.path.isfile(args.state[0])):
+        analyze_single(args.state[0], args.stream, args.format)
+        return
+
+    paths = collect_state_files(args.state)
+    if not paths:
+        print("No state files found")
         sys.exit(1)
-    
-    # Read JSON
-    if sys.argv[1] == '-':
-        data = json.loads(sys.stdin.read())
+
+    on_file = None
+    if args.format == 'ndjson':
+        def on_file(path, report):
+            write_json({'type': 'file', 'file': path, 'data': report.summary()})
+
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_size * 1024 * 1024, args.cache_key)
+    try:
+        batch = run_batch(paths, args.jobs, args.stream, cache, on_file)
+    finally:
+        if cache:
+            cache.close()
+
+    data = batch.summary()
+    if args.format == 'json':
+        write_json(data)
+    elif args.format == 'ndjson':
+        write_json({'type': 'aggregate', 'data': data})
     else:
-        with open(sys.argv[1], 'r') as f:
-            data = json.load(f)
-    
-    # Header
-    print("=" * 60)
-    print("🔍 BROWSER STATE ANALYSIS")
-    print("=" * 60)
-    print(f"URL: {data.get('url', 'unknown')}")
-    print(f"Title: {data.get('title', 'unknown')}")
-    print(f"Timestamp: {data.get('timestamp', 'unknown')}")
-    
-    # Viewport
-    viewport = data.get('viewport', {})
-    print(f"Viewport: {viewport.get('width')}x{viewport.get('height')}")
-    print(f"Scroll: X={viewport.get('scrollX')}, Y={viewport.get('scrollY')}")
-    
-    # Analyze each section
-    analyze_console_logs(data.get('consoleLogs', []))
-    analyze_network_requests(data.get('networkRequests', []))
-    analyze_errors(data.get('errors', []))
-    analyze_dom(data.get('dom', {}))
-    analyze_forms(data.get('forms', []))
-    
-    # Storage summary
-    print("\n💾 STORAGE:")
-    print("-" * 50)
-    local_storage = data.get('localStorage', {})
-    session_storage = data.get('sessionStorage', {})
-    print(f"LocalStorage items: {len(local_storage)}")
-    print(f"SessionStorage items: {len(session_storage)}")
-    
-    # Summary
-    print("\n" + "=" * 60)
-    print("📊 SUMMARY:")
-    print(f"✓ Console logs: {len(data.get('consoleLogs', []))}")
-    print(f"✓ Network requests: {len(data.get('networkRequests', []))}")
-    print(f"✓ Errors: {len(data.get('errors', []))}")
-    print(f"✓ Forms: {len(data.get('forms', []))}")
-    print("=" * 60)
+        write_lines(render_batch(data))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
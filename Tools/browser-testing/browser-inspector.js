@@ -10,12 +10,162 @@
         networkRequests: [],
         errors: [],
         
+        // Live mode state (see startLive)
+        live: null,
+        
         init: function() {
             this.interceptConsole();
             this.interceptNetwork();
             this.interceptErrors();
             this.addInspectorPanel();
             console.log('🔍 Browser Inspector initialized');
+            
+            // window.BrowserInspectorConfig = {liveUrl: '...'} before injection enables live mode
+            const config = window.BrowserInspectorConfig || {};
+            if (config.liveUrl) {
+                this.startLive(config.liveUrl);
+            }
+        },
+        
+        // Live mode: push every event to live-collector.py as it happens, so
+        // nothing is lost to the ring buffers below on long sessions
+        liveQueueLimit: 5000,       // events kept while the collector is unreachable
+        beaconBytes: 32 * 1024,     // per sendBeacon call; browsers allow ~64 KB in flight
+        
+        startLive: function(url) {
+            const self = this;
+            this.live = {
+                url: url || 'http://localhost:5055/events',
+                session: Date.now().toString(36) + Math.random().toString(36).slice(2, 8),
+                seq: 0,
+                queue: [],
+                inFlight: null,
+                dropped: 0,
+                sending: false,
+                timer: null
+            };
+            window.addEventListener('pagehide', () => self.flushLive(true));
+            console.log('📡 Browser Inspector live mode: ' + this.live.url);
+        },
+        
+        emit: function(kind, data) {
+            const live = this.live;
+            if (!live) {
+                return;
+            }
+            
+            // Sequence numbers let the collector detect gaps and retransmits
+            live.queue.push({seq: ++live.seq, kind: kind, data: data});
+            this.trimLiveQueue();
+            if (live.queue.length >= 500) {
+                this.flushLive();
+            } else if (!live.timer && !live.sending) {
+                live.timer = setTimeout(() => this.flushLive(), 200);
+            }
+        },
+        
+        // Drop the oldest events once the queue is full; the count goes out
+        // with every batch so the collector reports them as lost
+        trimLiveQueue: function() {
+            const live = this.live;
+            const excess = live.queue.length - this.liveQueueLimit;
+            if (excess > 0) {
+                live.queue.splice(0, excess);
+                live.dropped += excess;
+            }
+        },
+        
+        liveBody: function(events) {
+            return JSON.stringify({
+                session: this.live.session,
+                url: window.location.href,
+                title: document.title,
+                dropped: this.live.dropped,
+                events: events
+            });
+        },
+        
+        flushLive: function(unloading) {
+            const self = this;
+            const live = this.live;
+            clearTimeout(live.timer);
+            live.timer = null;
+            
+            if (unloading) {
+                this.flushLiveBeacons();
+                return;
+            }
+            
+            // One batch in flight at a time keeps events in order
+            if (!live.queue.length || live.sending) {
+                return;
+            }
+            
+            const batch = live.queue;
+            live.queue = [];
+            live.inFlight = batch;
+            
+            // Original fetch, so the collector traffic is not itself recorded;
+            // text/plain keeps it a simple request without a CORS preflight
+            live.sending = true;
+            let retryDelay = 0;
+            this.originalFetch.call(window, live.url, {
+                method: 'POST',
+                headers: {'Content-Type': 'text/plain'},
+                body: this.liveBody(batch)
+            }).then(response => {
+                if (!response.ok) {
+                    throw new Error('Collector returned ' + response.status);
+                }
+            }).catch(() => {
+                // Keep the batch and retry; the collector drops duplicates by seq
+                live.queue = batch.concat(live.queue);
+                self.trimLiveQueue();
+                retryDelay = 1000;
+            }).finally(() => {
+                live.inFlight = null;
+                live.sending = false;
+                if (live.queue.length) {
+                    live.timer = setTimeout(() => self.flushLive(), retryDelay);
+                }
+            });
+        },
+        
+        // Page is going away: the batch still in flight (it may not arrive)
+        // and the queue go out as beacon-sized chunks
+        flushLiveBeacons: function() {
+            const live = this.live;
+            const events = (live.inFlight || []).concat(live.queue);
+            live.inFlight = null;
+            live.queue = [];
+            
+            // The quota is in bytes: measure UTF-8, not UTF-16 string length
+            const encoder = new TextEncoder();
+            let chunk = [];
+            let size = 0;
+            const chunks = [];
+            events.forEach(event => {
+                const eventSize = encoder.encode(JSON.stringify(event)).length + 1;
+                if (chunk.length && size + eventSize > this.beaconBytes) {
+                    chunks.push(chunk);
+                    chunk = [];
+                    size = 0;
+                }
+                chunk.push(event);
+                size += eventSize;
+            });
+            if (chunk.length) {
+                chunks.push(chunk);
+            }
+            
+            for (let i = 0; i < chunks.length; i++) {
+                if (!navigator.sendBeacon(live.url, this.liveBody(chunks[i]))) {
+                    // Beacon quota used up: the rest is lost, but try to tell the collector
+                    chunks.slice(i).forEach(rest => live.dropped += rest.length);
+                    navigator.sendBeacon(live.url, this.liveBody([]));
+                    return;
+                }
+            }
         },
         
         interceptConsole: function() {
@@ -25,7 +175,7 @@
             methods.forEach(method => {
                 const original = console[method];
                 console[method] = function(...args) {
-                    self.consoleLogs.push({
+                    const log = {
                         type: method,
                         message: args.map(arg => {
                             try {
@@ -36,7 +186,9 @@
                         }).join(' '),
                         timestamp: new Date().toISOString(),
                         stack: new Error().stack
-                    });
+                    };
+                    self.consoleLogs.push(log);
+                    self.emit('console', log);
                     
                     // Keep only last 100 logs
                     if (self.consoleLogs.length > 100) {
@@ -53,17 +205,29 @@
             
             // Intercept fetch
             const originalFetch = window.fetch;
+            this.originalFetch = originalFetch;
             window.fetch = function(...args) {
+                const start = performance.now();
                 const request = {
                     url: args[0],
                     method: args[1]?.method || 'GET',
                     timestamp: new Date().toISOString()
                 };
+                request.startTime = request.timestamp;
                 
                 return originalFetch.apply(this, args).then(response => {
                     request.status = response.status;
                     request.statusText = response.statusText;
+                    request.endTime = new Date().toISOString();
+                    request.duration = performance.now() - start;
+                    
+                    // Body is not read here, so size is only known from the header
+                    const length = response.headers.get('content-length');
+                    if (length !== null) {
+                        request.size = parseInt(length, 10);
+                    }
                     self.networkRequests.push(request);
+                    self.emit('network', request);
                     
                     if (self.networkRequests.length > 50) {
                         self.networkRequests.shift();
@@ -93,14 +257,22 @@
                 // Intercept send
                 const originalSend = xhr.send;
                 xhr.send = function(data) {
+                    const start = performance.now();
                     request.data = data;
+                    request.startTime = new Date().toISOString();
                     
                     xhr.addEventListener('load', function() {
                         request.status = xhr.status;
                         request.statusText = xhr.statusText;
+                        request.endTime = new Date().toISOString();
+                        request.duration = performance.now() - start;
                         request.response = xhr.responseText;
+                        request.size = xhr.responseText.length;
                         self.networkRequests.push(request);
                         
+                        // Bodies stay in the local buffer only; size is enough live
+                        self.emit('network', Object.assign({}, request, {response: undefined, data: undefined}));
+                        
                         if (self.networkRequests.length > 50) {
                             self.networkRequests.shift();
                         }
@@ -117,14 +289,16 @@
             const self = this;
             
             window.addEventListener('error', function(event) {
-                self.errors.push({
+                const error = {
                     message: event.message,
                     source: event.filename,
                     line: event.lineno,
                     column: event.colno,
                     error: event.error ? event.error.stack : null,
                     timestamp: new Date().toISOString()
-                });
+                };
+                self.errors.push(error);
+                self.emit('error', error);
                 
                 if (self.errors.length > 50) {
                     self.errors.shift();
@@ -132,11 +306,14 @@
             });
             
             window.addEventListener('unhandledrejection', function(event) {
-                self.errors.push({
+                const error = {
                     message: 'Unhandled Promise Rejection',
                     reason: event.reason,
+                    stack: event.reason && event.reason.stack,
                     timestamp: new Date().toISOString()
-                });
+                };
+                self.errors.push(error);
+                self.emit('error', error);
                 
                 if (self.errors.length > 50) {
                     self.errors.shift();
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Browser Suite
+Runs page scenarios in parallel, each in its own headless Chrome, and analyzes
+their getPageState() output in-process with analyze-browser-state.py
+
+Usage:
+    browser-suite.py [--base-url https://localhost:5005] [-j N]    # UI smoke suite
+    browser-suite.py --suite suite.json [scenario...]               # own scenarios (by name)
+    browser-suite.py --list
+    browser-suite.py --format json ...                              # machine-readable output
+    browser-suite.py --baseline [--threshold 10] [--accept]         # also gate on page weight
+
+A suite file is a list of scenarios (or {"base_url": ..., "scenarios": [...]}):
+    [{"name": "projects-create", "path": "/Projects/create",
+      "steps": [{"fill": "#Name", "value": "Smoke test"},
+                {"click": "button[type=submit]"},
+                {"wait": ".alert-success", "timeout": 10},
+                {"sleep": 0.5},
+                {"eval": "document.title"}]}]
+
+Every scenario gets a fresh browser profile; browser-inspector.js is injected
+before the page scripts run. The browser is driven over the DevTools protocol
+on a pipe (--remote-debugging-pipe), so no debugging port is opened and page
+states go straight from the browser into the analyzer without temp files.
+A scenario fails when it cannot be loaded, a step fails, the page answers with
+an HTTP error or raises uncaught errors; the exit code is then 1. With
+--baseline the page weight of every scenario is checked against the rolling
+baseline in the capture store (see analyze-browser-state.py baseline) and
+regressions fail the run as well.
+"""
+
+import argparse
+import asyncio
+import fcntl
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from base64 import b64decode
+from collections import deque
+from urllib.parse import urljoin
+
+
+def load_analyzer():
+    """Import analyze-browser-state.py (its file name is not a module name)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyze-browser-state.py')
+    spec = importlib.util.spec_from_file_location('analyze_browser_state', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+analyzer = load_analyzer()
+
+INSPECTOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'browser-inspector.js')
+
+DEFAULT_BASE_URL = 'https://localhost:5005'
+
+# Main pages of the app, one scenario each
+SMOKE_SUITE = [
+    {'name': 'home', 'path': '/'},
+    {'name': 'customers', 'path': '/Customers'},
+    {'name': 'customers-create', 'path': '/Customers/Create'},
+    {'name': 'projects', 'path': '/Projects'},
+    {'name': 'projects-create', 'path': '/Projects/create'},
+    {'name': 'requests', 'path': '/RequestsMvc'},
+    {'name': 'orchestrators', 'path': '/Orchestrators'},
+    {'name': 'tools', 'path': '/Tools'},
+    {'name': 'adapters', 'path': '/Adapters'},
+    {'name': 'ai-servers', 'path': '/AiServers'},
+    {'name': 'models', 'path': '/Models'},
+    {'name': 'chat', 'path': '/Chat'},
+    {'name': 'logs', 'path': '/Logs'},
+]
+
+BROWSER_CANDIDATES = (
+    'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+    '/Applications/Chromium.app/Contents/MacOS/Chromium',
+)
+
+BROWSER_FLAGS = [
+    '--headless=new',
+    '--remote-debugging-pipe',
+    '--ignore-certificate-errors',     # development certificate of localhost:5005
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-gpu',
+    '--window-size=1366,900',
+]
+
+# Page state plus the HTTP status of the document itself (the inspector only
+# sees requests made by the page)
+STATE_EXPRESSION = """JSON.stringify({
+    status: (performance.getEntriesByType('navigation')[0] || {}).responseStatus,
+    state: window.BrowserInspector ? BrowserInspector.getPageState() : null
+})"""
+
+WAIT_EXPRESSION = """new Promise((resolve, reject) => {
+    const deadline = Date.now() + %d;
+    (function poll() {
+        if (document.querySelector(%s)) return resolve(true);
+        if (Date.now() > deadline) return reject(new Error('timed out waiting for ' + %s));
+        setTimeout(poll, 50);
+    })();
+})"""
+
+CLICK_EXPRESSION = """(() => {
+    const element = document.querySelector(%s);
+    if (!element) throw new Error('no element matches ' + %s);
+    element.click();
+})()"""
+
+FILL_EXPRESSION = """(() => {
+    const element = document.querySelector(%s);
+    if (!element) throw new Error('no element matches ' + %s);
+    element.focus();
+    element.value = %s;
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+})()"""
+
+# Largest DevTools message accepted from the browser (page states of busy pages)
+MAX_MESSAGE = 256 * 1024 * 1024
+
+
+class ScenarioError(Exception):
+    pass
+
+
+def find_browser(explicit=None):
+    """Chrome/Chromium executable: --browser, $CHROME, or the first one installed"""
+    for candidate in (explicit, os.environ.get('CHROME')) + BROWSER_CANDIDATES:
+        if candidate and (shutil.which(candidate) or os.access(candidate, os.X_OK)):
+            return shutil.which(candidate) or candidate
+    return None
+
+
+class DevToolsPipe:
+    """DevTools protocol over --remote-debugging-pipe
+
+    The browser reads commands from fd 3 and writes responses and events to
+    fd 4, one JSON message per NUL-terminated chunk. Responses are matched to
+    commands by id; events are delivered to the futures waiting for them.
+    """
+
+    def __init__(self, reader, transport):
+        self.reader = reader
+        self.transport = transport
+        self.next_id = 0
+        self.pending = {}   # command id -> future
+        self.waiters = []   # (session id, method, future)
+        self.closed = None
+        self.listener = asyncio.create_task(self.listen())
+
+    @classmethod
+    async def open(cls, read_fd, write_fd):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=MAX_MESSAGE)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, 'rb', 0))
+        transport, _ = await loop.connect_write_pipe(asyncio.Protocol, os.fdopen(write_fd, 'wb', 0))
+        return cls(reader, transport)
+
+    async def listen(self):
+        try:
+            while True:
+                message = json.loads((await self.reader.readuntil(b'\0'))[:-1])
+                if 'id' in message:
+                    future = self.pending.pop(message['id'], None)
+                    if future and not future.done():
+                        future.set_result(message)
+                    continue
+                for waiter in list(self.waiters):
+                    session, method, future = waiter
+                    if method == message.get('method') and session == message.get('sessionId'):
+                        self.waiters.remove(waiter)
+                        if not future.done():
+                            future.set_result(message.get('params', {}))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError) as e:
+            self.closed = ScenarioError(f"browser closed the DevTools pipe ({type(e).__name__})")
+        for future in list(self.pending.values()) + [waiter[2] for waiter in self.waiters]:
+            if not future.done():
+                future.set_exception(self.closed)
+
+    async def call(self, method, params=None, session=None):
+        if self.closed:
+            raise self.closed
+        self.next_id += 1
+        message = {'id': self.next_id, 'method': method, 'params': params or {}}
+        if session:
+            message['sessionId'] = session
+        future = self.pending[self.next_id] = asyncio.get_running_loop().create_future()
+        self.transport.write(json.dumps(message).encode() + b'\0')
+        response = await future
+        if 'error' in response:
+            raise ScenarioError(f"{method}: {response['error'].get('message')}")
+        return response.get('result', {})
+
+    def event(self, method, session=None):
+        """Future for the next event of this method (register before triggering it)"""
+        future = asyncio.get_running_loop().create_future()
+        if self.closed:
+            future.set_exception(self.closed)
+        else:
+            self.waiters.append((session, method, future))
+        return future
+
+    def close(self):
+        self.listener.cancel()
+        self.transport.close()
+
+
+class Page:
+    """One attached page target"""
+
+    def __init__(self, devtools, session):
+        self.devtools = devtools
+        self.session = session
+
+    def call(self, method, **params):
+        return self.devtools.call(method, params, self.session)
+
+    def event(self, method):
+        return self.devtools.event(method, self.session)
+
+    async def evaluate(self, expression, await_promise=False):
+        result = await self.call('Runtime.evaluate', expression=expression, returnByValue=True,
+                                 awaitPromise=await_promise)
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise ScenarioError(details.get('exception', {}).get('description') or details.get('text'))
+        return result['result'].get('value')
+
+
+async def run_step(page, step, timeout):
+    if 'click' in step:
+        selector = json.dumps(step['click'])
+        await page.evaluate(CLICK_EXPRESSION % (selector, selector))
+    elif 'fill' in step:
+        selector = json.dumps(step['fill'])
+        await page.evaluate(FILL_EXPRESSION % (selector, selector, json.dumps(str(step.get('value', '')))))
+    elif 'wait' in step:
+        selector = json.dumps(step['wait'])
+        wait_ms = int(step.get('timeout', timeout) * 1000)
+        await page.evaluate(WAIT_EXPRESSION % (wait_ms, selector, selector), await_promise=True)
+    elif 'sleep' in step:
+        await asyncio.sleep(step['sleep'])
+    elif 'eval' in step:
+        await page.evaluate(step['eval'], await_promise=True)
+    else:
+        raise ScenarioError(f"unknown step {step}")
+
+
+def inherit_pipes(commands, responses):
+    """In the browser process: commands on fd 3, responses on fd 4"""
+    commands = fcntl.fcntl(commands, fcntl.F_DUPFD, 10)
+    responses = fcntl.fcntl(responses, fcntl.F_DUPFD, 10)
+    os.dup2(commands, 3)
+    os.dup2(responses, 4)
+
+
+async def drain(stream, tail):
+    """Keep the browser's stderr flowing; the last lines explain a crash"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            return
+        tail.append(line.decode('utf-8', errors='replace').rstrip())
+
+
+class ScenarioResult:
+    def __init__(self, scenario, url):
+        self.name = scenario['name']
+        self.url = url
+        self.state = None
+        self.status = None
+        self.error = None
+        self.seconds = 0.0
+
+
+async def run_scenario(browser, scenario, options):
+    """Load one scenario in a fresh headless browser and capture its page state"""
+    result = ScenarioResult(scenario, urljoin(options.base_url.rstrip('/') + '/', scenario['path'].lstrip('/')))
+    started = time.monotonic()
+    commands_read, commands_write = os.pipe()
+    responses_read, responses_write = os.pipe()
+    process = devtools = drainer = None
+    tail = deque(maxlen=5)
+    with tempfile.TemporaryDirectory(prefix='browser-suite-') as profile:
+        try:
+            flags = BROWSER_FLAGS + [f'--user-data-dir={profile}']
+            if hasattr(os, 'geteuid') and os.geteuid() == 0:
+                flags.append('--no-sandbox')   # Chrome refuses to run as root otherwise
+            process = await asyncio.create_subprocess_exec(
+                browser, *flags, 'about:blank',
+                stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE, close_fds=False,
+                preexec_fn=lambda: inherit_pipes(commands_read, responses_write))
+            os.close(commands_read)
+            os.close(responses_write)
+            commands_read = responses_write = None
+            drainer = asyncio.create_task(drain(process.stderr, tail))
+            devtools = await DevToolsPipe.open(responses_read, commands_write)
+            responses_read = commands_write = None
+
+            await asyncio.wait_for(capture(devtools, scenario, result, options), options.timeout)
+            try:
+                await asyncio.wait_for(devtools.call('Browser.close'), 5)
+            except (ScenarioError, asyncio.TimeoutError):
+                pass   # the pipe may close before the reply arrives
+        except asyncio.TimeoutError:
+            result.error = f"timed out after {options.timeout:g}s"
+        except (ScenarioError, OSError) as e:
+            result.error = str(e)
+            if tail:
+                result.error += f" ({tail[-1]})"
+        finally:
+            for fd in (commands_read, commands_write, responses_read, responses_write):
+                if fd is not None:
+                    os.close(fd)
+            if devtools:
+                devtools.close()
+            if process:
+                try:
+                    await asyncio.wait_for(process.wait(), 5)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+            if drainer:
+                await drainer
+    result.seconds = time.monotonic() - started
+    return result
+
+
+async def capture(devtools, scenario, result, options):
+    target = await devtools.call('Target.createTarget', {'url': 'about:blank'})
+    attached = await devtools.call('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+    page = Page(devtools, attached['sessionId'])
+    await page.call('Page.enable')
+    await page.call('Page.addScriptToEvaluateOnNewDocument', source=options.inspector)
+
+    loaded = page.event('Page.loadEventFired')
+    navigation = await page.call('Page.navigate', url=result.url)
+    if navigation.get('errorText'):
+        raise ScenarioError(f"navigation failed: {navigation['errorText']}")
+    await loaded
+    await asyncio.sleep(scenario.get('settle', options.settle))
+
+    for step in scenario.get('steps', []):
+        await run_step(page, step, options.timeout)
+
+    captured = json.loads(await page.evaluate(STATE_EXPRESSION))
+    result.status = captured['status']
+    result.state = captured['state']
+    if result.state is None:
+        raise ScenarioError("browser-inspector.js is not loaded in the page")
+
+    if options.screenshots:
+        shot = await page.call('Page.captureScreenshot', format='png')
+        with open(os.path.join(options.screenshots, f"{scenario['name']}.png"), 'wb') as f:
+            f.write(b64decode(shot['data']))
+
+
+async def run_suite(browser, scenarios, options, on_result):
+    """Run scenarios with at most options.jobs browsers at a time;
+    on_result(result) is called in completion order"""
+    slots = asyncio.Semaphore(options.jobs)
+
+    async def run(scenario):
+        async with slots:
+            return await run_scenario(browser, scenario, options)
+
+    results = []
+    for finished in asyncio.as_completed([run(scenario) for scenario in scenarios]):
+        result = await finished
+        on_result(result)
+        results.append(result)
+    return results
+
+
+def load_suite(path):
+    """(base_url or None, scenarios) from a suite file"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    base_url = None
+    if isinstance(data, dict):
+        base_url = data.get('base_url')
+        data = data['scenarios']
+    for index, scenario in enumerate(data):
+        scenario.setdefault('name', f"scenario-{index + 1}")
+        scenario.setdefault('path', '/')
+    return base_url, data
+
+
+class SuiteReport:
+    """Per-scenario results plus the aggregate analyzer report"""
+
+    def __init__(self):
+        self.batch = analyzer.BatchReport()
+        self.scenarios = []
+        self.weights = []
+
+    def add(self, result):
+        record = {'name': result.name, 'url': result.url, 'seconds': round(result.seconds, 2),
+                  'status': result.status, 'error': result.error}
+        if result.state is not None:
+            report = analyzer.StateReport.from_state(result.state)
+            summary = report.summary()
+            network = summary['networkRequests']
+            record.update({
+                'elements': summary['dom']['totalElements'],
+                'requests': network['total'],
+                'failedRequests': sum(route['errors'] for route in network['routes']),
+                'consoleErrors': summary['consoleLogs']['types'].get('error', 0),
+                'errors': summary['errors']['total'],
+            })
+            weight = analyzer.page_weight(report)
+            self.batch.add(report.compact())
+        else:
+            self.batch.failed.append((result.url, result.error))
+        record['passed'] = (result.error is None and (result.status or 0) < 400
+                            and not record.get('errors'))
+        if record['passed']:
+            # Error pages would drag the baseline down
+            self.weights.append(weight)
+        self.scenarios.append(record)
+        return record
+
+    def summary(self, wall):
+        busy = sum(record['seconds'] for record in self.scenarios)
+        return {
+            'scenarios': sorted(self.scenarios, key=lambda record: record['name']),
+            'passed': sum(record['passed'] for record in self.scenarios),
+            'failed': sum(not record['passed'] for record in self.scenarios),
+            'wall': round(wall, 2),
+            'busy': round(busy, 2),
+            'aggregate': self.batch.summary(),
+        }
+
+
+def render_scenario(record):
+    mark = '✓' if record['passed'] else '✗'
+    line = f"{mark} {record['name']:<24} {record['seconds']:>6.1f}s"
+    if record.get('status') and record['status'] >= 400:
+        line += f"  HTTP {record['status']}"
+    if 'elements' in record:
+        line += (f"  {record['elements']:>5} elements  {record['requests']:>3} requests"
+                 f" ({record['failedRequests']} failed)  {record['consoleErrors']} console errors"
+                 f"  {record['errors']} page errors")
+    if record['error']:
+        line += f"  {record['error']}"
+    return line
+
+
+def render_suite(data, jobs):
+    lines = [""] + analyzer.render_batch(data['aggregate'])
+    speedup = data['busy'] / data['wall'] if data['wall'] else 0
+    lines += [
+        f"Scenarios: {data['passed']} passed, {data['failed']} failed",
+        f"Wall time: {data['wall']:.1f}s with {jobs} browsers "
+        f"(scenarios took {data['busy']:.1f}s in total, {speedup:.1f}x parallel)",
+    ]
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs page scenarios in parallel headless browsers and analyzes their page state")
+    parser.add_argument('names', nargs='*', help="run only these scenarios")
+    parser.add_argument('--suite', help="JSON suite file (default: UI smoke suite over the main pages)")
+    parser.add_argument('--base-url', help=f"application URL (default: suite file, then {DEFAULT_BASE_URL})")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="browsers running at once (default: CPU count)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds per scenario (default: 30)")
+    parser.add_argument('--settle', type=float, default=1.0,
+                        help="seconds to wait after the load event for requests made on load (default: 1)")
+    parser.add_argument('--browser', help="Chrome/Chromium executable (default: $CHROME or the first found)")
+    parser.add_argument('--screenshots', metavar='DIR', help="save a PNG per scenario into DIR")
+    parser.add_argument('--format', choices=('text', 'json'), default='text')
+    parser.add_argument('--baseline', action='store_true',
+                        help="check page weight against the rolling baseline and fail on regressions")
+    parser.add_argument('--db', default=analyzer.DEFAULT_STORE,
+                        help=f"capture store with the baselines (default: {analyzer.DEFAULT_STORE})")
+    analyzer.add_baseline_arguments(parser)
+    parser.add_argument('--list', action='store_true', help="list the scenarios and exit")
+    args = parser.parse_args()
+
+    base_url, scenarios = load_suite(args.suite) if args.suite else (None, SMOKE_SUITE)
+    args.base_url = args.base_url or base_url or DEFAULT_BASE_URL
+    if args.names:
+        unknown = set(args.names) - {scenario['name'] for scenario in scenarios}
+        if unknown:
+            print(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            sys.exit(2)
+        scenarios = [scenario for scenario in scenarios if scenario['name'] in args.names]
+    if args.list:
+        for scenario in scenarios:
+            print(f"{scenario['name']:<24} {scenario['path']}  ({len(scenario.get('steps', []))} steps)")
+        return
+
+    browser = find_browser(args.browser)
+    if not browser:
+        print("No Chrome/Chromium found; install one or pass --browser / set CHROME")
+        sys.exit(2)
+    with open(INSPECTOR, encoding='utf-8') as f:
+        args.inspector = f.read()
+    args.jobs = max(1, args.jobs)
+    if args.screenshots:
+        os.makedirs(args.screenshots, exist_ok=True)
+
+    report = SuiteReport()
+
+    def on_result(result):
+        record = report.add(result)
+        if args.format == 'text':
+            print(render_scenario(record), flush=True)
+
+    if args.format == 'text':
+        print(f"🌐 {len(scenarios)} scenarios against {args.base_url}, {args.jobs} browsers at a time")
+    started = time.monotonic()
+    asyncio.run(run_suite(browser, scenarios, args, on_result))
+    data = report.summary(time.monotonic() - started)
+
+    regressed = 0
+    if args.baseline:
+        store = analyzer.CaptureStore(args.db)
+        try:
+            data['weights'] = [analyzer.check_weight(store, weight, args.window, args.threshold, args.min_runs,
+                                                     args.accept, record=not args.dry_run)
+                               for weight in report.weights]
+        finally:
+            store.close()
+        regressed = sum(result['status'] == 'regressed' for result in data['weights'])
+
+    if args.format == 'json':
+        analyzer.write_json(data)
+    else:
+        lines = render_suite(data, args.jobs)
+        if args.baseline:
+            lines += analyzer.render_weights(data['weights'], args.window, args.threshold)
+        analyzer.write_lines(lines)
+    sys.exit(1 if data['failed'] or regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
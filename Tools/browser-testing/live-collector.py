@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Live Browser Collector
+Receives events pushed by browser-inspector.js in live mode and keeps rolling
+statistics with the same logic as analyze-browser-state.py
+
+Usage:
+    live-collector.py [--port 5055] [--interval 5] [--full]
+
+Then in the page console (or via BrowserInspectorConfig before injection):
+    BrowserInspector.startLive('http://localhost:5055/events')
+
+Endpoints:
+    POST /events    event batches from the inspector
+    GET  /summary   current statistics as JSON (same shape as --format json)
+    GET  /health    liveness check
+"""
+
+import argparse
+import asyncio
+import bisect
+import importlib.util
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+
+def load_analyzer():
+    """Import analyze-browser-state.py (its file name is not a module name)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyze-browser-state.py')
+    spec = importlib.util.spec_from_file_location('analyze_browser_state', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+analyzer = load_analyzer()
+
+# Inspector event kinds -> getPageState() sections
+EVENT_SECTIONS = {
+    'console': 'consoleLogs',
+    'network': 'networkRequests',
+    'error': 'errors',
+}
+
+# Largest accepted request body
+MAX_BODY = 32 * 1024 * 1024
+
+
+class PageSession:
+    """One page load in the browser (one inspector session)"""
+
+    def __init__(self, url):
+        self.url = url
+        self.last_seq = 0
+        self.events = 0
+        self.gaps = 0
+        self.missing = []       # (first, last) seq ranges skipped over and not received yet
+        self.dropped = 0
+        self.duplicates = 0
+
+    def accept(self, seq):
+        """Record event seq; False when it was already ingested
+
+        Batches can arrive out of order (the unload flush re-sends the batch
+        in flight and splits the queue over several beacons), so an event
+        behind the highest seq still counts when it fills a gap.
+        """
+        if seq > self.last_seq:
+            if seq > self.last_seq + 1:
+                self.missing.append((self.last_seq + 1, seq - 1))
+                self.gaps += seq - self.last_seq - 1
+            self.last_seq = seq
+            return True
+        index = bisect.bisect_right(self.missing, (seq, math.inf)) - 1
+        if index < 0 or not self.missing[index][0] <= seq <= self.missing[index][1]:
+            self.duplicates += 1
+            return False
+        first, last = self.missing[index]
+        self.missing[index:index + 1] = [(start, end) for start, end in ((first, seq - 1), (seq + 1, last))
+                                         if start <= end]
+        self.gaps -= 1
+        return True
+
+    @property
+    def lost(self):
+        """Events that never arrived
+
+        The page reports how many events it dropped (full queue, beacon quota
+        on unload). Drops followed by later events also show up as sequence
+        gaps, the ones at the end of a session only in that count.
+        """
+        return max(self.gaps, self.dropped)
+
+
+class LiveCollector:
+    """Rolling statistics over all pushed events"""
+
+    def __init__(self):
+        self.report = analyzer.StateReport()
+        self.sessions = {}
+        self.events = 0
+        self.started = time.monotonic()
+        self.last_events = 0
+        self.last_tick = self.started
+        self.known_errors = set()
+
+    def ingest(self, payload):
+        """Feed one batch; returns the number of events accepted"""
+        session_id = payload.get('session', 'unknown')
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = PageSession(payload.get('url'))
+            self.report.meta['url'] = payload.get('url')
+            self.report.meta['title'] = payload.get('title')
+
+        session.dropped = max(session.dropped, payload.get('dropped', 0))
+        accepted = 0
+        for event in payload.get('events', []):
+            if not session.accept(event.get('seq', session.last_seq + 1)):
+                # Retransmitted after a failed response
+                continue
+
+            section = EVENT_SECTIONS.get(event.get('kind'))
+            if section is None:
+                continue
+            self.report.section(section).add(event['data'])
+            accepted += 1
+
+        session.events += accepted
+        self.events += accepted
+        return accepted
+
+    @property
+    def lost(self):
+        return sum(session.lost for session in self.sessions.values())
+
+    @property
+    def dropped(self):
+        return sum(session.dropped for session in self.sessions.values())
+
+    def lost_text(self):
+        return f"lost: {self.lost}" + (f" ({self.dropped} dropped in the page)" if self.dropped else "")
+
+    def summary(self):
+        data = self.report.summary()
+        data['live'] = {
+            'events': self.events,
+            'sessions': len(self.sessions),
+            'lost': self.lost,
+            'dropped': self.dropped,
+            'duplicates': sum(session.duplicates for session in self.sessions.values()),
+            'uptime': time.monotonic() - self.started,
+        }
+        return data
+
+    def tick_lines(self, full=False):
+        """Incremental summary since the previous tick"""
+        now = time.monotonic()
+        new_events = self.events - self.last_events
+        rate = new_events / (now - self.last_tick) if now > self.last_tick else 0
+        self.last_events, self.last_tick = self.events, now
+
+        data = self.report.summary()
+        lines = [
+            f"[{datetime.now().strftime('%H:%M:%S')}] 📡 {self.events} events (+{new_events}, {rate:.0f}/s), "
+            f"{len(self.sessions)} pages, {self.lost_text()} | "
+            f"logs: {data['consoleLogs']['total']}, requests: {data['networkRequests']['total']}, "
+            f"errors: {data['errors']['total']} ({data['errors']['distinct']} distinct)"
+        ]
+
+        # Errors seen for the first time are worth knowing about immediately
+        for cluster in data['errors']['clusters']:
+            if cluster['fingerprint'] not in self.known_errors:
+                self.known_errors.add(cluster['fingerprint'])
+                lines.append(f"  ❌ new error [{cluster['fingerprint']}]: {cluster['message'][:100]}")
+
+        if full:
+            lines += analyzer.render_console_logs(data['consoleLogs'])
+            lines += analyzer.render_network_requests(data['networkRequests'])
+            lines += analyzer.render_errors(data['errors'])
+        return lines
+
+    def final_lines(self):
+        data = self.report.summary()
+        lines = ["", "=" * 60, "📡 LIVE SESSION SUMMARY", "=" * 60,
+                 f"Events: {self.events}, pages: {len(self.sessions)}, {self.lost_text()}"]
+        for session in self.sessions.values():
+            lines.append(f"  {session.events:>8} events  {session.url}"
+                         + (f"  (lost {session.lost})" if session.lost else ""))
+        for key in ('consoleLogs', 'networkRequests', 'errors'):
+            lines += analyzer.SECTION_RENDERERS[key](data[key])
+        return lines + analyzer.render_totals(data)
+
+
+class CollectorServer:
+    """Minimal asyncio HTTP/1.1 server with keep-alive"""
+
+    def __init__(self, collector):
+        self.collector = collector
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    self.respond(writer, 413, {'error': 'body too large'}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = self.route(method, path, body)
+                close = headers.get('connection', '').lower() == 'close'
+                self.respond(writer, status, payload, close)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if method == 'OPTIONS':
+            return 204, None
+        if method == 'POST' and path == '/events':
+            try:
+                accepted = self.collector.ingest(json.loads(body))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                return 400, {'error': f"{type(e).__name__}: {e}"}
+            return 200, {'accepted': accepted}
+        if method == 'GET' and path == '/summary':
+            return 200, self.collector.summary()
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'events': self.collector.events}
+        return 404, {'error': 'not found'}
+
+    @staticmethod
+    def respond(writer, status, payload, close=False):
+        body = b'' if payload is None else json.dumps(payload, default=str).encode('utf-8')
+        reason = {200: 'OK', 204: 'No Content', 400: 'Bad Request',
+                  404: 'Not Found', 413: 'Payload Too Large'}.get(status, '')
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            # The inspector posts from the app's origin
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            "Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+
+
+async def report_loop(collector, interval, full):
+    while True:
+        await asyncio.sleep(interval)
+        if collector.events != collector.last_events:
+            analyzer.write_lines(collector.tick_lines(full))
+            sys.stdout.flush()
+
+
+async def serve(args):
+    collector = LiveCollector()
+    server = await asyncio.start_server(CollectorServer(collector).handle, args.host, args.port)
+    print(f"📡 Live collector listening on http://{args.host}:{args.port}/events")
+    print(f"   In the page: BrowserInspector.startLive('http://{args.host}:{args.port}/events')")
+    sys.stdout.flush()
+
+    reporter = asyncio.create_task(report_loop(collector, args.interval, args.full))
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        reporter.cancel()
+        analyzer.write_lines(collector.final_lines())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collects live events from browser-inspector.js")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--interval', type=float, default=5, help="seconds between summaries")
+    parser.add_argument('--full', action='store_true', help="print full section reports on every summary")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Tests for the capture store of analyze-browser-state.py
+
+Run from the repository root:
+    python -m unittest discover -s Tools/browser-testing/tests
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+
+
+def load_analyzer():
+    """Import analyze-browser-state.py (its file name is not a module name)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'analyze-browser-state.py')
+    spec = importlib.util.spec_from_file_location('analyze_browser_state', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+analyzer = load_analyzer()
+
+
+class QueryLogsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.directory.name, 'store.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ingest(self, state):
+        path = os.path.join(self.directory.name, 'state.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        store = analyzer.CaptureStore(self.db)
+        try:
+            store.ingest(path)
+        finally:
+            store.close()
+
+    def query_logs(self):
+        args = argparse.Namespace(db=self.db, what='logs', page=None, days=None, type=None, limit=20)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            analyzer.run_query(args)
+        return out.getvalue()
+
+    def test_log_without_type_is_stored_as_log(self):
+        self.ingest({'consoleLogs': [{'message': 'hi'}]})
+        self.assertIn('1x LOG: hi', self.query_logs())
+
+    def test_rows_ingested_without_type_are_listed(self):
+        # Stores written before the default type have NULL in console_logs.type
+        self.ingest({'consoleLogs': [{'type': 'warn', 'message': 'old'}]})
+        store = analyzer.CaptureStore(self.db)
+        with store.db:
+            store.db.execute('UPDATE console_logs SET type = NULL')
+        store.close()
+        self.assertIn('1x LOG: old', self.query_logs())
+
+
+if __name__ == '__main__':
+    unittest.main()
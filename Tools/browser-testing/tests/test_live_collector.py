@@ -0,0 +1,63 @@
+"""
+Tests for the sequence tracking of live-collector.py
+
+Run from the repository root:
+    python -m unittest discover -s Tools/browser-testing/tests
+"""
+
+import importlib.util
+import os
+import unittest
+
+
+def load_collector():
+    """Import live-collector.py (its file name is not a module name)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'live-collector.py')
+    spec = importlib.util.spec_from_file_location('live_collector', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+live_collector = load_collector()
+
+
+def batch(*seqs):
+    return {'session': 's1', 'url': 'https://localhost:5005/',
+            'events': [{'seq': seq, 'kind': 'console', 'data': {'type': 'log', 'message': f"event {seq}",
+                                                           'timestamp': '2026-01-01T08:00:00.000Z'}}
+                       for seq in seqs]}
+
+
+class SequenceTrackingTest(unittest.TestCase):
+    def setUp(self):
+        self.collector = live_collector.LiveCollector()
+
+    def session(self):
+        return self.collector.sessions['s1']
+
+    def test_beacons_arriving_out_of_order_are_all_ingested(self):
+        # Unload flush: the later beacon lands before the earlier one and the
+        # re-sent fetch batch
+        self.assertEqual(self.collector.ingest(batch(7, 8, 9)), 3)
+        self.assertEqual(self.collector.ingest(batch(4, 5, 6)), 3)
+        self.assertEqual(self.collector.ingest(batch(1, 2, 3)), 3)
+        self.assertEqual(self.collector.events, 9)
+        self.assertEqual((self.session().gaps, self.session().duplicates), (0, 0))
+
+    def test_late_event_fills_part_of_a_gap(self):
+        self.collector.ingest(batch(1, 10))
+        self.assertEqual(self.session().gaps, 8)
+        self.collector.ingest(batch(5))
+        self.assertEqual(self.session().gaps, 7)
+        self.assertEqual(self.session().missing, [(2, 4), (6, 9)])
+        self.assertEqual(self.collector.lost, 7)
+
+    def test_only_ingested_events_are_duplicates(self):
+        self.collector.ingest(batch(1, 2, 3, 6))
+        self.assertEqual(self.collector.ingest(batch(2, 3, 4)), 1)
+        self.assertEqual((self.session().gaps, self.session().duplicates), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
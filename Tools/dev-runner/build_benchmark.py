@@ -0,0 +1,208 @@
+"""
+Build Benchmark
+Repeatable build timings for run-dev-optimized.py: every scenario is run N
+times, summarized as mean/median/stddev and compared against a saved baseline
+
+Scenarios:
+    cold           bin/obj of all projects removed, build servers shut down
+    noop           nothing changed since the previous build
+    touch-<name>   one .cs file of a library project in OptimalyAI.sln touched
+                   (touch-core, touch-service, touch-data, ...)
+    razor          one .cshtml view touched
+
+Projects come from the solution (build_clean.discover), so a project added
+to it gets its touch scenario without changes here.
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import build_clean
+
+SKIP_DIRS = {'bin', 'obj', 'node_modules', '.git'}
+
+
+def first_source_file(directory, suffix):
+    """First file with suffix under directory (sorted walk), skipping build output"""
+    for current, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(files):
+            if name.endswith(suffix):
+                return os.path.join(current, name)
+    return None
+
+
+def touch_scenario(project):
+    """touch-core for OAI.Core, touch-service for OAI.ServiceLayer, ..."""
+    name = project.name.split('.')[-1]
+    if name.endswith('Layer') and name != 'Layer':
+        name = name[:-len('Layer')]
+    return 'touch-' + name.lower()
+
+
+def scenarios(root):
+    """{scenario: description} in run order
+
+    The root project is left out of the touch scenarios: its directory
+    contains the other projects, and its views are covered by razor.
+    """
+    root = os.path.abspath(str(root))
+    result = {'cold': 'bin/obj removed, build servers shut down', 'noop': 'nothing changed'}
+    for project in build_clean.discover(root):
+        if os.path.abspath(project.directory) != root:
+            result[touch_scenario(project)] = f"one .cs file in {project.name} touched"
+    result['razor'] = 'one .cshtml view touched'
+    return result
+
+
+def touch_targets(root):
+    """{scenario: (directory relative to root, suffix)} of the touch scenarios"""
+    root = os.path.abspath(str(root))
+    targets = {touch_scenario(project): (os.path.relpath(project.directory, root), '.cs')
+               for project in build_clean.discover(root)
+               if os.path.abspath(project.directory) != root}
+    targets['razor'] = ('Views', '.cshtml')
+    return targets
+
+
+def summarize(runs):
+    return {
+        'runs': runs,
+        'mean': statistics.mean(runs),
+        'median': statistics.median(runs),
+        'stdev': statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        'min': min(runs),
+        'max': max(runs),
+    }
+
+
+class BuildBenchmark:
+    """Runs the build command under each scenario and collects wall times"""
+
+    def __init__(self, root, build_cmd, reps=5, log=print):
+        self.root = str(root)
+        self.build_cmd = build_cmd
+        self.reps = reps
+        self.log = log
+        self.failures = []
+        self.projects = build_clean.discover(self.root)
+        self.touch_targets = touch_targets(self.root)
+
+    def prepare(self, scenario):
+        """Put the tree into the scenario's starting state (not timed)"""
+        if scenario == 'cold':
+            for project in self.projects:
+                for output in (project.bin, project.obj):
+                    shutil.rmtree(output, ignore_errors=True)
+            # Warm MSBuild nodes / VBCSCompiler would make "cold" look better than it is
+            subprocess.run(['dotnet', 'build-server', 'shutdown'], cwd=self.root, capture_output=True)
+        elif scenario in self.touch_targets:
+            directory, suffix = self.touch_targets[scenario]
+            path = first_source_file(os.path.join(self.root, directory), suffix)
+            if path is None:
+                raise FileNotFoundError(f"No {suffix} file under {directory}")
+            os.utime(path)
+
+    def build(self):
+        start = time.perf_counter()
+        result = subprocess.run(self.build_cmd, cwd=self.root, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            tail = '\n'.join(result.stdout.strip().splitlines()[-5:])
+            self.failures.append(tail)
+        return elapsed, result.returncode == 0
+
+    def run(self, scenarios):
+        """Returns {scenario: summary}; failed repetitions are not counted"""
+        results = {}
+        warmed = False
+        for scenario in scenarios:
+            if scenario != 'cold' and not warmed:
+                # Incremental scenarios start from an up-to-date tree
+                self.log("  warm-up build...")
+                self.build()
+                warmed = True
+
+            runs = []
+            for rep in range(1, self.reps + 1):
+                self.prepare(scenario)
+                elapsed, ok = self.build()
+                self.log(f"  {scenario:<14} #{rep}: {elapsed:6.2f}s" + ("" if ok else "  FAILED"))
+                if ok:
+                    runs.append(elapsed)
+            warmed = warmed or bool(runs)
+            if runs:
+                results[scenario] = summarize(runs)
+        return results
+
+
+def make_report(results, reps, build_cmd):
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': platform.node(),
+        'cpu_count': os.cpu_count(),
+        'reps': reps,
+        'command': ' '.join(build_cmd),
+        'scenarios': results,
+    }
+
+
+def save_report(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compare(current, baseline, threshold=0.10):
+    """Per-scenario verdicts against a baseline report
+
+    A scenario regressed when its median is more than `threshold` slower
+    than the baseline median and the difference is larger than the noise
+    (the bigger of the two standard deviations).
+    Returns {scenario: (delta ratio, 'regressed' | 'improved' | 'same')}.
+    """
+    verdicts = {}
+    for scenario, now in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(scenario)
+        if not before or not before['median']:
+            continue
+        delta = now['median'] - before['median']
+        ratio = delta / before['median']
+        noise = max(now['stdev'], before['stdev'])
+        if ratio > threshold and delta > noise:
+            verdict = 'regressed'
+        elif ratio < -threshold and -delta > noise:
+            verdict = 'improved'
+        else:
+            verdict = 'same'
+        verdicts[scenario] = (ratio, verdict)
+    return verdicts
+
+
+def render(report, verdicts=None):
+    lines = [
+        f"{'Scenario':<14} {'runs':>4} {'mean':>8} {'median':>8} {'stddev':>7} {'min':>8} {'max':>8}  vs baseline",
+        "-" * 80,
+    ]
+    for scenario, data in report['scenarios'].items():
+        line = (f"{scenario:<14} {len(data['runs']):>4} {data['mean']:>7.2f}s {data['median']:>7.2f}s "
+                f"{data['stdev']:>6.2f}s {data['min']:>7.2f}s {data['max']:>7.2f}s")
+        if verdicts and scenario in verdicts:
+            ratio, verdict = verdicts[scenario]
+            mark = {'regressed': '⚠️  slower', 'improved': '✅ faster', 'same': '≈'}[verdict]
+            line += f"  {ratio:+.1%} {mark}"
+        lines.append(line)
+    return lines
@@ -0,0 +1,175 @@
+"""
+Build Clean
+Finds every project's bin/obj from the solution and deletes build output in
+parallel, in-process. Besides a full clean it can clean selectively:
+
+    changed  only projects whose build inputs changed since the last build
+             (see build_manifest.py), keeping NuGet restore output
+    stale    only output of other configurations and target frameworks
+             than the ones currently built
+
+Selective cleans only remove obj/<Configuration> folders, so the NuGet
+restore output directly in obj/ (project.assets.json, *.nuget.g.props) stays
+and the following build does not have to restore again.
+"""
+
+import os
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+SOLUTION_PROJECT = re.compile(r'^Project\("\{[^}]+\}"\)\s*=\s*"[^"]*",\s*"(?P<path>[^"]+\.\w+proj)"', re.M)
+TFM_DIR = re.compile(r'^net(?:\d|coreapp|standard)')
+
+# Changes to these affect every project
+GLOBAL_INPUTS = {'Directory.Build.props', 'Directory.Build.targets', 'Directory.Packages.props'}
+
+
+def read_properties(path, names):
+    """Values of the given MSBuild properties in a project/props file (no evaluation)"""
+    values = {}
+    try:
+        tree = ET.parse(path)
+    except (OSError, ET.ParseError):
+        return values
+    for element in tree.iter():
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag in names and element.text and '$(' not in element.text:
+            values[tag] = element.text.strip()
+    return values
+
+
+class ProjectOutputs:
+    """Output locations of one project"""
+
+    PROPERTIES = ('TargetFramework', 'TargetFrameworks', 'BaseOutputPath', 'BaseIntermediateOutputPath',
+                  'AppendTargetFrameworkToOutputPath')
+
+    def __init__(self, project_file, defaults):
+        self.project_file = project_file
+        self.name = os.path.splitext(os.path.basename(project_file))[0]
+        self.directory = os.path.dirname(project_file)
+        properties = dict(defaults)
+        properties.update(read_properties(project_file, self.PROPERTIES))
+
+        frameworks = properties.get('TargetFrameworks') or properties.get('TargetFramework') or ''
+        self.frameworks = {framework.strip() for framework in frameworks.split(';') if framework.strip()}
+        self.append_framework = properties.get('AppendTargetFrameworkToOutputPath', 'true').lower() != 'false'
+        self.bin = os.path.join(self.directory, properties.get('BaseOutputPath', 'bin').replace('\\', '/').rstrip('/'))
+        self.obj = os.path.join(self.directory,
+                                properties.get('BaseIntermediateOutputPath', 'obj').replace('\\', '/').rstrip('/'))
+
+    def owns(self, path):
+        return path == self.directory or path.startswith(self.directory.rstrip(os.sep) + os.sep)
+
+
+def discover(root, solution='OptimalyAI.sln'):
+    """Projects listed in the solution (or every *.csproj next to it)"""
+    root = str(root)
+    defaults = read_properties(os.path.join(root, 'Directory.Build.props'), ProjectOutputs.PROPERTIES)
+    try:
+        with open(os.path.join(root, solution), encoding='utf-8-sig') as f:
+            paths = [match['path'].replace('\\', '/') for match in SOLUTION_PROJECT.finditer(f.read())]
+    except OSError:
+        paths = [name for name in os.listdir(root) if name.endswith('.csproj')]
+    return [ProjectOutputs(os.path.join(root, path), defaults) for path in paths
+            if os.path.exists(os.path.join(root, path))]
+
+
+def plan_full(projects):
+    return [path for project in projects for path in (project.bin, project.obj) if os.path.exists(path)]
+
+
+def plan_changed(projects, root, changed, configuration):
+    """Configuration output of projects owning a changed input
+
+    A file belongs to the project with the deepest directory containing it,
+    so files of OAI.* projects do not count for the root project.
+    """
+    root = str(root)
+    affected = set()
+    for relative in changed:
+        if os.path.basename(relative) in GLOBAL_INPUTS and os.path.dirname(relative) == '':
+            affected = set(projects)
+            break
+        path = os.path.join(root, relative)
+        owners = [project for project in projects if project.owns(path)]
+        if owners:
+            affected.add(max(owners, key=lambda project: len(project.directory)))
+
+    paths = []
+    for project in affected:
+        paths += [os.path.join(project.bin, configuration), os.path.join(project.obj, configuration)]
+    return [path for path in paths if os.path.exists(path)], sorted(project.name for project in affected)
+
+
+def plan_stale(projects, configuration):
+    """Output of other configurations, and of target frameworks the project
+    no longer builds (or any framework folder when output paths do not
+    include the framework)"""
+    paths = []
+    for project in projects:
+        for base in (project.bin, project.obj):
+            try:
+                entries = list(os.scandir(base))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('dev-runner-manifest.'):
+                    # build_manifest.py state of another configuration
+                    if entry.name != f'dev-runner-manifest.{configuration}.json':
+                        paths.append(entry.path)
+                    continue
+                # Configuration folders only; obj/ also holds restore files
+                if not entry.is_dir():
+                    continue
+                if entry.name != configuration:
+                    paths.append(entry.path)
+                    continue
+                for child in os.scandir(entry.path):
+                    if child.is_dir() and TFM_DIR.match(child.name) and (
+                            not project.append_framework or child.name not in project.frameworks):
+                        paths.append(child.path)
+    return paths
+
+
+def size_of(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path) if os.path.exists(path) else 0
+    total = 0
+    for current, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(current, name))
+            except OSError:
+                pass
+    return total
+
+
+def remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def delete(paths, workers=8):
+    """Delete paths in parallel; large directories are split one level down
+    so their children are removed concurrently too. Returns seconds spent."""
+    start = time.perf_counter()
+    parts = []
+    for path in paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            parts += [entry.path for entry in os.scandir(path)]
+        else:
+            parts.append(path)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(remove, parts))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(remove, paths))
+    return time.perf_counter() - start
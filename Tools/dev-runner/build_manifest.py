@@ -0,0 +1,115 @@
+"""
+Build Manifest
+Content hashes of the build inputs, so run-dev-optimized.py can skip
+`dotnet build` (and start the app with --no-build) when nothing relevant changed
+
+Size and mtime decide which files have to be hashed at all; only those are
+read, in parallel. A file that was touched but not changed (git checkout,
+formatter no-op) therefore does not trigger a build, and a no-change check
+only costs a directory walk.
+
+The manifest lives in obj/, so cleaning build output invalidates it too.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+INPUT_SUFFIXES = ('.cs', '.cshtml', '.csproj')
+INPUT_NAMES = {'Directory.Build.props', 'packages.lock.json'}
+
+# Build output, tooling and static assets never feed the compiler
+SKIP_DIRS = {'bin', 'obj', '.git', '.vs', '.idea', 'node_modules', 'logs', 'wwwroot'}
+
+MANIFEST_VERSION = 1
+
+
+class BuildManifest:
+    """Build input hashes of the last successful build"""
+
+    def __init__(self, root, configuration="Debug", project="OptimalyAI", workers=8):
+        self.root = str(root)
+        self.configuration = configuration
+        self.project = project
+        self.workers = workers
+        self.path = os.path.join(self.root, 'obj', f'dev-runner-manifest.{configuration}.json')
+        self.current = {}
+        self.hashed = 0
+
+    def scan(self):
+        """{relative path: (size, mtime_ns)} of every build input"""
+        found = {}
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            pending.append(entry.path)
+                    elif entry.name.endswith(INPUT_SUFFIXES) or entry.name in INPUT_NAMES:
+                        stat = entry.stat()
+                        found[os.path.relpath(entry.path, self.root)] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def hash_file(self, relative):
+        digest = hashlib.sha1()
+        with open(os.path.join(self.root, relative), 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def refresh(self):
+        """Compare the tree with the manifest
+
+        Returns the changed paths (added, modified or removed since the last
+        successful build); an empty list means the build can be skipped.
+        """
+        stats = self.scan()
+        previous = self.load()
+        self.current = {}
+        to_hash = []
+        for relative, (size, mtime) in stats.items():
+            entry = previous.get(relative)
+            if entry and entry[0] == size and entry[1] == mtime:
+                self.current[relative] = entry
+            else:
+                to_hash.append(relative)
+
+        self.hashed = len(to_hash)
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for relative, digest in zip(to_hash, pool.map(self.hash_file, to_hash)):
+                    size, mtime = stats[relative]
+                    self.current[relative] = [size, mtime, digest]
+
+        changed = [relative for relative in to_hash
+                   if relative not in previous or previous[relative][2] != self.current[relative][2]]
+        changed += [relative for relative in previous if relative not in stats]
+        return sorted(changed)
+
+    def outputs_exist(self):
+        return os.path.exists(os.path.join(self.root, 'bin', self.configuration, f'{self.project}.dll'))
+
+    def save(self):
+        """Record the refreshed hashes as the state of the current build output"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'configuration': self.configuration, 'files': self.current}, f)
+        os.replace(temporary, self.path)
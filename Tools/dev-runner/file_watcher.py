@@ -0,0 +1,304 @@
+"""
+File Watcher
+inotify-based watcher for `run-dev-optimized.py watch`: coalesces bursts of
+file changes into one batch and decides how the app picks them up
+
+A git checkout or a formatter run touches dozens of files within a second;
+`dotnet watch` on its own reacts to the first ones and then again to the
+rest. Here a burst ends only once no relevant change arrived for `quiet`
+seconds (at most `max_wait` after it began), and the batch is classified:
+
+    live        wwwroot assets and Razor views (the app uses Razor runtime
+                compilation) - served from disk, nothing to rebuild
+    hot-reload  C# edits - applied by dotnet watch in one go
+    restart     project/build files, configuration, startup code
+                (Program.cs, Configuration/), deleted files or a burst of
+                more than BURST_FILES files - one clean rebuild and restart
+
+Each cycle ("change detected -> app ready") is appended to
+logs/watch-cycles.jsonl. inotify is used through ctypes (Linux only); the
+watcher blocks in select() between events, nothing is polled.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import statistics
+import struct
+import time
+from datetime import datetime
+from fnmatch import fnmatch
+
+CYCLES_FILE = "watch-cycles.jsonl"
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct('iIII')
+
+EXCLUDED_DIRS = {'bin', 'obj', 'node_modules', 'logs', 'TestResults', 'packages'}
+
+WATCHED_EXTENSIONS = {'.cs', '.cshtml', '.razor', '.csproj', '.props', '.targets', '.sln', '.json',
+                      '.css', '.js', '.html', '.svg', '.png', '.ico'}
+EDITOR_TEMP = ('*~', '.#*', '*.swp', '*.swx', '*.tmp', '4913', '*.bak')
+
+# (pattern on the path relative to the project root, action)
+RULES = [
+    ('*.csproj', 'restart'), ('*.props', 'restart'), ('*.targets', 'restart'), ('*.sln', 'restart'),
+    ('global.json', 'restart'), ('*packages.lock.json', 'restart'),
+    ('appsettings*.json', 'restart'), ('*launchSettings.json', 'restart'),
+    ('Program.cs', 'restart'), ('Configuration/*.cs', 'restart'),
+    ('wwwroot/*', 'live'), ('*.cshtml', 'live'),
+    ('*.cs', 'hot-reload'), ('*.razor', 'hot-reload'),
+]
+ACTION_ORDER = ['live', 'hot-reload', 'restart']
+BURST_FILES = 30
+
+
+class InotifyError(OSError):
+    pass
+
+
+class Inotify:
+    """Recursive inotify watch of a directory tree (minus EXCLUDED_DIRS and dot-directories)"""
+
+    def __init__(self, root):
+        name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(name or 'libc.so.6', use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise InotifyError('inotify is not available')
+        self.root = os.path.abspath(root)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise InotifyError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.paths = {}    # watch descriptor -> directory
+        self.add_tree(self.root)
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        os.close(self.fd)
+
+    def add_tree(self, top):
+        """Watch top and its subdirectories; returns the files already inside
+        (a directory that appears at once, e.g. moved in by a checkout)"""
+        files = []
+        for directory, names, filenames in os.walk(top):
+            names[:] = [name for name in names if name not in EXCLUDED_DIRS and not name.startswith('.')]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                raise InotifyError(ctypes.get_errno(), f'inotify_add_watch failed for {directory} '
+                                                       '(fs.inotify.max_user_watches?)')
+            self.paths[wd] = directory
+            if directory != top:
+                files += [os.path.join(directory, name) for name in filenames]
+        return files
+
+    def read(self):
+        """[(path, change)] for the pending events, change: 'modified',
+        'created', 'deleted' or 'overflow' (events were lost)"""
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b'\0').decode(
+                'utf-8', errors='replace')
+            offset += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changes.append((self.root, 'overflow'))
+                continue
+            directory = self.paths.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.paths[wd]
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and name not in EXCLUDED_DIRS and not name.startswith('.'):
+                    try:
+                        changes += [(file, 'created') for file in self.add_tree(path)]
+                    except OSError:
+                        pass
+                elif mask & IN_MOVED_FROM:
+                    # A directory moved away takes its files along
+                    changes.append((path + os.sep, 'deleted'))
+                continue
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                changes.append((path, 'deleted'))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                changes.append((path, 'created'))
+            elif mask & IN_CLOSE_WRITE:
+                changes.append((path, 'modified'))
+        return changes
+
+
+def relevant(path):
+    if path.endswith(os.sep):
+        return True
+    name = os.path.basename(path)
+    return (os.path.splitext(name)[1].lower() in WATCHED_EXTENSIONS
+            and not any(fnmatch(name, pattern) for pattern in EDITOR_TEMP))
+
+
+class Batch:
+    """One burst of changes"""
+
+    def __init__(self, now):
+        self.first = self.last = now
+        self.changes = {}   # relative path -> last change
+        self.overflow = False
+
+    def add(self, path, change, now):
+        self.last = now
+        if change == 'overflow':
+            self.overflow = True
+            return
+        previous = self.changes.get(path)
+        # created then modified is still a new file; created then deleted is nothing
+        if previous == 'created' and change == 'modified':
+            return
+        if previous == 'created' and change == 'deleted':
+            del self.changes[path]
+            return
+        self.changes[path] = change
+
+
+class FileWatcher:
+    def __init__(self, root, quiet=0.3, max_wait=3.0):
+        self.root = os.path.abspath(root)
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self.inotify = Inotify(self.root)
+
+    def close(self):
+        self.inotify.close()
+
+    def batches(self, on_first=None, stop=None):
+        """Yield a Batch per burst; on_first(batch) runs when its first
+        relevant change arrives. stop (threading.Event) ends the generator."""
+        batch = None
+        while not (stop and stop.is_set()):
+            now = time.monotonic()
+            if batch is None:
+                timeout = 0.5   # only to notice stop
+            else:
+                timeout = max(0.0, min(batch.last + self.quiet, batch.first + self.max_wait) - now)
+            ready, _, _ = select.select([self.inotify], [], [], timeout)
+            now = time.monotonic()
+            if ready:
+                for path, change in self.inotify.read():
+                    if change != 'overflow' and not relevant(path):
+                        continue
+                    if batch is None:
+                        batch = Batch(now)
+                        if on_first:
+                            on_first(batch)
+                    name = os.path.relpath(path, self.root) + (os.sep if path.endswith(os.sep) else '')
+                    batch.add(name, change, now)
+                if batch is not None and not batch.changes and not batch.overflow:
+                    # Only temporary files came and went
+                    batch.first = batch.last
+            elif batch is not None and now >= min(batch.last + self.quiet, batch.first + self.max_wait):
+                if batch.changes or batch.overflow:
+                    yield batch
+                batch = None
+
+
+def classify(batch):
+    """(action, reason) for a batch, action in ACTION_ORDER or None (nothing relevant)"""
+    if batch.overflow:
+        return 'restart', 'inotify queue overflow'
+    if len(batch.changes) > BURST_FILES:
+        return 'restart', f'{len(batch.changes)} files changed'
+    action, reason = None, None
+    for path, change in batch.changes.items():
+        path = path.replace(os.sep, '/')
+        if change == 'deleted' and path.endswith(('.cs', '.razor', '.csproj', '/')):
+            return 'restart', f'{path} deleted'
+        rule = next((result for pattern, result in RULES if fnmatch(path, pattern)
+                     or fnmatch(os.path.basename(path), pattern)), 'live')
+        if action is None or ACTION_ORDER.index(rule) > ACTION_ORDER.index(action):
+            action, reason = rule, path
+    return action, reason
+
+
+def describe(batch, limit=3):
+    paths = sorted(batch.changes)
+    more = f" and {len(paths) - limit} more" if len(paths) > limit else ""
+    return ', '.join(paths[:limit]) + more
+
+
+def cycles_path(logs_dir):
+    return os.path.join(logs_dir, CYCLES_FILE)
+
+
+def append_cycle(logs_dir, batch, action, reason, decided, ready, outcome):
+    """One "change detected -> app ready" cycle (monotonic times)"""
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'action': action,
+        'reason': reason,
+        'files': len(batch.changes),
+        'burst': round(batch.last - batch.first, 3),
+        'debounce': round(decided - batch.first, 3),
+        'latency': round(ready - batch.first, 3) if ready is not None else None,
+        'outcome': outcome,
+    }
+    with open(cycles_path(logs_dir), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    return record
+
+
+def load_cycles(logs_dir):
+    records = []
+    try:
+        with open(cycles_path(logs_dir), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def render_cycles(records, recent=10):
+    """Per-action latency summary and the latest cycles"""
+    if not records:
+        return ["No watch cycles recorded yet"]
+    lines = [f"{'Action':<12} {'cycles':>7} {'median':>8} {'p90':>8} {'total':>9}  (change detected -> app ready)"]
+    for action in ACTION_ORDER:
+        latencies = sorted(record['latency'] for record in records
+                           if record['action'] == action and record['latency'] is not None)
+        if not latencies:
+            continue
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+        lines.append(f"{action:<12} {len(latencies):>7} {statistics.median(latencies):>7.2f}s {p90:>7.2f}s "
+                     f"{sum(latencies):>8.1f}s")
+    waited = sum(record['latency'] or 0 for record in records)
+    lines += [f"Waiting for the app after edits: {waited / 60:.1f} min over {len(records)} cycles", "",
+              "Latest cycles:"]
+    for record in records[-recent:]:
+        latency = f"{record['latency']:.2f}s" if record['latency'] is not None else '-'
+        lines.append(f"  {record['timestamp']}  {record['action']:<10} {latency:>8}  {record['files']:>3} files  "
+                     f"{record['outcome']:<9} {record['reason']}")
+    return lines
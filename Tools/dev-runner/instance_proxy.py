@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Instance Proxy
+Round-robin HTTP reverse proxy in front of the app instances started by
+`run-dev.py --instances N`
+
+- HTTP/1.1 keep-alive on both sides, with pooled connections to the
+  instances. Bodies are streamed: Content-Length, chunked, or until close.
+- WebSocket upgrades (SignalR /chatHub, /monitoringHub) are tunnelled to
+  the instance that answered 101.
+- Affinity: responses set a `dev-runner-instance` cookie, and requests that
+  carry it go back to the same instance. A SignalR negotiate and the
+  WebSocket that follows therefore land on one instance. Clients without
+  cookies get plain per-request round robin.
+- Instances failing their /health check are skipped until they recover.
+- GET /_dev-runner/status returns per-instance health and request counts
+  as JSON.
+
+Usage: instance_proxy.py --port 5005 --backend 5006 --backend 5007
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+STATUS_PATH = '/_dev-runner/status'
+AFFINITY_COOKIE = 'dev-runner-instance'
+
+# Connection-level headers that are not forwarded (Upgrade/Connection are
+# kept for WebSocket handshakes)
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-connection', 'te', 'trailer', 'upgrade'}
+
+COPY_SIZE = 64 * 1024
+
+
+class BadGateway(Exception):
+    """The instance failed before any part of its response reached the client"""
+
+
+def parse_head(head):
+    """(start line parts, [(name, value)]) of a request/response head"""
+    lines = head.decode('latin-1').split('\r\n')
+    headers = []
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers.append((name.strip(), value.strip()))
+    return lines[0].split(' ', 2), headers
+
+
+def header(headers, name):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def build_head(start_line, headers):
+    lines = [start_line] + [f'{name}: {value}' for name, value in headers]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def read_head(reader):
+    """Bytes of the next message head, None when the peer closed cleanly"""
+    try:
+        return await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as error:
+        if error.partial.strip():
+            raise
+        return None
+
+
+async def copy_exact(reader, writer, size):
+    while size > 0:
+        data = await reader.read(min(COPY_SIZE, size))
+        if not data:
+            raise asyncio.IncompleteReadError(b'', size)
+        writer.write(data)
+        await writer.drain()
+        size -= len(data)
+
+
+async def relay_body(reader, writer, headers, until_close=False):
+    """Copy one message body; returns False when it ended with the connection"""
+    encoding = header(headers, 'Transfer-Encoding')
+    if encoding and 'chunked' in encoding.lower():
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            writer.write(line)
+            size = int(line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # Optional trailers, then the terminating empty line
+                while line != b'\r\n':
+                    line = await reader.readuntil(b'\r\n')
+                    writer.write(line)
+                await writer.drain()
+                return True
+            await copy_exact(reader, writer, size + 2)
+    length = header(headers, 'Content-Length')
+    if length is not None:
+        await copy_exact(reader, writer, int(length))
+        return True
+    if until_close:
+        while True:
+            data = await reader.read(COPY_SIZE)
+            if not data:
+                return False
+            writer.write(data)
+            await writer.drain()
+    return True
+
+
+async def pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(COPY_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (OSError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class Backend:
+    """One app instance and its counters"""
+
+    def __init__(self, index, port, host='localhost'):
+        self.index = index
+        self.port = port
+        self.host = host
+        self.healthy = False
+        self.health_ms = None
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.websockets = 0
+        self.busy_seconds = 0.0
+        self.idle = []
+
+    async def acquire(self):
+        """(reader, writer, reused) - a pooled keep-alive connection if any"""
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        return reader, writer, False
+
+    def release(self, reader, writer):
+        self.idle.append((reader, writer))
+
+    def to_dict(self):
+        completed = self.requests - self.active
+        return {
+            'index': self.index,
+            'port': self.port,
+            'healthy': self.healthy,
+            'health_ms': self.health_ms,
+            'requests': self.requests,
+            'errors': self.errors,
+            'active': self.active,
+            'websockets': self.websockets,
+            'avg_ms': self.busy_seconds * 1000 / completed if completed > 0 else None,
+        }
+
+
+class InstanceProxy:
+    def __init__(self, port, backend_ports, host='localhost', health_path='/health', health_interval=2.0):
+        self.port = port
+        self.host = host
+        self.backends = [Backend(index, backend_port, host) for index, backend_port in enumerate(backend_ports, 1)]
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.rotation = itertools.count()
+        self.started = time.time()
+
+    def pick(self, headers):
+        """Affinity cookie first, then round robin over healthy instances"""
+        cookies = header(headers, 'Cookie') or ''
+        for cookie in cookies.split(';'):
+            name, _, value = cookie.strip().partition('=')
+            if name == AFFINITY_COOKIE:
+                for backend in self.backends:
+                    if str(backend.port) == value and backend.healthy:
+                        return backend
+        candidates = [backend for backend in self.backends if backend.healthy] or self.backends
+        return candidates[next(self.rotation) % len(candidates)]
+
+    async def check_health(self, backend):
+        start = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, backend.port), 2.0)
+            try:
+                writer.write(f'GET {self.health_path} HTTP/1.1\r\nHost: {self.host}:{backend.port}\r\n'
+                             'Connection: close\r\n\r\n'.encode('ascii'))
+                status_line = await asyncio.wait_for(reader.readline(), 2.0)
+                backend.healthy = int(status_line.split()[1]) < 500
+            finally:
+                writer.close()
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            backend.healthy = False
+        backend.health_ms = (time.perf_counter() - start) * 1000 if backend.healthy else None
+
+    async def health_loop(self):
+        while True:
+            await asyncio.gather(*(self.check_health(backend) for backend in self.backends))
+            # Instances still starting (or down) are checked more often
+            await asyncio.sleep(self.health_interval if all(backend.healthy for backend in self.backends) else 0.25)
+
+    def status(self):
+        return {
+            'port': self.port,
+            'uptime': time.time() - self.started,
+            'instances': [backend.to_dict() for backend in self.backends],
+        }
+
+    async def respond(self, writer, status, body, content_type='text/plain; charset=utf-8'):
+        payload = body.encode('utf-8')
+        writer.write(build_head(f'HTTP/1.1 {status}', [('Content-Type', content_type),
+                                                       ('Content-Length', str(len(payload)))]) + payload)
+        await writer.drain()
+
+    async def handle_client(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                head = await read_head(reader)
+                if head is None:
+                    break
+                (method, target, version), headers = parse_head(head)
+                if target.split('?', 1)[0] == STATUS_PATH:
+                    await self.respond(writer, '200 OK', json.dumps(self.status()), 'application/json')
+                    continue
+                keep_alive = await self.forward(reader, writer, method, target, version, headers,
+                                                peer[0] if peer else '')
+                if not keep_alive:
+                    break
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def forward(self, client_reader, client_writer, method, target, version, headers, client_ip):
+        """Proxy one request; returns whether the client connection stays open"""
+        backend = self.pick(headers)
+        upgrade = (header(headers, 'Upgrade') or '').lower() == 'websocket'
+        connection = (header(headers, 'Connection') or '').lower()
+        client_keep_alive = 'close' not in connection and (version == 'HTTP/1.1' or 'keep-alive' in connection)
+
+        forwarded = [(name, value) for name, value in headers
+                     if name.lower() not in HOP_BY_HOP or upgrade and name.lower() in ('connection', 'upgrade')]
+        forwarded += [('X-Forwarded-For', client_ip), ('X-Forwarded-Proto', 'http'),
+                      ('X-Forwarded-Host', header(headers, 'Host') or '')]
+        request_head = build_head(f'{method} {target} HTTP/1.1', forwarded)
+        has_body = header(headers, 'Content-Length') not in (None, '0') or header(headers, 'Transfer-Encoding')
+
+        backend.requests += 1
+        backend.active += 1
+        start = time.perf_counter()
+        try:
+            try:
+                backend_reader, backend_writer, response_head = await self.send_request(
+                    backend, request_head, client_reader, headers, retry=not has_body)
+            except BadGateway:
+                backend.errors += 1
+                await self.respond(client_writer, '502 Bad Gateway', f'Instance on port {backend.port} failed\n')
+                return client_keep_alive
+
+            (_, status, *_), response_headers = parse_head(response_head)
+            status = int(status)
+            if status == 101:
+                backend.websockets += 1
+                client_writer.write(response_head)
+                await client_writer.drain()
+                await asyncio.gather(pipe(client_reader, backend_writer), pipe(backend_reader, client_writer))
+                return False
+
+            if f'{AFFINITY_COOKIE}={backend.port}' not in (header(headers, 'Cookie') or ''):
+                response_headers.append(('Set-Cookie', f'{AFFINITY_COOKIE}={backend.port}; Path=/; SameSite=Lax'))
+            backend_keep_alive = 'close' not in (header(response_headers, 'Connection') or '').lower()
+            response_headers = [(name, value) for name, value in response_headers if name.lower() not in HOP_BY_HOP]
+            if not client_keep_alive:
+                response_headers.append(('Connection', 'close'))
+            client_writer.write(build_head(response_head.decode('latin-1').split('\r\n', 1)[0], response_headers))
+
+            if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+                delimited = True
+            else:
+                delimited = await relay_body(backend_reader, client_writer, response_headers, until_close=True)
+            await client_writer.drain()
+
+            if delimited and backend_keep_alive:
+                backend.release(backend_reader, backend_writer)
+            else:
+                backend_writer.close()
+            return client_keep_alive and delimited
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            backend.errors += 1
+            raise
+        finally:
+            backend.active -= 1
+            backend.busy_seconds += time.perf_counter() - start
+
+    async def send_request(self, backend, request_head, client_reader, headers, retry):
+        """Send the request and read the response head
+
+        A pooled connection the instance already closed fails before any
+        response byte; requests without a body are then retried once on a
+        fresh connection.
+        """
+        for attempt in range(2):
+            try:
+                backend_reader, backend_writer, reused = await backend.acquire()
+            except OSError:
+                raise BadGateway()
+            try:
+                backend_writer.write(request_head)
+                await relay_body(client_reader, backend_writer, headers)
+                await backend_writer.drain()
+                response_head = await read_head(backend_reader)
+                if response_head is None:
+                    raise ConnectionResetError()
+                return backend_reader, backend_writer, response_head
+            except (OSError, asyncio.IncompleteReadError):
+                backend_writer.close()
+                if not (reused and retry and attempt == 0):
+                    raise BadGateway()
+        raise BadGateway()
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=COPY_SIZE * 4)
+        health = asyncio.create_task(self.health_loop())
+        ports = ', '.join(str(backend.port) for backend in self.backends)
+        print(f'Proxy on http://{self.host}:{self.port} -> instances on ports {ports}', flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            health.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round-robin proxy for run-dev.py --instances')
+    parser.add_argument('--port', type=int, default=5005, help='listening port (default: 5005)')
+    parser.add_argument('--backend', type=int, action='append', required=True, help='instance port (repeatable)')
+    parser.add_argument('--host', default='localhost')
+    options = parser.parse_args()
+    try:
+        asyncio.run(InstanceProxy(options.port, options.backend, options.host).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
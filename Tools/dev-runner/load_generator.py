@@ -0,0 +1,578 @@
+"""
+Load Generator
+asyncio load generator for the running app (`run-dev.py load`)
+
+Virtual users loop over the selected scenarios until the duration is up.
+HTTP requests share a fixed-size pool of keep-alive connections, and
+SignalR hub sessions run over their own WebSocket connections (stdlib
+only: negotiate, handshake and the JSON hub protocol).
+
+Scenarios:
+    orchestrators   OrchestratorsApiController: list, detail, health, config, coding status
+    workflow        WorkflowApiController: history and status lookups
+    execute         POST api/orchestrators/{id}/execute (drives the AI, use the mock Ollama)
+    chat-hub        /chatHub session: JoinConversation, SendMessage, LeaveConversation
+    monitoring-hub  /monitoringHub session: Connected, Subscribe, Unsubscribe
+
+Each operation gets a count, errors (connection failures, timeouts, 5xx),
+status codes, throughput and latency percentiles; the report adds a latency
+histogram per scenario.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import ssl
+import struct
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlsplit
+
+# Upper bounds of the histogram buckets (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+RECORD_SEPARATOR = '\x1e'
+
+# SignalR hub protocol message types
+INVOCATION, STREAM_ITEM, COMPLETION, PING, CLOSE = 1, 2, 3, 6, 7
+
+
+class LoadError(Exception):
+    """A request failed in a way that counts as an error"""
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def histogram(latencies_ms):
+    counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    for value in latencies_ms:
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+class OperationStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+        self.last_error = None
+
+    def add(self, elapsed, status=None):
+        self.latencies.append(elapsed * 1000)
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def fail(self, error):
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def summary(self, elapsed):
+        ordered = sorted(self.latencies)
+        return {
+            'count': len(ordered),
+            'errors': self.errors,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'rps': len(ordered) / elapsed if elapsed else 0.0,
+            'min': ordered[0] if ordered else None,
+            'p50': percentile(ordered, 0.50),
+            'p90': percentile(ordered, 0.90),
+            'p99': percentile(ordered, 0.99),
+            'max': ordered[-1] if ordered else None,
+            'mean': sum(ordered) / len(ordered) if ordered else None,
+            'histogram': histogram(ordered),
+            'last_error': self.last_error,
+        }
+
+
+# -- HTTP -------------------------------------------------------------------
+
+async def read_body(reader, headers, method, status):
+    """(body, reusable) of a response"""
+    if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+        return b'', True
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        parts = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return b''.join(parts), True
+            parts.append((await reader.readexactly(size + 2))[:-2])
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length'])), True
+    return await reader.read(), False
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+
+class HttpClient:
+    """Keep-alive HTTP/1.1 client over a bounded connection pool"""
+
+    def __init__(self, base_url, size=20, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.authority = f"{self.host}:{self.port}"
+        self.ssl = None
+        if parts.scheme == 'https':
+            # The development certificate does not need to be trusted
+            self.ssl = ssl.create_default_context()
+            self.ssl.check_hostname = False
+            self.ssl.verify_mode = ssl.CERT_NONE
+        self.size = size
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.connects = 0
+        self.websockets = 0
+
+    async def open(self, websocket=False):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl, limit=1024 * 1024), self.timeout)
+        if websocket:
+            self.websockets += 1
+        else:
+            self.connects += 1
+        return Connection(reader, writer)
+
+    async def acquire(self):
+        """An idle keep-alive connection, or a new one while the pool has room"""
+        await self.slots.acquire()
+        while self.idle:
+            connection = self.idle.pop()
+            if not connection.reader.at_eof():
+                return connection
+            connection.writer.close()
+        try:
+            return await self.open()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self, connection, reusable):
+        if reusable:
+            self.idle.append(connection)
+        else:
+            connection.writer.close()
+        self.slots.release()
+
+    async def request(self, method, path, body=None, headers=None):
+        """(status, headers, body); a dropped keep-alive connection is retried once"""
+        payload = b'' if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode('utf-8'))
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.authority}", "Accept: application/json"]
+        if body is not None or method in ('POST', 'PUT'):
+            lines += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + payload
+
+        for attempt in range(2):
+            connection = await self.acquire()
+            reused = connection.requests > 0
+            try:
+                connection.writer.write(request)
+                await connection.writer.drain()
+                head = await asyncio.wait_for(connection.reader.readuntil(b'\r\n\r\n'), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as error:
+                self.release(connection, False)
+                # The server may have closed an idle keep-alive connection
+                if reused and attempt == 0 and not isinstance(error, asyncio.TimeoutError):
+                    continue
+                raise
+            try:
+                text = head.decode('latin-1').split('\r\n')
+                status = int(text[0].split(' ', 2)[1])
+                response_headers = {}
+                for line in text[1:]:
+                    name, _, value = line.partition(':')
+                    name = name.strip().lower()
+                    if name == 'set-cookie':
+                        response_headers.setdefault(name, []).append(value.strip())
+                    elif name:
+                        response_headers.setdefault(name, value.strip())
+                response, reusable = await asyncio.wait_for(
+                    read_body(connection.reader, response_headers, method, status), self.timeout)
+            except BaseException:
+                self.release(connection, False)
+                raise
+            connection.requests += 1
+            reusable = reusable and response_headers.get('connection', '').lower() != 'close'
+            self.release(connection, reusable)
+            return status, response_headers, response
+        raise LoadError("connection dropped")
+
+    async def close(self):
+        for connection in self.idle:
+            connection.writer.close()
+        self.idle = []
+
+
+# -- WebSocket / SignalR ----------------------------------------------------
+
+class WebSocket:
+    """Minimal RFC 6455 client: text frames, ping/pong, close"""
+
+    def __init__(self, connection):
+        self.reader = connection.reader
+        self.writer = connection.writer
+
+    @classmethod
+    async def connect(cls, client, path, headers=None):
+        connection = await client.open(websocket=True)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        lines = [f"GET {path} HTTP/1.1", f"Host: {client.authority}", "Upgrade: websocket",
+                 "Connection: Upgrade", f"Sec-WebSocket-Key: {key}", "Sec-WebSocket-Version: 13"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        connection.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await connection.writer.drain()
+        head = await asyncio.wait_for(connection.reader.readuntil(b'\r\n\r\n'), client.timeout)
+        status = head.split(b' ', 2)[1]
+        if status != b'101':
+            connection.writer.close()
+            raise LoadError(f"WebSocket upgrade refused ({status.decode()})")
+        return cls(connection)
+
+    def frame(self, opcode, payload):
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+        return header + mask + masked
+
+    async def send(self, text):
+        self.writer.write(self.frame(0x1, text.encode('utf-8')))
+        await self.writer.drain()
+
+    async def recv(self):
+        """Next text message, None once the server closed the socket"""
+        message = b''
+        while True:
+            first, second = await self.reader.readexactly(2)
+            opcode, length = first & 0x0F, second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self.writer.write(self.frame(0xA, payload))
+                continue
+            if opcode == 0xA:
+                continue
+            message += payload
+            if first & 0x80:
+                return message.decode('utf-8')
+
+    async def close(self):
+        try:
+            self.writer.write(self.frame(0x8, struct.pack('!H', 1000)))
+            await self.writer.drain()
+        except OSError:
+            pass
+        self.writer.close()
+
+
+class HubSession:
+    """SignalR JSON hub protocol over a WebSocket"""
+
+    def __init__(self, client, hub):
+        self.client = client
+        self.hub = hub
+        self.socket = None
+        self.pending = []
+        self.invocations = 0
+        self.received = {}
+
+    async def open(self):
+        status, headers, body = await self.client.request('POST', f"/{self.hub}/negotiate?negotiateVersion=1", b'')
+        if status != 200:
+            raise LoadError(f"negotiate returned {status}")
+        negotiation = json.loads(body)
+        token = negotiation.get('connectionToken') or negotiation.get('connectionId')
+        # Cookies (e.g. the instance affinity of run-dev.py --instances) go with the upgrade
+        cookie = '; '.join(value.split(';', 1)[0] for value in headers.get('set-cookie', []))
+        self.socket = await WebSocket.connect(self.client, f"/{self.hub}?id={token}",
+                                              {'Cookie': cookie} if cookie else None)
+        await self.socket.send(json.dumps({'protocol': 'json', 'version': 1}) + RECORD_SEPARATOR)
+        handshake = await self.next_message()
+        if handshake.get('error'):
+            raise LoadError(f"handshake: {handshake['error']}")
+
+    async def next_message(self):
+        while not self.pending:
+            text = await asyncio.wait_for(self.socket.recv(), self.client.timeout)
+            if text is None:
+                raise LoadError("hub closed the connection")
+            self.pending += [json.loads(part) for part in text.split(RECORD_SEPARATOR) if part]
+        return self.pending.pop(0)
+
+    async def wait_for(self, target):
+        """Skip messages until the server invokes `target` on the client"""
+        while True:
+            message = await self.next_message()
+            self.note(message)
+            if message.get('type') == INVOCATION and message.get('target') == target:
+                return message
+
+    def note(self, message):
+        if message.get('type') == CLOSE:
+            raise LoadError(f"hub closed: {message.get('error', 'no error')}")
+        if message.get('type') == INVOCATION:
+            self.received[message['target']] = self.received.get(message['target'], 0) + 1
+
+    async def invoke(self, target, *arguments):
+        """Invoke a hub method and wait for its completion"""
+        self.invocations += 1
+        invocation_id = str(self.invocations)
+        await self.socket.send(json.dumps({'type': INVOCATION, 'invocationId': invocation_id,
+                                           'target': target, 'arguments': list(arguments)}) + RECORD_SEPARATOR)
+        while True:
+            message = await self.next_message()
+            self.note(message)
+            if message.get('type') == COMPLETION and message.get('invocationId') == invocation_id:
+                if message.get('error'):
+                    raise LoadError(f"{target}: {message['error']}")
+                return message.get('result')
+
+    async def close(self):
+        if self.socket:
+            await self.socket.close()
+
+
+# -- scenarios ----------------------------------------------------------------
+
+class LoadContext:
+    def __init__(self, client, options):
+        self.client = client
+        self.options = options
+        self.stats = {}
+        self.orchestrator_ids = [options.get('orchestrator', 'conversation_orchestrator')]
+
+    def operation(self, name):
+        if name not in self.stats:
+            self.stats[name] = OperationStats()
+        return self.stats[name]
+
+    async def http(self, name, method, path, body=None):
+        stats = self.operation(name)
+        start = time.perf_counter()
+        try:
+            status, _, response = await self.client.request(method, path, body)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, LoadError, ValueError) as error:
+            stats.fail(error)
+            return None
+        stats.add(time.perf_counter() - start, status)
+        if status >= 500:
+            stats.fail(LoadError(f"HTTP {status}"))
+        return response if status < 400 else None
+
+    async def timed(self, name, awaitable):
+        stats = self.operation(name)
+        start = time.perf_counter()
+        try:
+            result = await awaitable
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, LoadError, ValueError) as error:
+            stats.fail(error)
+            raise
+        stats.add(time.perf_counter() - start)
+        return result
+
+    async def setup(self):
+        """Learn real orchestrator ids from the API"""
+        body = await self.http('orchestrators:setup', 'GET', '/api/orchestrators')
+        try:
+            ids = [item['id'] for item in json.loads(body)['data'] if item.get('id')]
+        except (TypeError, ValueError, KeyError):
+            ids = []
+        if ids and 'orchestrator' not in self.options:
+            self.orchestrator_ids = ids
+
+    def orchestrator(self, turn):
+        return self.orchestrator_ids[turn % len(self.orchestrator_ids)]
+
+
+async def scenario_orchestrators(context, turn):
+    orchestrator = context.orchestrator(turn)
+    await context.http('orchestrators:list', 'GET', '/api/orchestrators')
+    await context.http('orchestrators:list-workflow', 'GET', '/api/orchestrators?workflowOnly=true')
+    await context.http('orchestrators:detail', 'GET', f'/api/orchestrators/{orchestrator}')
+    await context.http('orchestrators:health', 'GET', f'/api/orchestrators/{orchestrator}/health')
+    await context.http('orchestrators:config', 'GET', f'/api/orchestrators/{orchestrator}/config')
+    await context.http('orchestrators:coding-status', 'GET', '/api/orchestrators/coding/status')
+
+
+async def scenario_workflow(context, turn):
+    workflow_id = context.options.get('workflow_id') or str(uuid.uuid4())
+    await context.http('workflow:history', 'GET', f'/api/workflow/history/{workflow_id}')
+    await context.http('workflow:status', 'GET', f'/api/workflow/status/{uuid.uuid4()}')
+    await context.http('workflow:details', 'GET', f'/api/workflow/execution/{uuid.uuid4()}/details')
+
+
+async def scenario_execute(context, turn):
+    orchestrator = context.options.get('execute_orchestrator', 'discovery_orchestrator')
+    await context.http('execute:orchestrator', 'POST', f'/api/orchestrators/{orchestrator}/execute',
+                       {'input': f'Zátěžový test #{turn}: navrhni jednoduchý workflow', 'context': {}})
+
+
+async def scenario_chat_hub(context, turn):
+    session = HubSession(context.client, 'chatHub')
+    conversation = context.options.get('conversation_id', 1)
+    try:
+        await context.timed('chat-hub:connect', session.open())
+        await context.timed('chat-hub:join', session.invoke('JoinConversation', conversation))
+        await context.timed('chat-hub:send-message', session.invoke(
+            'SendMessage', conversation, f'Zátěžový test #{turn}', context.options.get('model', 'phi3.5')))
+        await context.timed('chat-hub:leave', session.invoke('LeaveConversation', conversation))
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, LoadError, ValueError):
+        pass
+    finally:
+        await session.close()
+
+
+async def scenario_monitoring_hub(context, turn):
+    session = HubSession(context.client, 'monitoringHub')
+    try:
+        await context.timed('monitoring-hub:connect', session.open())
+        await context.timed('monitoring-hub:connected', session.wait_for('Connected'))
+        await context.timed('monitoring-hub:subscribe', session.invoke('Subscribe', 'cpu'))
+        await context.timed('monitoring-hub:unsubscribe', session.invoke('Unsubscribe', 'cpu'))
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, LoadError, ValueError):
+        pass
+    finally:
+        await session.close()
+
+
+SCENARIOS = {
+    'orchestrators': scenario_orchestrators,
+    'workflow': scenario_workflow,
+    'execute': scenario_execute,
+    'chat-hub': scenario_chat_hub,
+    'monitoring-hub': scenario_monitoring_hub,
+}
+
+
+# -- driver -------------------------------------------------------------------
+
+async def run_load(base_url, scenarios, users=20, duration=30.0, connections=None, options=None,
+                   log=print, progress_interval=5.0):
+    """Run the scenarios with `users` concurrent virtual users; returns the report"""
+    client = HttpClient(base_url, connections or users)
+    context = LoadContext(client, options or {})
+    await context.setup()
+    context.stats.pop('orchestrators:setup', None)
+
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def user(index):
+        turn = index
+        while time.perf_counter() < deadline:
+            await SCENARIOS[scenarios[turn % len(scenarios)]](context, turn)
+            turn += 1
+
+    async def progress():
+        previous = 0
+        while True:
+            await asyncio.sleep(progress_interval)
+            done = sum(len(stats.latencies) for stats in context.stats.values())
+            errors = sum(stats.errors for stats in context.stats.values())
+            log(f"  {time.perf_counter() - start:5.0f}s  {done} operations "
+                f"({(done - previous) / progress_interval:.0f}/s), {errors} errors")
+            previous = done
+
+    ticker = asyncio.create_task(progress())
+    try:
+        await asyncio.gather(*(user(index) for index in range(users)))
+    finally:
+        ticker.cancel()
+        await client.close()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'url': base_url,
+        'scenarios': scenarios,
+        'users': users,
+        'connections': client.size,
+        'connects': client.connects,
+        'websockets': client.websockets,
+        'duration': elapsed,
+        'operations': {name: stats.summary(elapsed) for name, stats in sorted(context.stats.items())},
+    }
+
+
+def save_report(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def format_ms(value):
+    return '-' if value is None else f"{value:.1f}"
+
+
+def render(report, width=40):
+    operations = report['operations']
+    total = sum(data['count'] for data in operations.values())
+    errors = sum(data['errors'] for data in operations.values())
+    lines = [
+        f"{report['users']} users, {report['connections']} pooled connections "
+        f"({report['connects']} opened), {report['websockets']} WebSocket sessions, {report['duration']:.1f}s",
+        f"Throughput: {total / report['duration']:.1f} operations/s, {total} operations, {errors} errors",
+        "",
+        f"{'Operation':<30} {'count':>7} {'err':>5} {'rps':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  status",
+        "-" * 100,
+    ]
+    for name, data in operations.items():
+        statuses = ' '.join(f"{status}×{count}" for status, count in data['statuses'].items())
+        lines.append(f"{name:<30} {data['count']:>7} {data['errors']:>5} {data['rps']:>7.1f} "
+                     f"{format_ms(data['p50']):>8} {format_ms(data['p90']):>8} {format_ms(data['p99']):>8} "
+                     f"{format_ms(data['max']):>8}  {statuses}")
+    lines.append("(latencies in ms)")
+
+    labels = [f"≤{bound} ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]} ms"]
+    for scenario in report['scenarios']:
+        counts = [0] * len(labels)
+        for name, data in operations.items():
+            if name.split(':', 1)[0] == scenario:
+                counts = [a + b for a, b in zip(counts, data['histogram'])]
+        if not any(counts):
+            continue
+        first = next(index for index, count in enumerate(counts) if count)
+        last = max(index for index, count in enumerate(counts) if count)
+        peak = max(counts)
+        lines += ["", f"Latency histogram: {scenario}"]
+        for label, count in zip(labels[first:last + 1], counts[first:last + 1]):
+            bar = '█' * max(1 if count else 0, round(count / peak * width))
+            lines.append(f"  {label:>10} {count:>7} {bar}")
+
+    failing = [(name, data['last_error']) for name, data in operations.items() if data['last_error']]
+    if failing:
+        lines += ["", "Last errors:"]
+        lines += [f"  {name}: {error}" for name, error in failing]
+    return lines
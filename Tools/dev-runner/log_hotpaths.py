@@ -0,0 +1,455 @@
+"""
+Log Hot Paths
+Slowest EF Core queries and request durations per route, mined from the
+Serilog files in logs/ (`run-dev.py hotpaths`)
+
+Microsoft.EntityFrameworkCore runs at Information, so every command lands in
+the log as "Executed DbCommand (12ms) [Parameters=...]" followed by its SQL;
+{Properties:j} adds the ASP.NET Core scope (RequestId, RequestPath,
+ActionName). Queries are grouped by their normalized SQL (literals,
+parameters and IN lists replaced by ?).
+
+Request durations come from request completion events when they are logged
+(Serilog request logging "HTTP GET /x responded 200 in 12.3 ms" or
+Microsoft.AspNetCore.Hosting "Request finished ..."). The app keeps
+Microsoft.* at Warning, so otherwise a request lasts from its first to its
+last log event with the same RequestId - a lower bound, marked as "span".
+SignalR connections (/chatHub etc.) keep one RequestId for their whole
+lifetime and get no duration, only their DB time.
+
+Every daily file is streamed once through mmap in its own process; memory
+stays bounded: durations go into log-scale histograms (5 % resolution), open
+requests are closed after REQUEST_IDLE seconds of log time without events
+and the number of distinct queries/routes per file is capped.
+"""
+
+import math
+import mmap
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from datetime import datetime
+
+from log_index import SERILOG_FILE, discover
+
+EF_SOURCE = b'Microsoft.EntityFrameworkCore.Database.Command'
+EF_COMMAND = re.compile(rb'(Executed|Failed executing) DbCommand \((\d+)ms\)[^\r\n]*\r?\n')
+# {Properties:j} at the end of the last message line
+PROPERTIES = re.compile(rb' \{(?:"[^\r\n]*)?\}\r?$', re.M)
+REQUEST_ID = re.compile(rb'"RequestId": ?"([^"]+)"')
+REQUEST_PATH = re.compile(rb'"RequestPath": ?"([^"]*)"')
+ACTION_NAME = re.compile(rb'"ActionName": ?"([^"]*)"')
+
+COMPLETIONS = {
+    b'Serilog.AspNetCore.RequestLoggingMiddleware':
+        re.compile(rb'HTTP "?(\w+)"? "?([^\s"]+)"? responded "?(\d{3})"? in ([\d.]+) ms'),
+    b'Microsoft.AspNetCore.Hosting.Diagnostics':
+        re.compile(rb'Request finished (?:HTTP/[\d.]+ )?(\w+) (\S+) - (\d{3})[^\r\n]*? ([\d.]+)ms'),
+}
+
+HUB_PATH = re.compile(r'Hub/?$')
+
+STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+PARAMETER = re.compile(r'(?<![\w"])(?:@\w+|\$\d+)')
+NUMBER = re.compile(r'(?<![\w".$@])-?\d+(?:\.\d+)?(?![\w"])')
+IN_LIST = re.compile(r'\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+VALUES_LIST = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+WHITESPACE = re.compile(r'\s+')
+
+ID_SEGMENT = re.compile(r'/(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                        r'|[0-9a-fA-F]{24,})(?=/|$)')
+
+REQUEST_IDLE = 120      # seconds of log time after which an open request is closed
+SWEEP_INTERVAL = 10
+MAX_KEYS = 5000         # distinct queries/routes per file, the rest goes to OTHER
+MAX_QUERY_ROUTES = 20
+OTHER = '(other)'
+BACKGROUND = '(background)'
+
+GROWTH = 1.05
+LOG_GROWTH = math.log(GROWTH)
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql):
+    """Query shape of the SQL text (bytes); EF parameterizes most queries, so
+    the same text repeats and the cache saves the substitutions"""
+    text = STRING_LITERAL.sub('?', sql.decode('utf-8', errors='replace'))
+    text = PARAMETER.sub('?', text)
+    text = NUMBER.sub('?', text)
+    text = WHITESPACE.sub(' ', text).strip()
+    text = IN_LIST.sub('IN (?)', text)
+    return VALUES_LIST.sub(r'\1, ...', text)
+
+
+def normalize_path(path):
+    if not path:
+        return None
+    return ID_SEGMENT.sub('/{id}', path.split('?', 1)[0]) or '/'
+
+
+class Distribution:
+    """Count, total, max and a log-scale histogram of millisecond values"""
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = Counter()
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[0 if ms < 1 else int(math.log(ms) / LOG_GROWTH) + 1] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets.update(other.buckets)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the percentile (within 5 %)"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * fraction))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, 1.0 if bucket == 0 else GROWTH ** bucket)
+        return self.max
+
+    def summary(self):
+        p50, p95 = self.percentile(0.50), self.percentile(0.95)
+        return {'count': self.count, 'total_ms': round(self.total, 1),
+                'avg_ms': round(self.total / self.count, 1) if self.count else None,
+                'p50_ms': p50 and round(p50, 1), 'p95_ms': p95 and round(p95, 1), 'max_ms': self.max}
+
+
+class QueryStats:
+    __slots__ = ('duration', 'failed', 'routes')
+
+    def __init__(self):
+        self.duration = Distribution()
+        self.failed = 0
+        self.routes = Counter()
+
+    def add_route(self, route, count=1):
+        if route in self.routes or len(self.routes) < MAX_QUERY_ROUTES:
+            self.routes[route] += count
+
+    def merge(self, other):
+        self.duration.merge(other.duration)
+        self.failed += other.failed
+        for route, count in other.routes.items():
+            self.add_route(route, count)
+
+
+class RouteStats:
+    __slots__ = ('duration', 'requests', 'logged', 'db_ms', 'queries', 'statuses', 'action')
+
+    def __init__(self):
+        self.duration = Distribution()
+        self.requests = 0
+        self.logged = 0        # durations from completion events, the rest are spans
+        self.db_ms = 0.0
+        self.queries = 0
+        self.statuses = Counter()
+        self.action = None
+
+    def merge(self, other):
+        self.duration.merge(other.duration)
+        self.requests += other.requests
+        self.logged += other.logged
+        self.db_ms += other.db_ms
+        self.queries += other.queries
+        self.statuses.update(other.statuses)
+        self.action = self.action or other.action
+
+
+class OpenRequest:
+    __slots__ = ('first', 'last', 'path', 'action', 'method', 'status', 'elapsed', 'db_ms', 'queries')
+
+    def __init__(self, timestamp, path):
+        self.first = self.last = timestamp
+        self.path = path
+        self.action = None
+        self.method = None
+        self.status = None
+        self.elapsed = None
+        self.db_ms = 0.0
+        self.queries = 0
+
+
+def bounded(table, key, factory):
+    stats = table.get(key)
+    if stats is None:
+        if len(table) >= MAX_KEYS:
+            key = OTHER
+            stats = table.get(key)
+        if stats is None:
+            stats = table[key] = factory()
+    return stats
+
+
+class FileScan:
+    """One streaming pass over a Serilog file"""
+
+    def __init__(self, since=None):
+        self.since = since
+        self.queries = {}
+        self.routes = {}
+        self.open = {}
+        self.records = 0
+        self.first = None
+        self.last = None
+        self.next_sweep = 0
+        self.day_starts = {}
+
+    def timestamp(self, date, hours, minutes, seconds, millis, zone):
+        day = self.day_starts.get(date + zone)
+        if day is None:
+            day = self.day_starts[date + zone] = datetime.strptime(
+                (date + zone).decode('ascii').replace(':', ''), '%Y-%m-%d%z').timestamp()
+        return day + int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+    def scan(self, data):
+        previous = None
+        for match in SERILOG_FILE.finditer(data):
+            if previous is not None:
+                self.record(previous, data[previous.end():match.start()])
+            previous = match
+        if previous is not None:
+            self.record(previous, data[previous.end():])
+        for request in list(self.open.values()):
+            self.close(request)
+        self.open.clear()
+
+    def record(self, header, body):
+        date, hours, minutes, seconds, millis, zone, _level, source = header.groups()
+        timestamp = self.timestamp(date, hours, minutes, seconds, millis, zone)
+        if self.since is not None and timestamp < self.since:
+            return
+        self.records += 1
+        if self.first is None:
+            self.first = timestamp
+        self.last = timestamp
+
+        request = None
+        match = REQUEST_ID.search(body)
+        if match:
+            request = self.open.get(match.group(1))
+            if request is None:
+                path = REQUEST_PATH.search(body)
+                request = self.open[match.group(1)] = OpenRequest(
+                    timestamp, path.group(1).decode('utf-8', errors='replace') if path else None)
+            request.last = timestamp
+            if request.action is None:
+                action = ACTION_NAME.search(body)
+                if action:
+                    request.action = action.group(1).decode('utf-8', errors='replace')
+
+        if source == EF_SOURCE:
+            self.command(body, request)
+        elif source in COMPLETIONS:
+            self.completion(COMPLETIONS[source].search(body), request)
+
+        if timestamp >= self.next_sweep:
+            self.sweep(timestamp)
+
+    def command(self, body, request):
+        match = EF_COMMAND.match(body)
+        if not match:
+            return
+        properties = PROPERTIES.search(body, match.end())
+        sql = body[match.end():properties.start() if properties else len(body)]
+        stats = bounded(self.queries, normalize_sql(sql), QueryStats)
+        elapsed = int(match.group(2))
+        stats.duration.add(elapsed)
+        if match.group(1) != b'Executed':
+            stats.failed += 1
+        if request is None:
+            stats.add_route(BACKGROUND)
+            return
+        stats.add_route(normalize_path(request.path) or BACKGROUND)
+        request.db_ms += elapsed
+        request.queries += 1
+
+    def completion(self, match, request):
+        if not match:
+            return
+        method, path, status, elapsed = (group.decode('utf-8', errors='replace') for group in match.groups())
+        if path.startswith(('http://', 'https://')):
+            path = '/' + path.split('/', 3)[3] if path.count('/') >= 3 else '/'
+        if request is None:
+            request = OpenRequest(self.last, path)
+            self.finish(request, method, status, elapsed)
+            self.close(request)
+            return
+        request.path = request.path or path
+        self.finish(request, method, status, elapsed)
+
+    def finish(self, request, method, status, elapsed):
+        request.method = method.upper()
+        request.status = status
+        request.elapsed = float(elapsed)
+
+    def sweep(self, now):
+        idle = [key for key, request in self.open.items() if now - request.last > REQUEST_IDLE]
+        for key in idle:
+            self.close(self.open.pop(key))
+        self.next_sweep = now + SWEEP_INTERVAL
+
+    def close(self, request):
+        route = normalize_path(request.path)
+        if route is None:
+            return
+        if request.method:
+            route = f"{request.method} {route}"
+        stats = bounded(self.routes, route, RouteStats)
+        stats.requests += 1
+        stats.db_ms += request.db_ms
+        stats.queries += request.queries
+        stats.action = stats.action or request.action
+        if request.status:
+            stats.statuses[request.status] += 1
+        if request.elapsed is not None:
+            stats.duration.add(request.elapsed)
+            stats.logged += 1
+        elif not HUB_PATH.search(request.path.split('?', 1)[0]):
+            stats.duration.add((request.last - request.first) * 1000)
+
+
+def scan_file(path, since=None):
+    """(queries, routes, records, first, last, bytes) of one log file"""
+    scan = FileScan(since)
+    size = 0
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                scan.scan(data)
+    return scan.queries, scan.routes, scan.records, scan.first, scan.last, size
+
+
+def merge_into(table, other):
+    for key, stats in other.items():
+        current = table.get(key)
+        if current is None:
+            table[key] = stats
+        else:
+            current.merge(stats)
+
+
+def analyze(logs_dir, since=None, workers=None):
+    """Aggregated hot paths of the app logs (files before `since` skipped)"""
+    files = discover(logs_dir, ('app',))
+    paths = []
+    for position, (start, path, _kind) in enumerate(files):
+        following = files[position + 1:]
+        if since is not None and following and following[0][0] <= since:
+            continue
+        paths.append(path)
+
+    result = {'files': len(paths), 'records': 0, 'bytes': 0, 'first': None, 'last': None,
+              'queries': {}, 'routes': {}}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scans = list(executor.map(scan_file, paths, [since] * len(paths)))
+    else:
+        scans = [scan_file(path, since) for path in paths]
+    for queries, routes, records, first, last, size in scans:
+        merge_into(result['queries'], queries)
+        merge_into(result['routes'], routes)
+        result['records'] += records
+        result['bytes'] += size
+        if first is not None:
+            result['first'] = first if result['first'] is None else min(result['first'], first)
+            result['last'] = last if result['last'] is None else max(result['last'], last)
+    return result
+
+
+SORT_KEYS = {
+    'total': lambda stats: stats.duration.total,
+    'p95': lambda stats: stats.duration.percentile(0.95) or 0,
+    'count': lambda stats: stats.duration.count,
+    'max': lambda stats: stats.duration.max,
+}
+
+
+def report(result, top=15, sort='total'):
+    """JSON-friendly summary of the `top` queries and routes"""
+    key = SORT_KEYS[sort]
+    queries = sorted(result['queries'].items(), key=lambda item: key(item[1]), reverse=True)[:top]
+    routes = sorted(result['routes'].items(), key=lambda item: key(item[1]), reverse=True)[:top]
+    return {
+        'files': result['files'], 'records': result['records'], 'bytes': result['bytes'],
+        'first': result['first'], 'last': result['last'],
+        'distinct_queries': len(result['queries']), 'distinct_routes': len(result['routes']),
+        'queries': [dict(stats.duration.summary(), sql=sql, failed=stats.failed,
+                         routes=dict(stats.routes.most_common(5)))
+                    for sql, stats in queries],
+        'routes': [dict(stats.duration.summary(), route=route, requests=stats.requests, logged=stats.logged,
+                        action=stats.action, statuses=dict(stats.statuses),
+                        db_ms_per_request=round(stats.db_ms / stats.requests, 1) if stats.requests else None,
+                        queries_per_request=round(stats.queries / stats.requests, 2) if stats.requests else None)
+                   for route, stats in routes],
+    }
+
+
+def format_ms(value):
+    return '-' if value is None else f"{value:.0f}" if value >= 100 else f"{value:.1f}"
+
+
+def shorten(text, width):
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def render(data, width=110):
+    def when(epoch):
+        return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M') if epoch else '-'
+
+    lines = [
+        f"{data['records']} records in {data['files']} files ({data['bytes'] / 1024 / 1024:.1f} MB), "
+        f"{when(data['first'])} - {when(data['last'])}",
+        "",
+        f"Slowest EF queries ({data['distinct_queries']} distinct)",
+        f"{'count':>7} {'total':>9} {'avg':>7} {'p95':>7} {'max':>7} {'fail':>5}  SQL",
+        "-" * width,
+    ]
+    for query in data['queries']:
+        lines.append(f"{query['count']:>7} {format_ms(query['total_ms']):>9} {format_ms(query['avg_ms']):>7} "
+                     f"{format_ms(query['p95_ms']):>7} {format_ms(query['max_ms']):>7} {query['failed'] or '':>5}  "
+                     f"{shorten(query['sql'], width - 48)}")
+        if query['routes']:
+            lines.append(f"{'':>47}↳ " + shorten(', '.join(f"{route} ×{count}" for route, count
+                                                           in query['routes'].items()), width - 49))
+
+    lines += [
+        "",
+        f"Requests per route ({data['distinct_routes']} distinct)",
+        f"{'requests':>8} {'total':>9} {'p50':>7} {'p95':>7} {'max':>7} {'db/req':>7} {'q/req':>6}  route",
+        "-" * width,
+    ]
+    spans = False
+    for route in data['routes']:
+        timing = ' (span)' if route['count'] > route['logged'] else ''
+        spans = spans or bool(timing)
+        statuses = ' '.join(f"{status}×{count}" for status, count in sorted(route['statuses'].items()))
+        total = route['total_ms'] if route['count'] else None
+        lines.append(f"{route['requests']:>8} {format_ms(total):>9} {format_ms(route['p50_ms']):>7} "
+                     f"{format_ms(route['p95_ms']):>7} {format_ms(route['max_ms'] if route['count'] else None):>7} "
+                     f"{format_ms(route['db_ms_per_request']):>7} {route['queries_per_request']:>6}  "
+                     f"{route['route']}{timing} {statuses}".rstrip())
+    lines.append("(times in ms)")
+    if spans:
+        lines.append("(span) = first to last log event of the request, a lower bound; log request completion "
+                     "(Serilog request logging or Microsoft.AspNetCore.Hosting at Information) for exact times")
+    return lines
@@ -0,0 +1,386 @@
+"""
+Log Index
+Indexed, memory-mapped access to the app logs for `run-dev.py logs`
+
+Covered files in logs/:
+    optimaly-ai-YYYYMMDD.log    Serilog rolling file sink
+                                "[2024-01-01 12:00:00.000 +01:00 INF] Source: message {props}"
+    dev-runner-YYYYMMDD-HHMMSS.log
+                                console output of `dotnet run` (Serilog console
+                                "[12:00:00 INF] Source: ..." or the Microsoft
+                                console logger "info: Source[0]"), build output
+
+Every file gets a sidecar index in logs/.index/ with one entry per log
+record (a header line plus its continuation lines, e.g. a stack trace):
+byte offset, timestamp, level and SourceContext id. The index is built
+once and then extended from the last indexed offset as the file grows, so
+a query only reads the index arrays and the bytes of records it prints
+(or greps). Files are read through mmap.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+import time
+from array import array
+from datetime import datetime, timedelta
+
+INDEX_DIR = '.index'
+INDEX_VERSION = 1
+
+APP_PATTERN = re.compile(r'^optimaly-ai-(\d{8})(?:_\d+)?\.log$')
+RUNNER_PATTERN = re.compile(r'^dev-runner-(\d{8})-(\d{6})(?:-[\w-]+)?\.log$')
+
+LEVEL_NAMES = ['VRB', 'DBG', 'INF', 'WRN', 'ERR', 'FTL']
+LEVELS = {name: index for index, name in enumerate(LEVEL_NAMES)}
+LEVELS.update({'TRCE': 0, 'DBUG': 1, 'INFO': 2, 'WARN': 3, 'FAIL': 4, 'CRIT': 5,
+               'VERBOSE': 0, 'DEBUG': 1, 'INFORMATION': 2, 'WARNING': 3, 'ERROR': 4, 'FATAL': 5})
+# Lines that are not log events (build output, Console.WriteLine)
+NO_LEVEL = 255
+
+# Record headers, matched at line starts
+SERILOG_FILE = re.compile(rb'^\[(\d{4}-\d\d-\d\d) (\d\d):(\d\d):(\d\d)\.(\d{3}) ([+-]\d\d:\d\d) (\w{3})\] ([^\r\n:]*?): ',
+                          re.M)
+SERILOG_CONSOLE = re.compile(rb'\[(\d\d):(\d\d):(\d\d) (\w{3})\] ([^\r\n:]*?): ')
+MS_CONSOLE = re.compile(rb'(trce|dbug|info|warn|fail|crit): ([^\r\n\[]+)\[-?\d+\]')
+
+
+def parse_level(text):
+    return LEVELS.get(text.upper(), NO_LEVEL)
+
+
+def parse_since(text, now=None):
+    """Epoch seconds from '30m', '2h', '1d', 'today', '2024-01-01' or '2024-01-01 12:00'"""
+    now = now or datetime.now()
+    match = re.fullmatch(r'(\d+)\s*([smhd])', text.strip())
+    if match:
+        unit = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}[match.group(2)]
+        return (now - timedelta(**{unit: int(match.group(1))})).timestamp()
+    if text == 'today':
+        return now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    for layout in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m-%d', '%H:%M'):
+        try:
+            parsed = datetime.strptime(text, layout)
+        except ValueError:
+            continue
+        if layout == '%H:%M':
+            parsed = now.replace(hour=parsed.hour, minute=parsed.minute, second=0, microsecond=0)
+        return parsed.timestamp()
+    raise ValueError(f"unrecognized time: {text}")
+
+
+def discover(logs_dir, kinds=('app', 'runner')):
+    """[(start epoch, path, kind)] of the log files, oldest first"""
+    found = []
+    try:
+        names = os.listdir(logs_dir)
+    except OSError:
+        return found
+    for name in names:
+        match = APP_PATTERN.match(name)
+        if match and 'app' in kinds:
+            found.append((datetime.strptime(match.group(1), '%Y%m%d').timestamp(), os.path.join(logs_dir, name), 'app'))
+            continue
+        match = RUNNER_PATTERN.match(name)
+        if match and 'runner' in kinds:
+            start = datetime.strptime(match.group(1) + match.group(2), '%Y%m%d%H%M%S').timestamp()
+            found.append((start, os.path.join(logs_dir, name), 'runner'))
+    return sorted(found)
+
+
+class LogIndex:
+    """Record offsets, timestamps, levels and sources of one log file"""
+
+    def __init__(self, path, kind, start):
+        self.path = path
+        self.kind = kind
+        self.start = start
+        directory, name = os.path.split(path)
+        self.index_path = os.path.join(directory, INDEX_DIR, name + '.idx')
+        self.offsets = array('q')
+        self.times = array('d')
+        self.levels = array('B')
+        self.sources = array('H')
+        self.source_names = []
+        self.source_ids = {}
+        self.size = 0          # bytes indexed (always ends at a line boundary)
+        self.identity = None   # (inode, first line) - detects rotation/truncation
+        self.last_time = start
+        self.day_cache = {}
+
+    # -- persistence ---------------------------------------------------------
+
+    def load(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != INDEX_VERSION:
+                    return False
+                for name in ('offsets', 'times', 'levels', 'sources'):
+                    column = getattr(self, name)
+                    column.frombytes(f.read(header['records'] * column.itemsize))
+        except (OSError, ValueError, EOFError):
+            self.__init__(self.path, self.kind, self.start)
+            return False
+        self.size = header['size']
+        self.identity = tuple(header['identity']) if header.get('identity') else None
+        self.last_time = header.get('last_time', self.start)
+        self.source_names = header['sources']
+        self.source_ids = {name: index for index, name in enumerate(self.source_names)}
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        header = {'version': INDEX_VERSION, 'records': len(self.offsets), 'size': self.size,
+                  'identity': list(self.identity) if self.identity else None,
+                  'last_time': self.last_time, 'sources': self.source_names}
+        temporary = self.index_path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for column in (self.offsets, self.times, self.levels, self.sources):
+                f.write(column.tobytes())
+        os.replace(temporary, self.index_path)
+
+    def current_identity(self, data):
+        first_line = data[:data.find(b'\n', 0, 4096) + 1 or min(len(data), 4096)]
+        return (os.stat(self.path).st_ino, first_line.decode('utf-8', errors='replace'))
+
+    # -- indexing ------------------------------------------------------------
+
+    def update(self):
+        """Index what was appended since the last update; returns the number
+        of the first new record (records from there on are new)"""
+        if not self.offsets and not self.size:
+            self.load()
+        first_new = len(self.offsets)
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return first_new
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                identity = self.current_identity(data)
+                if self.identity is not None and (identity != self.identity or size < self.size):
+                    # Rotated or truncated: start over
+                    self.__init__(self.path, self.kind, self.start)
+                    first_new = 0
+                self.identity = identity
+                end = data.rfind(b'\n', self.size, size) + 1
+                if end <= self.size:
+                    return first_new
+                if self.kind == 'app':
+                    self.index_serilog(data, self.size, end)
+                else:
+                    self.index_console(data, self.size, end)
+                self.size = end
+        self.save()
+        return first_new
+
+    def source_id(self, name):
+        index = self.source_ids.get(name)
+        if index is None:
+            index = self.source_ids[name] = len(self.source_names)
+            self.source_names.append(name)
+        return index
+
+    def day_start(self, date, zone):
+        """Epoch seconds of local midnight for a "YYYY-MM-DD" and "+01:00" pair (cached)"""
+        key = date + zone
+        value = self.day_cache.get(key)
+        if value is None:
+            value = self.day_cache[key] = datetime.strptime(
+                (date + zone).decode('ascii').replace(':', ''), '%Y-%m-%d%z').timestamp()
+        return value
+
+    def add(self, offset, timestamp, level, source):
+        self.offsets.append(offset)
+        self.times.append(timestamp)
+        self.levels.append(level)
+        self.sources.append(self.source_id(source))
+        self.last_time = timestamp
+
+    def index_serilog(self, data, start, end):
+        """Every header line starts a record; anything else continues it"""
+        for match in SERILOG_FILE.finditer(data, start, end):
+            date, hours, minutes, seconds, millis, zone, level, source = match.groups()
+            timestamp = (self.day_start(date, zone) + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+                         + int(millis) / 1000)
+            self.add(match.start(), timestamp, parse_level(level.decode('ascii')),
+                     source.decode('utf-8', errors='replace'))
+
+    def index_console(self, data, start, end):
+        """Console output: log headers start records, indented lines continue
+        them, other lines (build output, Console.WriteLine) are records of
+        their own without a level"""
+        day = datetime.fromtimestamp(self.start).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        while self.last_time - day >= 86400:
+            day += 86400
+        position = start
+        while position < end:
+            line_end = data.find(b'\n', position, end)
+            line_end = end if line_end < 0 else line_end + 1
+            first = data[position:position + 1]
+            if first in (b' ', b'\t') and self.offsets:
+                position = line_end
+                continue
+            line = data[position:min(line_end, position + 512)]
+            # `dotnet watch` may prefix app lines ("dotnet watch 🔥 ..." is not a record header)
+            match = SERILOG_CONSOLE.match(line)
+            if match:
+                hours, minutes, seconds, level, source = match.groups()
+                timestamp = day + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+                if timestamp < self.last_time - 12 * 3600:
+                    # Past midnight
+                    day += 86400
+                    timestamp += 86400
+                self.add(position, timestamp, parse_level(level.decode('ascii')),
+                         source.decode('utf-8', errors='replace'))
+            else:
+                match = MS_CONSOLE.match(line)
+                if match:
+                    self.add(position, self.last_time, parse_level(match.group(1).decode('ascii')),
+                             match.group(2).decode('utf-8', errors='replace').strip())
+                elif line.strip():
+                    self.add(position, self.last_time, NO_LEVEL, '')
+            position = line_end
+
+    # -- access --------------------------------------------------------------
+
+    def record_end(self, number):
+        return self.offsets[number + 1] if number + 1 < len(self.offsets) else self.size
+
+
+class LogQuery:
+    """Filters over indexed records"""
+
+    def __init__(self, level=None, source=None, since=None, grep=None, ignore_case=True):
+        self.min_level = parse_level(level) if level else None
+        if level and self.min_level == NO_LEVEL:
+            raise ValueError(f"unknown level: {level} (use {', '.join(LEVEL_NAMES)})")
+        self.source = source.lower() if source else None
+        self.since = since
+        self.grep = re.compile(grep.encode('utf-8'), re.I if ignore_case else 0) if grep else None
+
+    def candidates(self, index, first=0):
+        """Record numbers from `first` on that pass the index-only filters"""
+        start = first
+        if self.since is not None:
+            # Timestamps only ever grow within a file
+            start = max(first, bisect.bisect_left(index.times, self.since))
+        numbers = range(start, len(index.offsets))
+        if self.min_level is not None:
+            levels = index.levels
+            numbers = [number for number in numbers if self.min_level <= levels[number] != NO_LEVEL]
+        if self.source is not None:
+            wanted = {number for number, name in enumerate(index.source_names) if self.source in name.lower()}
+            sources = index.sources
+            numbers = [number for number in numbers if sources[number] in wanted]
+        return numbers
+
+    def matches(self, index, data, first=0):
+        numbers = self.candidates(index, first)
+        if self.grep is None:
+            return list(numbers)
+        if len(numbers) == len(index.offsets) - first:
+            # Nothing filtered by the index: one regex pass over the mapped file
+            found = []
+            position = index.offsets[first] if first < len(index.offsets) else index.size
+            for match in self.grep.finditer(data, position, index.size):
+                number = bisect.bisect_right(index.offsets, match.start()) - 1
+                if number >= first and (not found or found[-1] != number):
+                    found.append(number)
+            return found
+        return [number for number in numbers
+                if self.grep.search(data, index.offsets[number], index.record_end(number))]
+
+
+def open_indexes(logs_dir, kinds=('app', 'runner'), since=None):
+    """Up-to-date indexes of the log files, oldest first; files that ended
+    before `since` are skipped without being read"""
+    indexes = []
+    files = discover(logs_dir, kinds)
+    for position, (start, path, kind) in enumerate(files):
+        if since is not None:
+            # The next file of the same kind started before `since`
+            later = [other for other in files[position + 1:] if other[2] == kind]
+            if later and later[0][0] <= since:
+                continue
+        index = LogIndex(path, kind, start)
+        try:
+            index.update()
+        except OSError:
+            continue
+        indexes.append(index)
+    prune(logs_dir, files)
+    return indexes
+
+
+def prune(logs_dir, files):
+    """Drop sidecar indexes of logs that were deleted (Serilog keeps 30 days)"""
+    directory = os.path.join(logs_dir, INDEX_DIR)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    alive = {os.path.basename(path) + '.idx' for _, path, _ in files}
+    for name in names:
+        if name.endswith('.idx') and name not in alive:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def read_records(index, numbers):
+    """[(number, text)] of the given records"""
+    if not numbers:
+        return []
+    with open(index.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return [(number, data[index.offsets[number]:index.record_end(number)].decode('utf-8', errors='replace'))
+                for number in numbers]
+
+
+def search(indexes, query, limit=50):
+    """The last `limit` matching records across the files: [(index, number, text)]
+
+    Newest files are searched first and older ones only until the limit is
+    reached. limit=None returns every match.
+    """
+    if limit is not None and limit <= 0:
+        return []
+    results = []
+    for index in reversed(indexes):
+        if not index.offsets or index.size == 0:
+            continue
+        if query.since is not None and index.times[-1] < query.since:
+            continue
+        with open(index.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            numbers = query.matches(index, data)
+        numbers = numbers[-(limit - len(results)):] if limit is not None else numbers
+        results = [(index, number, text) for number, text in read_records(index, numbers)] + results
+        if limit is not None and len(results) >= limit:
+            break
+    return results
+
+
+def follow(logs_dir, query, emit, kinds=('app', 'runner'), interval=0.25, stop=None):
+    """Print records appended to any log file (new files included) until
+    stop() is true or KeyboardInterrupt"""
+    indexes = {index.path: index for index in open_indexes(logs_dir, kinds)}
+    while not (stop and stop()):
+        time.sleep(interval)
+        for start, path, kind in discover(logs_dir, kinds):
+            index = indexes.get(path)
+            if index is None:
+                index = indexes[path] = LogIndex(path, kind, start)
+            try:
+                if os.path.getsize(path) == index.size:
+                    continue
+                first = index.update()
+                with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    numbers = query.matches(index, data, first)
+            except (OSError, ValueError):
+                continue
+            for number, text in read_records(index, numbers):
+                emit(index, number, text)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Mock Ollama
+Stand-in for the Ollama API on localhost:11434, so load tests run without a
+network or real models. It answers the endpoints the app uses (/api/tags,
+/api/ps, /api/show, /api/version, /api/generate, /api/chat, /api/embeddings,
+/api/pull). Generate and chat stream NDJSON tokens with a configurable delay,
+so a request costs the app roughly what a small local model would.
+
+Usage: mock_ollama.py [--port 11434] [--tokens 40] [--token-delay 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+MODELS = ['phi3.5:latest', 'llama3.2:latest', 'qwen2.5-coder:7b']
+
+WORDS = ('Mock odpověď z testovacího Ollama serveru pro zátěžové testy OptimalyAI, '
+         'která simuluje streamované generování tokenů bez skutečného modelu.').split()
+
+
+def model_entry(name):
+    return {
+        'name': name,
+        'model': name,
+        'modified_at': '2024-01-01T00:00:00Z',
+        'size': 2_000_000_000,
+        'digest': 'mock',
+        'details': {'format': 'gguf', 'family': name.split(':')[0], 'parameter_size': '3.8B',
+                    'quantization_level': 'Q4_0'},
+    }
+
+
+class MockOllama:
+    def __init__(self, port=11434, host='localhost', tokens=40, token_delay=0.02):
+        self.port = port
+        self.host = host
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.requests = 0
+        self.server = None
+
+    async def start(self):
+        """Start listening; raises OSError when the port is taken (a real Ollama)"""
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        return self
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                method, path = lines[0].split(' ')[:2]
+                length = 0
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name.strip().lower() == 'content-length':
+                        length = int(value)
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    request = json.loads(body) if body else {}
+                except ValueError:
+                    request = {}
+                self.requests += 1
+                await self.respond(writer, method, path.split('?', 1)[0], request)
+        except (OSError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, path, request):
+        if path in ('/api/generate', '/api/chat'):
+            await self.generate(writer, path, request)
+        elif path in ('/api/tags', '/api/ps'):
+            self.send_json(writer, {'models': [model_entry(name) for name in MODELS]})
+        elif path == '/api/show':
+            self.send_json(writer, {'modelfile': '', 'parameters': '', 'template': '{{ .Prompt }}',
+                                    'details': model_entry(request.get('name') or MODELS[0])['details'],
+                                    'model_info': {}})
+        elif path == '/api/version':
+            self.send_json(writer, {'version': '0.0.0-mock'})
+        elif path in ('/api/embeddings', '/api/embed'):
+            self.send_json(writer, {'embedding': [0.0] * 384, 'embeddings': [[0.0] * 384]})
+        elif path == '/api/pull':
+            self.send_json(writer, {'status': 'success'})
+        elif path in ('/', '/api'):
+            self.send(writer, 200, b'Ollama is running', 'text/plain')
+        else:
+            self.send_json(writer, {'error': f'unknown endpoint {method} {path}'}, status=404)
+        await writer.drain()
+
+    def send(self, writer, status, payload, content_type):
+        reason = {200: 'OK', 404: 'Not Found'}.get(status, 'OK')
+        writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n'
+                     f'Content-Length: {len(payload)}\r\n\r\n'.encode('ascii') + payload)
+
+    def send_json(self, writer, data, status=200):
+        self.send(writer, status, json.dumps(data).encode('utf-8'), 'application/json')
+
+    def chunk(self, writer, data):
+        payload = (json.dumps(data) + '\n').encode('utf-8')
+        writer.write(f'{len(payload):x}\r\n'.encode('ascii') + payload + b'\r\n')
+
+    async def generate(self, writer, path, request):
+        model = request.get('model') or MODELS[0]
+        start = time.perf_counter_ns()
+        words = [WORDS[index % len(WORDS)] + ' ' for index in range(self.tokens)]
+
+        def piece(text, done):
+            data = {'model': model, 'created_at': datetime.now(timezone.utc).isoformat(), 'done': done}
+            if path == '/api/chat':
+                data['message'] = {'role': 'assistant', 'content': text}
+            else:
+                data['response'] = text
+            if done:
+                elapsed = time.perf_counter_ns() - start
+                data.update({'done_reason': 'stop', 'total_duration': elapsed, 'load_duration': 0,
+                             'prompt_eval_count': 10, 'eval_count': self.tokens, 'eval_duration': elapsed})
+            return data
+
+        if request.get('stream', True) is False:
+            await asyncio.sleep(self.token_delay * self.tokens)
+            self.send_json(writer, piece(''.join(words), True))
+            return
+
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n')
+        for word in words:
+            await asyncio.sleep(self.token_delay)
+            self.chunk(writer, piece(word, False))
+            await writer.drain()
+        self.chunk(writer, piece('', True))
+        writer.write(b'0\r\n\r\n')
+
+
+async def serve(options):
+    mock = await MockOllama(options.port, options.host, options.tokens, options.token_delay).start()
+    print(f'Mock Ollama on http://{options.host}:{options.port} '
+          f'({options.tokens} tokens, {options.token_delay * 1000:.0f} ms each)', flush=True)
+    async with mock.server:
+        await mock.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Ollama API for load tests')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--tokens', type=int, default=40, help='tokens per generated response (default: 40)')
+    parser.add_argument('--token-delay', type=float, default=0.02, help='seconds per token (default: 0.02)')
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
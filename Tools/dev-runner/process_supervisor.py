@@ -0,0 +1,239 @@
+"""
+Process Supervisor
+Stops the app started by run-dev.py without pkill/pgrep/lsof and fixed sleeps
+
+run-dev.py starts `dotnet run` in a new session, so the SDK process and the
+app it launches share one process group. The group ids (one per instance,
+plus the proxy with --instances) are kept in logs/dev-runner.pid together
+with the process start times (guards against PID reuse); stopping signals
+the groups and returns as soon as they are actually gone. Anything still
+listening on the app ports afterwards (an app started from an IDE, a
+leftover from an older runner) is found through /proc/net/tcp{,6} and the
+socket inodes in /proc/<pid>/fd.
+
+Where /proc is not available (macOS) the lookups fall back to pgrep/lsof.
+"""
+
+import json
+import os
+import re
+import signal
+import subprocess
+import time
+
+PID_FILE = "dev-runner.pid"
+
+# /proc/net/tcp socket state 0A = LISTEN
+TCP_LISTEN = '0A'
+
+HAS_PROC = os.path.isdir('/proc/self')
+
+
+def pid_file_path(logs_dir):
+    return os.path.join(logs_dir, PID_FILE)
+
+
+def proc_stat(pid):
+    """(state, pgrp, starttime) from /proc/<pid>/stat, None if the process is gone"""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8', errors='replace') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm may contain spaces and parentheses; fields follow the last ')'
+    fields = data[data.rfind(')') + 2:].split()
+    return fields[0], int(fields[2]), fields[19]
+
+
+def start_time(pid):
+    stat = proc_stat(pid) if HAS_PROC else None
+    return stat[2] if stat else None
+
+
+def child_record(process, role='app', port=None):
+    """What is kept about a child started with start_new_session=True"""
+    return {'pid': process.pid, 'pgid': os.getpgid(process.pid), 'start': start_time(process.pid),
+            'role': role, 'port': port}
+
+
+def save_children(logs_dir, children):
+    with open(pid_file_path(logs_dir), 'w', encoding='utf-8') as f:
+        json.dump({'children': children}, f)
+
+
+def load_children(logs_dir, alive_only=True):
+    """The recorded children; with alive_only those still running (and whose
+    PID does not belong to an unrelated process by now)"""
+    try:
+        with open(pid_file_path(logs_dir), encoding='utf-8') as f:
+            children = json.load(f).get('children', [])
+    except (OSError, ValueError, AttributeError):
+        return []
+    if not alive_only:
+        return children
+    return [child for child in children if group_alive(child['pgid'])
+            and (child.get('start') is None or start_time(child['pid']) in (None, child['start']))]
+
+
+def forget_children(logs_dir):
+    try:
+        os.remove(pid_file_path(logs_dir))
+    except FileNotFoundError:
+        pass
+
+
+def pids_alive(pids):
+    """PIDs that still exist and are not zombies"""
+    alive = []
+    for pid in pids:
+        if HAS_PROC:
+            stat = proc_stat(pid)
+            if stat and stat[0] != 'Z':
+                alive.append(pid)
+            continue
+        try:
+            os.kill(pid, 0)
+            alive.append(pid)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            alive.append(pid)
+    return alive
+
+
+def group_members(pgid):
+    """Live (non-zombie) processes of a process group"""
+    if not HAS_PROC:
+        try:
+            os.killpg(pgid, 0)
+            return [pgid]
+        except ProcessLookupError:
+            return []
+        except PermissionError:
+            return [pgid]
+    members = []
+    for name in os.listdir('/proc'):
+        if name.isdigit():
+            stat = proc_stat(int(name))
+            if stat and stat[1] == pgid and stat[0] != 'Z':
+                members.append(int(name))
+    return members
+
+
+def group_alive(pgid):
+    return bool(group_members(pgid))
+
+
+def find_processes(pattern):
+    """PIDs whose command line matches the regex (like pgrep -f)"""
+    if not HAS_PROC:
+        result = subprocess.run(['pgrep', '-f', pattern], capture_output=True, text=True)
+        return [int(pid) for pid in result.stdout.split()]
+    regex = re.compile(pattern)
+    found = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit() or int(name) == os.getpid():
+            continue
+        try:
+            with open(f'/proc/{name}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode('utf-8', errors='replace').strip()
+        except OSError:
+            continue
+        if cmdline and regex.search(cmdline):
+            found.append(int(name))
+    return pids_alive(found)
+
+
+def listening_inodes(port):
+    """Socket inodes listening on the TCP port (IPv4 and IPv6)"""
+    inodes = set()
+    for table in ('/proc/net/tcp', '/proc/net/tcp6'):
+        try:
+            with open(table, encoding='ascii') as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == TCP_LISTEN and int(fields[1].rsplit(':', 1)[1], 16) == port:
+                        inodes.add(fields[9])
+        except (OSError, StopIteration):
+            continue
+    return inodes
+
+
+def port_owners(port):
+    """PIDs holding a listening socket on the port (like lsof -ti :port)"""
+    if not HAS_PROC:
+        result = subprocess.run(['lsof', '-ti', f'tcp:{port}', '-sTCP:LISTEN'], capture_output=True, text=True)
+        return [int(pid) for pid in result.stdout.split()]
+    inodes = listening_inodes(port)
+    if not inodes:
+        return []
+    targets = {f'socket:[{inode}]' for inode in inodes}
+    owners = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            descriptors = os.listdir(f'/proc/{name}/fd')
+        except OSError:
+            continue
+        for descriptor in descriptors:
+            try:
+                if os.readlink(f'/proc/{name}/fd/{descriptor}') in targets:
+                    owners.append(int(name))
+                    break
+            except OSError:
+                continue
+    return owners
+
+
+def wait_until(condition, timeout):
+    """Poll condition() with a short backoff; True once it holds"""
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    while True:
+        if condition():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.1)
+
+
+def send(kill, target, sig):
+    try:
+        kill(target, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def stop_groups(pgids, timeout=5.0):
+    """SIGTERM the groups, SIGKILL whatever is left after timeout.
+    Returns 'terminated', 'killed' or 'gone' (nothing was running)."""
+    pgids = [pgid for pgid in pgids if group_alive(pgid)]
+    if not pgids:
+        return 'gone'
+    for pgid in pgids:
+        send(os.killpg, pgid, signal.SIGTERM)
+    if wait_until(lambda: not any(group_alive(pgid) for pgid in pgids), timeout):
+        return 'terminated'
+    for pgid in pgids:
+        send(os.killpg, pgid, signal.SIGKILL)
+    wait_until(lambda: not any(group_alive(pgid) for pgid in pgids), timeout)
+    return 'killed'
+
+
+def stop_pids(pids, timeout=5.0):
+    """Same as stop_groups for individual processes"""
+    pids = pids_alive(pids)
+    if not pids:
+        return 'gone'
+    for pid in pids:
+        send(os.kill, pid, signal.SIGTERM)
+    if wait_until(lambda: not pids_alive(pids), timeout):
+        return 'terminated'
+    for pid in pids_alive(pids):
+        send(os.kill, pid, signal.SIGKILL)
+    wait_until(lambda: not pids_alive(pids), timeout)
+    return 'killed'
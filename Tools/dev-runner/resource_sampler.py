@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Resource Sampler
+Background sampler of the app processes started by run-dev.py: CPU, RSS,
+threads, open file descriptors and GC heap over time (`run-dev.py resources`)
+
+The processes are the members of the process groups recorded in
+logs/dev-runner.pid (role app/instance). Every interval the sampler reads
+/proc/<pid>/stat (CPU ticks), /proc/<pid>/status (VmRSS, Threads) and counts
+/proc/<pid>/fd - a few small reads, no dotnet tooling attached to the app.
+
+GC heap: the .NET GC reserves its heap as one large PROT_NONE anonymous
+mapping (regions: 256 GB of address space, segments: 256 MB+) and commits
+pieces of it with mprotect, which splits the reservation into rw-p and ---p
+mappings of any size. In /proc/<pid>/smaps the reservation is therefore a
+run of address-contiguous anonymous mappings with at least GC_RESERVE bytes
+still reserved (---p); the resident size of its rw-p mappings is the managed
+heap actually in use, without the native/JIT memory RSS also contains. glibc
+malloc arenas (64 MB aligned, rw-p head + ---p tail) often sit right next to
+the reservation and are left out. With segments (only with the opt-in
+libclrgc.so since .NET 7) an almost fully committed heap keeps less than
+GC_RESERVE reserved and reads as 0, which the views treat as no GC data.
+smaps is longer to parse, so it is read every gc_interval seconds.
+
+Samples go into logs/resources.ring, a fixed-size ring of 40-byte records
+(capacity 86400 = one day at 1 s with one process, 3.4 MB), so the history
+survives restarts and the file never grows.
+
+Usage: resource_sampler.py [--logs logs] [--interval 1] [--gc-interval 5]
+"""
+
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime
+
+import process_supervisor
+from startup_timing import sparkline
+
+RING_FILE = "resources.ring"
+MAGIC = b'DRRS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQ')              # magic, version, record size, capacity, written
+RECORD = struct.Struct('<dIfQQII')             # time, pid, cpu %, rss, gc heap, threads, fds
+FIELDS = ('time', 'pid', 'cpu', 'rss', 'gc', 'threads', 'fds')
+CAPACITY = 86400
+
+GC_RESERVE = 256 * 1024 * 1024
+MALLOC_ARENA = 64 * 1024 * 1024      # glibc HEAP_MAX_SIZE on 64-bit
+SAMPLED_ROLES = ('app', 'instance')
+REFRESH_INTERVAL = 5.0      # how often the process list is re-read
+IDLE_EXIT = 60.0            # exit after this long without any app process
+
+# A process whose GC heap (RSS without GC data) keeps growing by more than
+# this over at least LEAK_MIN_SPAN seconds is flagged in the live view
+LEAK_BYTES_PER_MINUTE = 1024 * 1024
+LEAK_MIN_SPAN = 120
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def ring_path(logs_dir):
+    return os.path.join(logs_dir, RING_FILE)
+
+
+class SampleRing:
+    """Fixed-capacity ring of RECORDs in a file; `written` counts every
+    record ever appended, the slot of record n is n % capacity"""
+
+    def __init__(self, path, capacity=CAPACITY):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        header = os.pread(self.fd, HEADER.size, 0)
+        if len(header) == HEADER.size:
+            magic, version, size, self.capacity, self.written = HEADER.unpack(header)
+            if magic == MAGIC and version == VERSION and size == RECORD.size:
+                return
+        # New or incompatible file: start over
+        os.ftruncate(self.fd, 0)
+        self.capacity, self.written = capacity, 0
+        self.write_header()
+
+    def write_header(self):
+        os.pwrite(self.fd, HEADER.pack(MAGIC, VERSION, RECORD.size, self.capacity, self.written), 0)
+
+    def append(self, samples):
+        for sample in samples:
+            offset = HEADER.size + (self.written % self.capacity) * RECORD.size
+            os.pwrite(self.fd, RECORD.pack(*(sample[field] for field in FIELDS)), offset)
+            self.written += 1
+        self.write_header()
+
+    def read(self, last=None):
+        """Records oldest first as dicts; only the newest `last` ones if given"""
+        header = os.pread(self.fd, HEADER.size, 0)
+        if len(header) == HEADER.size:
+            self.written = HEADER.unpack(header)[4]
+        available = min(self.written, self.capacity)
+        count = available if last is None else min(last, available)
+        first = self.written - count
+        records = []
+        # At most two contiguous slices: up to the end of the file, then from its start
+        while count:
+            slot = first % self.capacity
+            chunk = min(count, self.capacity - slot)
+            data = os.pread(self.fd, chunk * RECORD.size, HEADER.size + slot * RECORD.size)
+            records += [dict(zip(FIELDS, values)) for values in RECORD.iter_unpack(data)]
+            first += chunk
+            count -= chunk
+        return records
+
+    def close(self):
+        os.close(self.fd)
+
+
+def read_text(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def smaps_mappings(lines):
+    """(start, end, perms, anonymous, rss bytes) of each mapping in smaps lines"""
+    mapping = None
+    for line in lines:
+        first = line[:1]
+        if first.isdigit() or b'a' <= first <= b'f':
+            if mapping:
+                yield tuple(mapping)
+            fields = line.split()
+            start, end = fields[0].split(b'-')
+            mapping = [int(start, 16), int(end, 16), fields[1], len(fields) == 5, 0]
+        elif mapping and line.startswith(b'Rss:'):
+            mapping[4] = int(line.split()[1]) * 1024
+    if mapping:
+        yield tuple(mapping)
+
+
+def anonymous_runs(mappings):
+    """Address-contiguous anonymous mappings as lists of (start, end, perms, rss),
+    malloc arenas left out"""
+    run = []
+    for start, end, perms, anonymous, rss in mappings:
+        if not (anonymous and run and run[-1][1] == start):
+            if run:
+                yield without_arenas(run)
+            run = []
+        if anonymous:
+            run.append((start, end, perms, rss))
+    if run:
+        yield without_arenas(run)
+
+
+def without_arenas(run):
+    kept = []
+    i = 0
+    while i < len(run):
+        start, end, perms, rss = run[i]
+        if (perms == b'rw-p' and start % MALLOC_ARENA == 0 and i + 1 < len(run)
+                and run[i + 1][2] == b'---p' and run[i + 1][1] - start == MALLOC_ARENA):
+            i += 2
+            continue
+        kept.append(run[i])
+        i += 1
+    return kept
+
+
+def gc_heap_from_smaps(lines):
+    """Resident bytes of the GC reservations in smaps lines (see module docstring)"""
+    total = 0
+    for run in anonymous_runs(smaps_mappings(lines)):
+        if sum(end - start for start, end, perms, rss in run if perms == b'---p') >= GC_RESERVE:
+            total += sum(rss for start, end, perms, rss in run if perms == b'rw-p')
+    return total
+
+
+def gc_heap_bytes(pid):
+    with open(f'/proc/{pid}/smaps', 'rb') as f:
+        return gc_heap_from_smaps(f)
+
+
+def process_label(pid):
+    """'dotnet run' for the SDK wrapper, otherwise the program (or dll) name"""
+    try:
+        args = read_text(f'/proc/{pid}/cmdline').split(b'\0')
+    except OSError:
+        return '(ended)'
+    names = [os.path.basename(arg.decode('utf-8', errors='replace')) for arg in args if arg]
+    if len(names) > 1 and names[0] == 'dotnet':
+        return 'dotnet ' + names[1] if names[1] in ('run', 'watch', 'build') else names[1]
+    return names[0] if names else '?'
+
+
+class Sampler:
+    def __init__(self, logs_dir, gc_interval=5.0):
+        self.logs_dir = logs_dir
+        self.gc_interval = gc_interval
+        self.previous = {}      # pid -> (monotonic, cpu ticks)
+        self.gc = {}            # pid -> (monotonic, bytes)
+
+    def targets(self):
+        pids = []
+        for child in process_supervisor.load_children(self.logs_dir):
+            if child.get('role') in SAMPLED_ROLES:
+                pids += process_supervisor.group_members(child['pgid'])
+        return pids
+
+    def sample(self, pid):
+        now = time.monotonic()
+        try:
+            stat = read_text(f'/proc/{pid}/stat')
+            status = read_text(f'/proc/{pid}/status')
+            fds = len(os.listdir(f'/proc/{pid}/fd'))
+        except OSError:
+            return None
+        fields = stat[stat.rfind(b')') + 2:].split()
+        ticks = int(fields[11]) + int(fields[12])
+        rss = threads = 0
+        for line in status.splitlines():
+            if line.startswith(b'VmRSS:'):
+                rss = int(line.split()[1]) * 1024
+            elif line.startswith(b'Threads:'):
+                threads = int(line.split()[1])
+
+        cpu = 0.0
+        previous = self.previous.get(pid)
+        if previous and now > previous[0]:
+            cpu = (ticks - previous[1]) / CLOCK_TICKS / (now - previous[0]) * 100
+        self.previous[pid] = (now, ticks)
+
+        gc = self.gc.get(pid)
+        if gc is None or now - gc[0] >= self.gc_interval:
+            try:
+                gc = self.gc[pid] = (now, gc_heap_bytes(pid))
+            except OSError:
+                gc = (now, 0)
+        return {'time': time.time(), 'pid': pid, 'cpu': cpu, 'rss': rss, 'gc': gc[1],
+                'threads': threads, 'fds': fds}
+
+    def collect(self, pids):
+        samples = [sample for sample in map(self.sample, pids) if sample]
+        alive = {sample['pid'] for sample in samples}
+        for table in (self.previous, self.gc):
+            for pid in set(table) - alive:
+                del table[pid]
+        return samples
+
+
+def run(logs_dir, interval=1.0, gc_interval=5.0, capacity=CAPACITY):
+    """Sample until no app process has been seen for IDLE_EXIT seconds"""
+    ring = SampleRing(ring_path(logs_dir), capacity)
+    sampler = Sampler(logs_dir, gc_interval)
+    pids, refreshed, seen = [], 0.0, time.monotonic()
+    try:
+        while True:
+            started = time.monotonic()
+            if started - refreshed >= REFRESH_INTERVAL or not pids:
+                pids, refreshed = sampler.targets(), started
+            samples = sampler.collect(pids)
+            if samples:
+                ring.append(samples)
+                seen = started
+            elif started - seen > IDLE_EXIT:
+                return
+            if len(samples) < len(pids):
+                refreshed = 0.0
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        ring.close()
+
+
+def read_samples(logs_dir, last=None):
+    path = ring_path(logs_dir)
+    if not os.path.exists(path):
+        return []
+    ring = SampleRing(path)
+    try:
+        return ring.read(last)
+    finally:
+        ring.close()
+
+
+def growth(samples, field):
+    """Least-squares slope of the field in bytes per minute"""
+    if len(samples) < 2:
+        return None
+    xs = [sample['time'] for sample in samples]
+    ys = [sample[field] for sample in samples]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread * 60
+
+
+def latest_by_pid(samples, since):
+    """{pid: [samples]} of the processes sampled at or after `since`"""
+    series = {}
+    for sample in samples:
+        series.setdefault(sample['pid'], []).append(sample)
+    return {pid: values for pid, values in series.items() if values[-1]['time'] >= since}
+
+
+def downsample(values, width):
+    if len(values) <= width:
+        return values
+    step = len(values) / width
+    return [sum(values[int(i * step):int((i + 1) * step)]) / len(values[int(i * step):int((i + 1) * step)])
+            for i in range(width)]
+
+
+def megabytes(value):
+    return f"{value / 1024 / 1024:.1f}"
+
+
+def per_minute(value):
+    return '-' if value is None else f"{value / 1024 / 1024:+.2f}"
+
+
+def render(samples, window=600, stale=10, width=40):
+    """top-like table of the processes sampled in the last `stale` seconds,
+    with growth and sparklines over the last `window` seconds"""
+    if not samples:
+        return ["No samples yet"]
+    now = samples[-1]['time']
+    recent = [sample for sample in samples if sample['time'] >= now - window]
+    lines = [
+        f"{datetime.fromtimestamp(now).strftime('%H:%M:%S')}  window {window / 60:.0f} min, "
+        f"{len(recent)} samples",
+        "",
+        f"{'PID':>7} {'process':<18} {'CPU %':>6} {'RSS MB':>8} {'ΔRSS/min':>9} {'GC MB':>8} "
+        f"{'ΔGC/min':>8} {'threads':>7} {'FDs':>5}",
+    ]
+    for pid, series in sorted(latest_by_pid(recent, now - stale).items()):
+        latest = series[-1]
+        rss_growth, gc_growth = growth(series, 'rss'), growth(series, 'gc')
+        trend = (gc_growth if latest['gc'] else rss_growth) or 0
+        leaking = latest['time'] - series[0]['time'] >= LEAK_MIN_SPAN and trend > LEAK_BYTES_PER_MINUTE
+        lines.append(f"{pid:>7} {process_label(pid)[:18]:<18} {latest['cpu']:>6.1f} {megabytes(latest['rss']):>8} "
+                     f"{per_minute(rss_growth):>9} {megabytes(latest['gc']):>8} {per_minute(gc_growth):>8} "
+                     f"{latest['threads']:>7} {latest['fds']:>5}" + ("  ⚠️ still growing" if leaking else ""))
+        for field, label, unit in (('cpu', 'CPU', ' %'), ('rss', 'RSS', ' MB'), ('gc', 'GC', ' MB')):
+            values = downsample([sample[field] for sample in series], width)
+            low, high = (f"{value:.0f}" if field == 'cpu' else megabytes(value) for value in (min(values), max(values)))
+            lines.append(f"{'':>8}{label:<4} {sparkline(values)}  {low} - {high}{unit}")
+    return lines
+
+
+def export(samples, path):
+    """CSV (or JSON for *.json) of the samples for graphing"""
+    rows = [{'time': datetime.fromtimestamp(sample['time']).isoformat(timespec='milliseconds'),
+             'pid': sample['pid'], 'cpu_percent': round(sample['cpu'], 2),
+             'rss_mb': round(sample['rss'] / 1024 / 1024, 2), 'gc_heap_mb': round(sample['gc'] / 1024 / 1024, 2),
+             'threads': sample['threads'], 'fds': sample['fds']} for sample in samples]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.endswith('.json'):
+            json.dump(rows, f, indent=1)
+            return len(rows)
+        writer = csv.DictWriter(f, fieldnames=['time', 'pid', 'cpu_percent', 'rss_mb', 'gc_heap_mb', 'threads', 'fds'])
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sample CPU/RSS/threads/FDs/GC heap of the run-dev.py app')
+    parser.add_argument('--logs', default='logs', help='logs directory with dev-runner.pid (default: logs)')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between samples (default: 1)')
+    parser.add_argument('--gc-interval', type=float, default=5.0, help='seconds between smaps reads (default: 5)')
+    parser.add_argument('--capacity', type=int, default=CAPACITY, help=f'ring size in records (default: {CAPACITY})')
+    options = parser.parse_args()
+    if not process_supervisor.HAS_PROC:
+        print('resource_sampler needs /proc (Linux)', file=sys.stderr)
+        sys.exit(1)
+    try:
+        run(options.logs, options.interval, options.gc_interval, options.capacity)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
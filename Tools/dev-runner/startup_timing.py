@@ -0,0 +1,266 @@
+"""
+Startup Phase Timing
+Shared by run-dev.py and run-dev-optimized.py: splits each app (re)start into
+phases by matching milestones in the app's console output and keeps one JSONL
+record per restart in logs/startup-timings.jsonl
+
+Milestones are recognized in plain `dotnet run` / `dotnet watch` output, the
+Microsoft console logger ("info: Category[0]") and the Serilog templates
+("[12:00:00 INF]", "[2024-01-01 12:00:00.000 +01:00 INF]").
+"""
+
+import http.client
+import json
+import os
+import re
+import ssl
+import statistics
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+HISTORY_FILE = "startup-timings.jsonl"
+
+# (milestone, phase, label) in the order they normally happen; each phase
+# lasts from the previous milestone reached up to its own milestone
+MILESTONES = [
+    ('killed', 'kill', 'Process kill'),
+    ('app_started', 'build', 'dotnet run build'),
+    ('first_log', 'first_log', 'First log line'),
+    ('host_started', 'host_start', 'Host start'),
+    ('listening', 'port_bind', 'Port bind'),
+    ('ready', 'first_request', 'First request'),
+]
+
+PHASE_LABELS = {phase: label for _, phase, label in MILESTONES}
+
+# Console.WriteLine markers from Program.cs and the ASP.NET lifetime message
+LINE_MILESTONES = [
+    ('app_started', re.compile(r'Starting OptimalyAI application')),
+    ('host_started', re.compile(r'OptimalyAI application started successfully')),
+    ('listening', re.compile(r'Now listening on: (\S+)')),
+]
+
+LOG_LINE = re.compile(r'^(?:(?:trce|dbug|info|warn|fail|crit): |\[[\d:. +-]+ [A-Z]{3}\] )')
+
+SPARK = '▁▂▃▄▅▆▇█'
+
+
+class StartupTimer:
+    """Milestone offsets (seconds since start) of one app start"""
+
+    def __init__(self, runner, started=None):
+        self.runner = runner
+        self.started = started if started is not None else time.monotonic()
+        self.timestamp = datetime.now().isoformat(timespec='seconds')
+        self.milestones = {}
+        self.listen_url = None
+        self.finished = False
+        self.lock = threading.Lock()
+
+    def mark(self, name, at=None):
+        """Record a milestone; the earliest sighting wins"""
+        offset = (at if at is not None else time.monotonic()) - self.started
+        with self.lock:
+            if name not in self.milestones or offset < self.milestones[name]:
+                self.milestones[name] = max(offset, 0.0)
+
+    def feed(self, line, at=None):
+        """Match one output line against the milestone markers"""
+        if LOG_LINE.match(line):
+            self.mark('first_log', at)
+        for name, pattern in LINE_MILESTONES:
+            match = pattern.search(line)
+            if match:
+                self.mark(name, at)
+                if name == 'listening' and self.listen_url is None:
+                    self.listen_url = match.group(1)
+
+    def finish(self):
+        """Mark the start as complete; True only for the first caller"""
+        with self.lock:
+            first, self.finished = not self.finished, True
+        return first
+
+    def phases(self):
+        previous = 0.0
+        result = {}
+        for milestone, phase, _ in MILESTONES:
+            if milestone in self.milestones:
+                offset = self.milestones[milestone]
+                result[phase] = max(offset - previous, 0.0)
+                previous = max(previous, offset)
+        return result
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'runner': self.runner,
+            'ready': 'ready' in self.milestones,
+            'total': self.milestones.get('ready'),
+            'milestones': dict(self.milestones),
+            'phases': self.phases(),
+        }
+
+    def summary_line(self):
+        parts = [f"{phase} {seconds:.2f}s" for phase, seconds in self.phases().items()]
+        return ' · '.join(parts) if parts else 'no milestones seen'
+
+
+class LogTail(threading.Thread):
+    """Follows a log file the child writes to and feeds new lines to a timer"""
+
+    def __init__(self, path, timer, interval=0.02):
+        super().__init__(daemon=True)
+        self.path = path
+        self.timer = timer
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not os.path.exists(self.path):
+            if self.stopped.wait(self.interval):
+                return
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            pending = ''
+            while True:
+                chunk = f.readline()
+                if chunk:
+                    pending += chunk
+                    if pending.endswith('\n'):
+                        self.timer.feed(pending.rstrip('\r\n'))
+                        pending = ''
+                    continue
+                # Drain what is already written before honouring stop()
+                if self.stopped.is_set():
+                    return
+                time.sleep(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=1)
+
+
+def poll_health(base_url, path='/health', timeout=60, stop=None):
+    """Block until base_url answers path with a status below 500
+
+    Exponential backoff from 5 ms to 250 ms. Returns the monotonic time of the
+    first good response, or None on timeout / stop.
+    """
+    parts = urlsplit(base_url.replace('://+', '://localhost').replace('://*', '://localhost')
+                     .replace('://0.0.0.0', '://localhost').replace('://[::]', '://localhost'))
+    if parts.scheme == 'https':
+        # The development certificate does not have to be trusted
+        context = ssl._create_unverified_context()
+        connect = lambda: http.client.HTTPSConnection(parts.hostname, parts.port or 443, timeout=2, context=context)
+    else:
+        connect = lambda: http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=2)
+
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    while time.monotonic() < deadline and not (stop and stop.is_set()):
+        connection = connect()
+        try:
+            connection.request('GET', path)
+            if connection.getresponse().status < 500:
+                return time.monotonic()
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            connection.close()
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+    return None
+
+
+def history_path(logs_dir):
+    return os.path.join(logs_dir, HISTORY_FILE)
+
+
+def append_history(logs_dir, timer):
+    with open(history_path(logs_dir), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(timer.to_dict()) + '\n')
+
+
+def load_history(logs_dir, runner=None):
+    records = []
+    try:
+        with open(history_path(logs_dir), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if runner is None or record.get('runner') == runner:
+                    records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def sparkline(values):
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(SPARK[int((value - low) / span * (len(SPARK) - 1))] for value in values)
+
+
+def regressions(records, window=10, threshold=0.2, min_delta=0.1):
+    """Phases where the latest restart is slower than the median of the
+    previous `window` restarts by more than `threshold` (and `min_delta` s)"""
+    if len(records) < 2:
+        return []
+    latest, previous = records[-1], records[-window - 1:-1]
+    found = []
+    for phase, seconds in list(latest['phases'].items()) + [('total', latest.get('total'))]:
+        history = [r['total'] if phase == 'total' else r['phases'].get(phase) for r in previous]
+        history = [value for value in history if value is not None]
+        if seconds is None or not history:
+            continue
+        median = statistics.median(history)
+        if seconds > median * (1 + threshold) and seconds - median > min_delta:
+            found.append((phase, seconds, median))
+    return found
+
+
+def render_stats(records, window=10, threshold=0.2, trend=30):
+    """Per-phase table over the recorded restarts, trends and regressions"""
+    if not records:
+        return ["No startup timings recorded yet"]
+
+    ready = [r for r in records if r.get('ready')]
+    lines = [
+        f"Restarts recorded: {len(records)} ({len(ready)} reached ready, "
+        f"{len(records) - len(ready)} failed or interrupted)",
+        f"Since {records[0]['timestamp']}, latest {records[-1]['timestamp']} ({records[-1]['runner']})",
+        "",
+        f"{'Phase':<18} {'last':>8} {'median':>8} {'min':>8} {'max':>8}  trend (last {trend})",
+        "-" * (62 + trend),
+    ]
+
+    rows = [(phase, PHASE_LABELS[phase]) for _, phase, _ in MILESTONES] + [('total', 'Time to ready')]
+    for phase, label in rows:
+        values = [r['total'] if phase == 'total' else r['phases'].get(phase) for r in records]
+        values = [value for value in values if value is not None]
+        if not values:
+            continue
+        last = records[-1]['total'] if phase == 'total' else records[-1]['phases'].get(phase)
+        recent = values[-window:]
+        lines.append(
+            f"{label:<18} {(f'{last:.2f}s' if last is not None else '-'):>8} "
+            f"{statistics.median(recent):>7.2f}s {min(values):>7.2f}s {max(values):>7.2f}s  "
+            f"{sparkline(values[-trend:])}"
+        )
+
+    found = regressions(records, window, threshold)
+    lines.append("")
+    if found:
+        lines.append(f"⚠️  Regressions in the latest restart (> {threshold:.0%} over median of previous {window}):")
+        for phase, seconds, median in found:
+            label = 'Time to ready' if phase == 'total' else PHASE_LABELS[phase]
+            lines.append(f"  {label}: {seconds:.2f}s vs {median:.2f}s")
+    else:
+        lines.append("✅ No regressions in the latest restart")
+    return lines
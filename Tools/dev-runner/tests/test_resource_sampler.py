@@ -0,0 +1,141 @@
+"""
+Tests for the GC heap measurement of resource_sampler.py
+
+Run from the repository root:
+    python -m unittest discover -s Tools/dev-runner/tests
+
+The test against a real process needs the dotnet SDK on PATH and is skipped
+without it.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import resource_sampler
+
+KB = 1024
+MB = 1024 * KB
+GB = 1024 * MB
+
+
+def mapping(start, size, perms, rss=0, path=''):
+    """One /proc/<pid>/smaps entry (only the lines the sampler reads, plus a few it skips)"""
+    header = f"{start:x}-{start + size:x} {perms} 00000000 00:00 0"
+    if path:
+        header += f" {path}"
+    return (f"{header}\nSize: {size // KB} kB\nRss: {rss // KB} kB\nPss: {rss // KB} kB\n"
+            f"Anonymous: {rss // KB} kB\nVmFlags: rd wr mr mw me ac\n")
+
+
+def smaps(*entries):
+    """Lays the (size, perms, rss[, path]) entries out back to back from 0x7f0000000000"""
+    text, address = '', 0x7f0000000000
+    for entry in entries:
+        if entry is None:       # unmapped hole
+            address += 4 * KB
+            continue
+        size, perms, rss = entry[:3]
+        text += mapping(address, size, perms, rss, *entry[3:])
+        address += size
+    return text.encode().splitlines(keepends=True)
+
+
+class GcHeapFromSmapsTest(unittest.TestCase):
+    def test_regions_reservation_split_by_mprotect(self):
+        # Layout of a .NET 8 process with ~60 MB of live objects: the 256 GB
+        # reservation split into 4 MB regions, with a malloc arena directly above
+        lines = smaps(
+            (64 * MB, 'r-xp', 20 * MB, '/usr/share/dotnet/shared/Microsoft.NETCore.App/8.0.0/libcoreclr.so'),
+            (4100 * KB, 'rw-p', 4084 * KB),
+            (32764 * KB, '---p', 0),
+            (4040 * KB, 'rw-p', 4040 * KB),
+            (56 * KB, '---p', 0),
+            (8132 * KB, 'rw-p', 8080 * KB),
+            (60 * KB, '---p', 0),
+            (4096 * KB, 'rw-p', 4036 * KB),
+            (4096 * KB, 'rw-p', 4036 * KB),
+            (256 * GB + 8 * MB, '---p', 0),
+            (132 * KB, 'rw-p', 4 * KB),         # arena of a native thread
+            (64 * MB - 132 * KB, '---p', 0),
+        )
+        self.assertEqual(resource_sampler.gc_heap_from_smaps(lines), (4084 + 4040 + 8080 + 4036 + 4036) * KB)
+
+    def test_arena_next_to_reservation_is_left_out(self):
+        # The reservation ends 64 MB aligned, where the arena starts
+        lines = smaps(
+            (64 * MB, 'r--p', 0, '/usr/lib/x86_64-linux-gnu/libc.so.6'),
+            (4 * MB, 'rw-p', 4 * MB),
+            (256 * GB - 4 * MB, '---p', 0),
+            (32 * MB, 'rw-p', 32 * MB),
+            (32 * MB, '---p', 0),
+        )
+        self.assertEqual(resource_sampler.gc_heap_from_smaps(lines), 4 * MB)
+
+    def test_native_memory_without_reservation_is_not_counted(self):
+        lines = smaps(
+            (200 * MB, 'rw-p', 200 * MB),       # merged large mallocs
+            (8 * MB, 'rw-p', 8 * MB),
+            (60 * MB, '---p', 0),
+            None,
+            (300 * MB, 'rw-p', 300 * MB, '[heap]'),
+            None,
+            (2 * GB, '---p', 0),                # executable memory reservation
+        )
+        self.assertEqual(resource_sampler.gc_heap_from_smaps(lines), 0)
+
+    def test_segments_reservation(self):
+        lines = smaps(
+            (61580 * KB, 'rw-p', 61560 * KB),
+            (200564 * KB, '---p', 0),
+            (8 * KB, 'rw-p', 8 * KB),
+            (131064 * KB, '---p', 0),
+        )
+        self.assertEqual(resource_sampler.gc_heap_from_smaps(lines), (61560 + 8) * KB)
+
+
+PROGRAM = """
+var keep = new List<byte[]>();
+for (int i = 0; i < 64 * 16; i++) { var a = new byte[64 * 1024]; Array.Fill(a, (byte)i); keep.Add(a); }
+GC.Collect();
+Console.WriteLine(GC.GetGCMemoryInfo().HeapSizeBytes);
+Console.ReadLine();
+GC.KeepAlive(keep);
+"""
+
+
+@unittest.skipUnless(shutil.which('dotnet'), 'dotnet SDK not on PATH')
+class GcHeapOfDotnetProcessTest(unittest.TestCase):
+    def test_matches_heap_size_reported_by_the_runtime(self):
+        with tempfile.TemporaryDirectory() as directory:
+            version = subprocess.run(['dotnet', '--version'], capture_output=True, text=True, check=True).stdout
+            with open(os.path.join(directory, 'gcheap.csproj'), 'w', encoding='utf-8') as f:
+                f.write('<Project Sdk="Microsoft.NET.Sdk"><PropertyGroup><OutputType>Exe</OutputType>'
+                        f'<TargetFramework>net{version.split(".")[0]}.0</TargetFramework>'
+                        '<ImplicitUsings>enable</ImplicitUsings></PropertyGroup></Project>')
+            with open(os.path.join(directory, 'Program.cs'), 'w', encoding='utf-8') as f:
+                f.write(PROGRAM)
+            out = os.path.join(directory, 'out')
+            build = subprocess.run(['dotnet', 'build', directory, '-o', out, '--nologo'],
+                                   capture_output=True, text=True)
+            if build.returncode:
+                self.skipTest(f"dotnet build failed: {build.stdout[-500:]}")
+
+            process = subprocess.Popen(['dotnet', os.path.join(out, 'gcheap.dll')],
+                                       stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            try:
+                heap = int(process.stdout.readline())
+                measured = resource_sampler.gc_heap_bytes(process.pid)
+            finally:
+                process.communicate('\n', timeout=30)
+        self.assertGreater(heap, 60 * MB)
+        self.assertAlmostEqual(measured, heap, delta=heap * 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -53,8 +53,10 @@ echo ""
 echo "6. Identifying slowest build targets..."
 echo "================================================"
 
-# Parse the build log for target timings
-if [ -f build-analysis.log ]; then
+# Parse the build log for project/target/task timings and the critical path
+if [ -f build-analysis.log ] && command -v python3 > /dev/null 2>&1; then
+    python3 ./run-dev-optimized.py profile --log build-analysis.log --top 10
+elif [ -f build-analysis.log ]; then
     echo "Top 10 Slowest Targets:"
     grep -E "Target \".*\" in project.*Done|Target \".*\" skipped" build-analysis.log | \
         grep -E "[0-9]+\.[0-9]+ ms" | \
@@ -133,6 +135,9 @@ echo "3. Consider using a local NuGet cache"
 echo "4. Exclude unnecessary files from compilation"
 echo "5. Use SSD storage for development"
 echo ""
+echo "For repeatable numbers (N runs per scenario, compared to a baseline):"
+echo "  ./run-dev-optimized.py bench -n 5"
+echo ""
 
 # Clean up
 rm -f build-analysis.log
\ No newline at end of file
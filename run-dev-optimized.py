@@ -9,14 +9,37 @@ import os
 import time
 import signal
 import datetime
+import argparse
+import re
+import threading
 from pathlib import Path
 
+# Shared runner modules (Tools/dev-runner)
+sys.path.insert(0, str(Path(__file__).parent.absolute() / "Tools" / "dev-runner"))
+import startup_timing
+import build_benchmark
+import build_clean
+import build_manifest
+import build_profile
+import file_watcher
+import process_supervisor
+
+# dotnet watch lines that begin a new build/restart of the app
+WATCH_RESTART = re.compile(r'dotnet watch\b.*\b(?:Restart|Building\.\.\.)')
+# dotnet watch lines that end a hot reload (applied, nothing to apply, or failed)
+WATCH_APPLIED = re.compile(r'Hot reload (?:of changes )?succeeded|No (?:C# )?changes to apply', re.I)
+WATCH_FAILED = re.compile(r'Build failed|error CS\d+|Unable to apply hot reload', re.I)
+
 class DevelopmentRunner:
     def __init__(self):
         self.project_root = Path(__file__).parent.absolute()
         self.log_dir = self.project_root / "logs"
         self.log_dir.mkdir(exist_ok=True)
         self.current_process = None
+        self.restart_requested = False
+        self.paused = []
+        self.cycle = None
+        self.cycle_lock = threading.Lock()
         
     def log(self, message):
         """Print timestamped log message"""
@@ -38,37 +61,58 @@ class DevelopmentRunner:
         os.environ["MSBUILDNODECOUNT"] = str(os.cpu_count() or 4)
         os.environ["MSBUILDUSECACHE"] = "1"
         
-    def clean_build_artifacts(self):
-        """Clean build artifacts for faster rebuilds"""
-        self.log("Cleaning build artifacts...")
+    def clean_build_artifacts(self, args=()):
+        """Clean build artifacts for faster rebuilds
         
-        # Directories to clean
-        clean_dirs = [
-            "bin", "obj", 
-            "OAI.Core/bin", "OAI.Core/obj",
-            "OAI.ServiceLayer/bin", "OAI.ServiceLayer/obj", 
-            "OAI.DataLayer/bin", "OAI.DataLayer/obj"
-        ]
+        Projects and their bin/obj come from OptimalyAI.sln; deletion runs in
+        parallel in-process (see Tools/dev-runner/build_clean.py).
+        """
+        parser = argparse.ArgumentParser(prog="run-dev-optimized.py clean")
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument("--changed", action="store_true",
+                          help="only projects whose build inputs changed since the last build")
+        mode.add_argument("--stale", action="store_true",
+                          help="only output of other configurations and target frameworks")
+        parser.add_argument("--configuration", default="Debug", help="configuration being built (default: Debug)")
+        parser.add_argument("--dry-run", action="store_true", help="list what would be removed")
+        options = parser.parse_args(args)
         
-        for dir_name in clean_dirs:
-            dir_path = self.project_root / dir_name
-            if dir_path.exists():
-                self.log(f"  Removing {dir_path}")
-                subprocess.run(["rm", "-rf", str(dir_path)], check=False)
-                
-        self.log("Clean completed")
+        projects = build_clean.discover(self.project_root)
+        if options.changed:
+            manifest = build_manifest.BuildManifest(self.project_root, options.configuration)
+            paths, affected = build_clean.plan_changed(projects, self.project_root, manifest.refresh(),
+                                                       options.configuration)
+            self.log(f"Cleaning changed projects: {', '.join(affected) or 'none'}")
+        elif options.stale:
+            paths = build_clean.plan_stale(projects, options.configuration)
+            self.log(f"Cleaning output of configurations/frameworks other than {options.configuration}...")
+        else:
+            paths = build_clean.plan_full(projects)
+            self.log(f"Cleaning build artifacts of {len(projects)} projects...")
         
-    def build_only(self):
-        """Build the project without running"""
-        self.log("Building project...")
+        if options.dry_run:
+            for path in paths:
+                size = build_clean.size_of(path) / (1024 * 1024)
+                print(f"  {size:8.1f} MB  {os.path.relpath(path, self.project_root)}")
+            self.log(f"Dry run, {len(paths)} paths would be removed")
+            return 0
         
-        cmd = [
+        for path in paths:
+            self.log(f"  Removing {os.path.relpath(path, self.project_root)}")
+        elapsed = build_clean.delete(paths)
+        if not options.stale:
+            # Without its output the manifest would make build_only skip the next build
+            build_clean.remove(build_manifest.BuildManifest(self.project_root, options.configuration).path)
+        self.log(f"Clean completed ({len(paths)} paths in {elapsed:.2f}s)")
+        return 0
+        
+    def build_command(self):
+        """dotnet build arguments shared by build, time and bench"""
+        return [
             "dotnet", "build",
+            "OptimalyAI.csproj",  # the root also holds OptimalyAI.sln
             "--configuration", "Debug",
-            "--no-incremental", "false",  # Enable incremental builds
-            "--no-restore", "false",
             "-p:BuildInParallel=true",
-            "-p:EnableDefaultCompileItems=false",
             "-p:GenerateDocumentationFile=false",
             "-p:DebugType=embedded",
             "-p:PublishTrimmed=false",
@@ -77,11 +121,50 @@ class DevelopmentRunner:
             "-v", "minimal"
         ]
         
-        result = subprocess.run(cmd, cwd=self.project_root)
+    def build_only(self, force=False):
+        """Build the project without running
+        
+        Skipped when no build input changed since the last successful build
+        (content hashes, see Tools/dev-runner/build_manifest.py).
+        """
+        manifest = build_manifest.BuildManifest(self.project_root)
+        start_time = time.perf_counter()
+        changed = manifest.refresh()
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        
+        if not force:
+            if not changed and manifest.outputs_exist():
+                # Keeps refreshed mtimes so touched-but-identical files are not hashed again
+                manifest.save()
+                self.log(f"Build inputs unchanged ({len(manifest.current)} files checked in {elapsed_ms:.0f} ms), "
+                         "skipping build")
+                return True
+            if changed:
+                more = f" and {len(changed) - 3} more" if len(changed) > 3 else ""
+                self.log(f"Changed since last build: {', '.join(changed[:3])}{more}")
+            else:
+                self.log("Build output missing")
+        
+        self.log("Building project...")
+        result = subprocess.run(self.build_command(), cwd=self.project_root)
+        if result.returncode == 0:
+            manifest.save()
         return result.returncode == 0
         
-    def run_watch_mode(self):
-        """Run with dotnet watch for hot reload"""
+    def run_watch_mode(self, args=()):
+        """Run with dotnet watch for hot reload
+        
+        File changes are batched on our side (Tools/dev-runner/file_watcher.py):
+        dotnet watch is paused from the first change of a burst until the
+        burst is over, then resumed to hot reload the whole batch at once, or
+        restarted once when the batch needs a full rebuild.
+        """
+        parser = argparse.ArgumentParser(prog="run-dev-optimized.py watch")
+        parser.add_argument("--debounce", type=float, default=0.3,
+                            help="seconds without changes that end a burst (default: 0.3)")
+        parser.add_argument("--no-batching", action="store_true", help="leave file changes to dotnet watch alone")
+        options = parser.parse_args(args)
+        
         self.log("Starting in watch mode (hot reload enabled)...")
         self.log("Press Ctrl+C to stop")
         self.log("")
@@ -98,30 +181,167 @@ class DevelopmentRunner:
             "--non-interactive"
         ]
         
+        stop = threading.Event()
+        if not options.no_batching:
+            try:
+                watcher = file_watcher.FileWatcher(self.project_root, quiet=options.debounce)
+                threading.Thread(target=self.batch_changes, args=(watcher, stop), daemon=True).start()
+                self.log(f"Batching file changes ({options.debounce * 1000:.0f} ms debounce, "
+                         f"{len(watcher.inotify.paths)} directories)")
+            except OSError as e:
+                self.log(f"File change batching unavailable ({e}), dotnet watch handles changes alone")
+        
         try:
-            self.current_process = subprocess.Popen(
-                cmd,
-                cwd=self.project_root,
-                stdout=sys.stdout,
-                stderr=sys.stderr
-            )
-            self.current_process.wait()
+            while True:
+                # Output is piped through us so every (re)start can be timed; own
+                # session so a batch restart can stop dotnet watch with the app
+                self.restart_requested = False
+                self.current_process = subprocess.Popen(
+                    cmd,
+                    cwd=self.project_root,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    errors="replace",
+                    bufsize=1,
+                    start_new_session=True
+                )
+                self.follow_watch_output(self.current_process)
+                self.current_process.wait()
+                if not self.restart_requested:
+                    break
         except KeyboardInterrupt:
             self.log("\nShutting down gracefully...")
-            if self.current_process:
-                self.current_process.terminate()
-                self.current_process.wait(timeout=5)
-                
+        finally:
+            stop.set()
+            if self.current_process and self.current_process.poll() is None:
+                self.stop_watch()
+    
+    def batch_changes(self, watcher, stop):
+        """Pause dotnet watch during a burst of changes, then apply the batch once"""
+        for batch in watcher.batches(on_first=lambda batch: self.pause_watch(), stop=stop):
+            decided = time.monotonic()
+            action, reason = file_watcher.classify(batch)
+            self.finish_cycle(None, "superseded")
+            self.log(f"{len(batch.changes)} file(s) changed in {batch.last - batch.first:.2f}s "
+                     f"({file_watcher.describe(batch)}): {action}, {reason}")
+            if action == "restart":
+                with self.cycle_lock:
+                    self.cycle = (batch, action, reason, decided)
+                self.restart_requested = True
+                self.stop_watch()
+                continue
+            self.resume_watch()
+            if action == "live":
+                # Served from disk (wwwroot, Razor runtime compilation)
+                file_watcher.append_cycle(str(self.log_dir), batch, action, reason, decided, decided, "live")
+            else:
+                with self.cycle_lock:
+                    self.cycle = (batch, action, reason, decided)
+    
+    def finish_cycle(self, ready_at, outcome):
+        """Record the pending "change detected -> app ready" cycle"""
+        with self.cycle_lock:
+            cycle, self.cycle = self.cycle, None
+        if cycle is None:
+            return
+        batch, action, reason, decided = cycle
+        record = file_watcher.append_cycle(str(self.log_dir), batch, action, reason, decided, ready_at, outcome)
+        if record["latency"] is not None:
+            self.log(f"Change detected -> app ready: {record['latency']:.2f}s "
+                     f"({action}, {outcome}, debounce {record['debounce']:.2f}s)")
+    
+    def watch_processes(self):
+        """The dotnet-watch process(es) of the current dotnet watch; the
+        `dotnet watch` muxer process only forwards to it"""
+        process = self.current_process
+        if not process or process.poll() is not None:
+            return []
+        members = set(process_supervisor.group_members(process.pid))
+        return [pid for pid in process_supervisor.find_processes(r"dotnet-watch\.dll") if pid in members] or [process.pid]
+    
+    def pause_watch(self):
+        """SIGSTOP dotnet watch (not the app); its file events queue up meanwhile"""
+        self.paused = self.watch_processes()
+        for pid in self.paused:
+            process_supervisor.send(os.kill, pid, signal.SIGSTOP)
+    
+    def resume_watch(self):
+        for pid in self.paused:
+            process_supervisor.send(os.kill, pid, signal.SIGCONT)
+        self.paused = []
+    
+    def stop_watch(self):
+        """Stop dotnet watch together with the app (its process group)"""
+        pgid = self.current_process.pid
+        # A stopped process only acts on SIGTERM once continued
+        process_supervisor.send(os.killpg, pgid, signal.SIGTERM)
+        process_supervisor.send(os.killpg, pgid, signal.SIGCONT)
+        self.paused = []
+        process_supervisor.stop_groups([pgid], 5)
+        
+    def follow_watch_output(self, process):
+        """Forward dotnet watch output and record startup phases of each app start"""
+        timer = startup_timing.StartupTimer("watch")
+        restarting = False
+        for line in process.stdout:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            now = time.monotonic()
+            
+            if WATCH_RESTART.search(line):
+                if "app_started" in timer.milestones:
+                    # The previous start is over; time the next one from here
+                    self.record_startup(timer)
+                    timer = startup_timing.StartupTimer("watch", now)
+                    restarting = True
+                if restarting and "Building..." in line:
+                    # dotnet watch stops the old app before it rebuilds
+                    timer.mark("killed", now)
+                    restarting = False
+            
+            if WATCH_APPLIED.search(line):
+                self.finish_cycle(now, "applied")
+            elif WATCH_FAILED.search(line):
+                self.finish_cycle(now, "failed")
+            
+            had_url = timer.listen_url
+            timer.feed(line.rstrip("\n"), now)
+            if timer.listen_url and not had_url:
+                threading.Thread(target=self.wait_until_ready, args=(timer,), daemon=True).start()
+        
+        self.record_startup(timer)
+    
+    def wait_until_ready(self, timer):
+        """First successful request after the app started listening"""
+        ready_at = startup_timing.poll_health(timer.listen_url, timeout=60)
+        if ready_at is not None:
+            timer.mark("ready", ready_at)
+            self.record_startup(timer)
+            self.finish_cycle(ready_at, "restarted")
+    
+    def record_startup(self, timer):
+        """Append one app start to the timing history (once)"""
+        if not timer.milestones or not timer.finish():
+            return
+        startup_timing.append_history(str(self.log_dir), timer)
+        if "ready" in timer.milestones:
+            self.log(f"App ready in {timer.milestones['ready']:.2f}s ({timer.summary_line()})")
+    
     def run_standard_mode(self):
         """Run without watch mode"""
         self.log("Starting in standard mode...")
         
+        # Build only when inputs changed; dotnet run then never rebuilds itself
+        if not self.build_only():
+            self.log("Build failed, not starting")
+            return
+        
         cmd = [
             "dotnet", "run",
             "--project", "OptimalyAI.csproj",
             "--configuration", "Debug",
-            "--no-build", "false",
-            "--no-restore", "false"
+            "--no-build"
         ]
         
         try:
@@ -141,7 +361,7 @@ class DevelopmentRunner:
     def measure_build_time(self):
         """Measure and report build time"""
         start_time = time.time()
-        success = self.build_only()
+        success = self.build_only(force=True)
         elapsed = time.time() - start_time
         
         if success:
@@ -151,6 +371,105 @@ class DevelopmentRunner:
             
         return success
         
+    def benchmark(self, args):
+        """Run build scenarios N times and compare against a saved baseline"""
+        parser = argparse.ArgumentParser(prog="run-dev-optimized.py bench")
+        parser.add_argument("-n", "--reps", type=int, default=5, help="repetitions per scenario (default: 5)")
+        parser.add_argument("--scenario", action="append", choices=list(build_benchmark.scenarios(self.project_root)),
+                            help="scenario to run (repeatable, default: all)")
+        parser.add_argument("--baseline", default=str(self.log_dir / "build-baseline.json"),
+                            help="baseline JSON to compare against")
+        parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+        parser.add_argument("--threshold", type=float, default=0.10,
+                            help="relative median slowdown counted as a regression (default: 0.10)")
+        options = parser.parse_args(args)
+        
+        scenarios = options.scenario or list(build_benchmark.scenarios(self.project_root))
+        self.log(f"Benchmarking {', '.join(scenarios)} ({options.reps} runs each)...")
+        bench = build_benchmark.BuildBenchmark(self.project_root, self.build_command(), options.reps, self.log)
+        results = bench.run(scenarios)
+        if bench.failures:
+            self.log(f"{len(bench.failures)} build(s) failed, last output:")
+            print(bench.failures[-1])
+        if not results:
+            return 1
+        
+        report = build_benchmark.make_report(results, options.reps, self.build_command())
+        run_file = self.log_dir / f"build-bench-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        build_benchmark.save_report(run_file, report)
+        
+        baseline = build_benchmark.load_report(options.baseline)
+        verdicts = build_benchmark.compare(report, baseline, options.threshold) if baseline else None
+        print()
+        for line in build_benchmark.render(report, verdicts):
+            print(line)
+        print()
+        self.log(f"Results saved to {run_file}")
+        if baseline:
+            self.log(f"Compared with baseline from {baseline['created']} ({options.baseline})")
+        
+        if options.save_baseline:
+            build_benchmark.save_report(options.baseline, report)
+            self.log(f"Baseline saved to {options.baseline}")
+            return 0
+        regressed = [name for name, (_, verdict) in (verdicts or {}).items() if verdict == "regressed"]
+        if regressed:
+            self.log(f"Regression in: {', '.join(regressed)}")
+            return 1
+        return 0
+        
+    def profile_build(self, args):
+        """Report build time per project, target and task plus the critical path"""
+        parser = argparse.ArgumentParser(prog="run-dev-optimized.py profile")
+        parser.add_argument("--log", help="analyze an existing -v diag / PerformanceSummary log instead of building")
+        parser.add_argument("--top", type=int, default=15, help="targets/tasks to list (default: 15)")
+        options = parser.parse_args(args)
+        
+        if options.log:
+            self.log(f"Analyzing {options.log}...")
+            start_time = time.time()
+            profile = build_profile.parse_log(options.log)
+            self.log(f"Parsed {profile.lines} lines in {time.time() - start_time:.2f}s")
+            returncode = 0
+        else:
+            # Normal verbosity keeps the stream small; the summary carries the
+            # per-target/task totals and the binlog is there for a deeper look
+            binlog = self.log_dir / "build-profile.binlog"
+            cmd = self.build_command()
+            cmd[cmd.index("-v") + 1] = "normal"
+            cmd += ["-clp:PerformanceSummary", "-tl:off", f"-bl:{binlog}"]
+            self.log("Building with profiling enabled...")
+            
+            def show_problems(raw):
+                if b": error " in raw or b": warning " in raw:
+                    sys.stdout.write(raw.decode("utf-8", errors="replace"))
+            
+            process = subprocess.Popen(cmd, cwd=self.project_root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            profile = build_profile.parse_stream(process.stdout, show_problems)
+            returncode = process.wait()
+            self.log(f"Build {'succeeded' if returncode == 0 else 'failed'}; binary log: {binlog}")
+        
+        print()
+        for line in profile.report(options.top):
+            print(line)
+        return returncode
+        
+    def show_stats(self):
+        """Show startup phase timings, trends and regressions across restarts"""
+        records = startup_timing.load_history(str(self.log_dir))
+        self.log(f"Startup timings from {startup_timing.history_path(str(self.log_dir))}")
+        print()
+        for line in startup_timing.render_stats(records):
+            print(line)
+        
+        cycles = file_watcher.load_cycles(str(self.log_dir))
+        if cycles:
+            print()
+            self.log(f"Watch mode cycles from {file_watcher.cycles_path(str(self.log_dir))}")
+            print()
+            for line in file_watcher.render_cycles(cycles):
+                print(line)
+        
     def print_usage(self):
         """Print usage information"""
         print("""
@@ -159,10 +478,19 @@ OptimalyAI Optimized Development Runner
 Usage:
   ./run-dev-optimized.py          # Run with hot reload (recommended)
   ./run-dev-optimized.py watch    # Same as above
-  ./run-dev-optimized.py build    # Build only
-  ./run-dev-optimized.py clean    # Clean build artifacts
+                                  #   [--debounce 0.3] quiet period that ends a burst of changes
+                                  #   [--no-batching] leave file changes to dotnet watch alone
+  ./run-dev-optimized.py build    # Build only (skipped if no build input changed; --force to always build)
+  ./run-dev-optimized.py clean    # Clean build artifacts of all projects in OptimalyAI.sln
+                                  #   [--changed] only changed projects, [--stale] only other configs/TFMs
+                                  #   [--dry-run] list paths and sizes
   ./run-dev-optimized.py standard # Run without watch mode
-  ./run-dev-optimized.py time     # Measure build time
+  ./run-dev-optimized.py time     # Measure build time (single build)
+  ./run-dev-optimized.py bench    # Build benchmark: N runs per scenario vs baseline
+                                  #   [-n 5] [--scenario noop ...] [--save-baseline] [--threshold 0.10]
+  ./run-dev-optimized.py profile  # Build time per project/target/task and critical path
+                                  #   [--log build.log] analyzes an existing diag log
+  ./run-dev-optimized.py stats    # Startup phase timings, regressions and watch mode cycle latencies
   ./run-dev-optimized.py help     # Show this help
 
 Environment variables:
@@ -179,15 +507,21 @@ Environment variables:
         if command in ["help", "-h", "--help"]:
             self.print_usage()
         elif command == "clean":
-            self.clean_build_artifacts()
+            sys.exit(self.clean_build_artifacts(args[1:]))
         elif command == "build":
-            self.build_only()
+            self.build_only(force="--force" in args[1:])
         elif command == "time":
             self.measure_build_time()
+        elif command == "bench":
+            sys.exit(self.benchmark(args[1:]))
+        elif command == "profile":
+            sys.exit(self.profile_build(args[1:]))
+        elif command == "stats":
+            self.show_stats()
         elif command == "standard":
             self.run_standard_mode()
         elif command in ["watch", "run"]:
-            self.run_watch_mode()
+            self.run_watch_mode(args[1:])
         else:
             self.log(f"Unknown command: {command}")
             self.print_usage()
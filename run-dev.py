@@ -7,19 +7,40 @@ OptimalyAI Development Runner
 - Podporuje restart příkazem
 """
 
+import argparse
+import asyncio
+import http.client
+import json
 import subprocess
 import sys
 import os
 import time
 import socket
 import signal
+import re
+import ssl
 import threading
 import datetime
 
+# Sdílené moduly runnerů (Tools/dev-runner)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Tools', 'dev-runner'))
+import startup_timing
+import process_supervisor
+import instance_proxy
+import load_generator
+import log_index
+import log_hotpaths
+import mock_ollama
+import resource_sampler
+
 class DevRunner:
     def __init__(self):
         self.port = 5005
         self.url = f"https://localhost:{self.port}"
+        self.health_path = "/health"
+        self.startup_timeout = 30
+        self.stop_timeout = 5
+        self.sample_interval = 1.0
         self.process = None
         self.logs_dir = "logs"
         os.makedirs(self.logs_dir, exist_ok=True)
@@ -81,30 +102,30 @@ class DevRunner:
         """Ukončí všechny dotnet procesy OptimalyAI"""
         print("🔪 Ukončuji existující dotnet procesy OptimalyAI...")
         
-        # Nejdřív graceful termination
-        subprocess.run("pkill -f 'dotnet.*OptimalyAI'", shell=True, capture_output=True)
-        time.sleep(2)
-        
-        # Force kill pokud ještě běží
-        check_result = subprocess.run("pgrep -f 'dotnet.*OptimalyAI'", shell=True, capture_output=True, text=True)
-        if check_result.stdout:
-            subprocess.run("pkill -9 -f 'dotnet.*OptimalyAI'", shell=True, capture_output=True)
-            time.sleep(1)
+        # Skupiny procesů z minulého spuštění (dotnet run + aplikace, u --instances
+        # i proxy): SIGTERM, čekáme na skutečné ukončení, po stop_timeout SIGKILL
+        previous = process_supervisor.load_children(self.logs_dir, alive_only=False)
+        running = process_supervisor.load_children(self.logs_dir)
+        if process_supervisor.stop_groups([child['pgid'] for child in running], self.stop_timeout) == 'killed':
+            print(f"⚠️ Procesy nereagovaly do {self.stop_timeout} s, ukončeny násilně")
+        process_supervisor.forget_children(self.logs_dir)
         
-        # Ukončíme i procesy na portu
-        if self.is_port_in_use():
-            result = subprocess.run(['lsof', '-ti', f':{self.port}'], capture_output=True, text=True)
-            if result.stdout:
-                pids = result.stdout.strip().split('\n')
-                for pid in pids:
-                    subprocess.run(['kill', '-9', pid])
-            time.sleep(1)
+        # Procesy spuštěné jinak (IDE, ruční dotnet run) a cokoli, co ještě drží porty
+        stragglers = set(process_supervisor.find_processes(r'dotnet.*OptimalyAI'))
+        for port in {self.port} | {child['port'] for child in previous if child.get('port')}:
+            stragglers.update(process_supervisor.port_owners(port))
+        stragglers.discard(os.getpid())
+        if stragglers:
+            print(f"🔪 Ukončuji další procesy: {', '.join(str(pid) for pid in sorted(stragglers))}")
+            process_supervisor.stop_pids(sorted(stragglers), self.stop_timeout)
             
         print("✅ Všechny procesy ukončeny")
     
     def run_detached(self):
         """Spustí aplikaci v pozadí (detached)"""
+        timer = startup_timing.StartupTimer('run-dev')
         self.kill_dotnet_processes()
+        timer.mark('killed')
         
         print("🚀 Spouštím OptimalyAI aplikaci v pozadí...")
         
@@ -123,51 +144,403 @@ class DevRunner:
                 preexec_fn=os.setpgrp,  # Detach from parent process group
                 start_new_session=True)
             
+            # Skupinu procesů si pamatujeme pro příští restart/stop
+            self.save_children([process_supervisor.child_record(self.process, 'app', self.port)])
+            
             print(f"📝 Logy se ukládají do: {self.log_file}")
             
-            # Počkáme až aplikace naběhne
+            # Milníky startu (build, první log, host...) čteme z logu aplikace
+            tail = startup_timing.LogTail(self.log_file, timer)
+            tail.start()
+            
+            # Počkáme až aplikace skutečně odpovídá (ne jen až Kestrel otevře port)
             print("⏳ Čekám na spuštění aplikace...")
-            for i in range(30):
-                if self.is_port_in_use():
-                    print("✅ Aplikace běží!")
-                    time.sleep(2)
-                    self.open_chrome()
-                    break
-                time.sleep(1)
-                sys.stdout.write('.')
-                sys.stdout.flush()
+            probe_start = time.monotonic()
+            ready_after, port_after = asyncio.run(self.wait_until_ready())
+            if port_after is not None:
+                timer.mark('listening', probe_start + port_after)
+            if ready_after is not None:
+                timer.mark('ready', probe_start + ready_after)
+            tail.stop()
+            startup_timing.append_history(self.logs_dir, timer)
+            
+            if ready_after is not None:
+                print(f"✅ Aplikace běží! Připravena za {timer.milestones['ready']:.2f} s od restartu")
+                print(f"⏱️  Fáze startu: {timer.summary_line()}")
+                self.open_chrome()
+            elif self.process.poll() is not None:
+                print(f"\n❌ Aplikace skončila s kódem {self.process.returncode}")
+                print("🔍 Zkontroluj logy:")
+                subprocess.run(['tail', '-20', self.log_file])
             else:
-                print("\n⚠️ Aplikace se nespustila během 30 sekund")
+                print(f"\n⚠️ Aplikace se nespustila během {self.startup_timeout} sekund")
                 print("🔍 Zkontroluj logy:")
                 subprocess.run(['tail', '-20', self.log_file])
                 
         except Exception as e:
             print(f"❌ Chyba: {e}")
     
+    def run_instances(self, count):
+        """Spustí N instancí z jednoho buildu za round-robin proxy (zátěžové testy)
+        
+        Instance poslouchají na HTTP portech self.port+1 … self.port+N, proxy
+        (Tools/dev-runner/instance_proxy.py) na self.port. Všechny skupiny
+        procesů se ukládají do logs/dev-runner.pid, stop/restart je ukončí společně.
+        """
+        self.kill_dotnet_processes()
+        ports = [self.port + index for index in range(1, count + 1)]
+        
+        # Jeden build pro všechny instance, ty pak běží s --no-build
+        print(f"🔨 Builduji aplikaci pro {count} instancí...")
+        with open(self.log_file, 'w') as log:
+            build = subprocess.run(['dotnet', 'build', 'OptimalyAI.csproj'], cwd=os.getcwd(),
+                                   stdout=log, stderr=subprocess.STDOUT)
+        if build.returncode != 0:
+            print("❌ Build selhal:")
+            subprocess.run(['tail', '-20', self.log_file])
+            return
+        
+        print(f"🚀 Spouštím {count} instancí na portech {ports[0]}-{ports[-1]}...")
+        children, processes = [], []
+        for index, port in enumerate(ports, 1):
+            with open(self.log_file.replace('.log', f'-i{index}.log'), 'w') as log:
+                process = subprocess.Popen([
+                    'nohup',
+                    'dotnet', 'run',
+                    '--project', 'OptimalyAI.csproj',
+                    '--no-build',
+                    '--urls', f'http://localhost:{port}'
+                ],
+                cwd=os.getcwd(),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True)
+            processes.append(process)
+            children.append(process_supervisor.child_record(process, 'instance', port))
+        
+        proxy_args = [sys.executable, instance_proxy.__file__, '--port', str(self.port)]
+        for port in ports:
+            proxy_args += ['--backend', str(port)]
+        with open(self.log_file.replace('.log', '-proxy.log'), 'w') as log:
+            proxy = subprocess.Popen(proxy_args, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        children.append(process_supervisor.child_record(proxy, 'proxy', self.port))
+        self.save_children(children)
+        self.url = f"http://localhost:{self.port}"
+        print(f"📝 Logy se ukládají do: {self.log_file.replace('.log', '-i*.log')}")
+        
+        print("⏳ Čekám na spuštění instancí...")
+        
+        async def wait_all():
+            return await asyncio.gather(*(self.wait_until_ready(port, process, secure=False)
+                                          for port, process in zip(ports, processes)))
+        
+        results = asyncio.run(wait_all())
+        for index, (port, (ready_after, _)) in enumerate(zip(ports, results), 1):
+            if ready_after is not None:
+                print(f"   ✅ Instance #{index} (port {port}) připravena za {ready_after:.2f} s")
+            else:
+                print(f"   ❌ Instance #{index} (port {port}) se nespustila, viz {self.log_file.replace('.log', f'-i{index}.log')}")
+        
+        if any(ready_after is not None for ready_after, _ in results):
+            print(f"🔀 Round-robin proxy: {self.url} (stav instancí: ./run-dev.py status)")
+            self.open_chrome()
+    
+    def save_children(self, children):
+        """Uloží skupiny procesů a spustí k nim sampler prostředků
+        
+        Sampler (Tools/dev-runner/resource_sampler.py) běží jako další dítě,
+        každých sample_interval s zapisuje CPU, RSS, vlákna, FD a GC heap
+        aplikace do logs/resources.ring; stop/restart ho ukončí s aplikací.
+        """
+        if self.sample_interval > 0 and process_supervisor.HAS_PROC:
+            with open(self.log_file.replace('.log', '-sampler.log'), 'w') as log:
+                sampler = subprocess.Popen([sys.executable, resource_sampler.__file__, '--logs', self.logs_dir,
+                                            '--interval', str(self.sample_interval)],
+                                           stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+            children.append(process_supervisor.child_record(sampler, 'sampler'))
+        process_supervisor.save_children(self.logs_dir, children)
+    
+    async def probe_health(self, ssl_context, timeout=2.0, port=None):
+        """Jeden požadavek na health endpoint (HTTPS, bez ssl_context HTTP), vrací HTTP status"""
+        port = port or self.port
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection('localhost', port, ssl=ssl_context), timeout)
+        try:
+            writer.write(f"GET {self.health_path} HTTP/1.1\r\n"
+                         f"Host: localhost:{port}\r\n"
+                         "Connection: close\r\n\r\n".encode('ascii'))
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout)
+            return int(status_line.split()[1])
+        finally:
+            writer.close()
+    
+    async def wait_for_port(self, deadline, port=None):
+        """Čeká na otevření portu, vrací čas od startu (jen informativně)"""
+        start = time.monotonic()
+        delay = 0.005
+        while time.monotonic() < deadline:
+            try:
+                _, writer = await asyncio.open_connection('localhost', port or self.port)
+                writer.close()
+                return time.monotonic() - start
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+        return None
+    
+    async def wait_until_ready(self, port=None, process=None, secure=True):
+        """Souběžně sleduje otevření portu a odpověď health endpointu
+        
+        Exponenciální backoff od 5 ms do 250 ms, takže po naběhnutí aplikace
+        nečekáme zbytečně až sekundu. Vrací (čas do připravenosti, čas do
+        otevření portu); None při timeoutu nebo pádu procesu.
+        """
+        process = process or self.process
+        ssl_context = None
+        if secure:
+            # Vývojový certifikát nemusí být důvěryhodný
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        
+        start = time.monotonic()
+        deadline = start + self.startup_timeout
+        port_task = asyncio.create_task(self.wait_for_port(deadline, port))
+        delay = 0.005
+        try:
+            while time.monotonic() < deadline:
+                if process and process.poll() is not None:
+                    return None, None
+                try:
+                    # Jakákoli odpověď pod 500 znamená, že pipeline obsluhuje požadavky
+                    if await self.probe_health(ssl_context, port=port) < 500:
+                        ready_after = time.monotonic() - start
+                        port_after = await port_task if port_task.done() else None
+                        return ready_after, port_after
+                except (OSError, ssl.SSLError, asyncio.TimeoutError, ValueError, IndexError):
+                    pass
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.25)
+            return None, None
+        finally:
+            port_task.cancel()
+    
     def show_status(self):
         """Zobrazí status aplikace"""
         if self.is_port_in_use():
-            print(f"✅ Aplikace běží na: {self.url}")
+            children = process_supervisor.load_children(self.logs_dir)
+            proxied = any(child['role'] == 'proxy' for child in children)
+            print(f"✅ Aplikace běží na: {f'http://localhost:{self.port}' if proxied else self.url}")
+            
+            # Procesy našich skupin a vlastník portu
+            for child in children:
+                members = process_supervisor.group_members(child['pgid'])
+                port = f", port {child['port']}" if child.get('port') else ''
+                print(f"📊 Běžící procesy ({child['role']}{port}): "
+                      f"{', '.join(str(pid) for pid in members)} (skupina {child['pgid']})")
+            owners = process_supervisor.port_owners(self.port)
+            if owners:
+                print(f"🔌 Port {self.port} drží: {', '.join(str(pid) for pid in owners)}")
             
-            # Najdeme PID procesu
-            result = subprocess.run("pgrep -f 'dotnet.*OptimalyAI'", shell=True, capture_output=True, text=True)
-            if result.stdout:
-                pids = result.stdout.strip().split('\n')
-                print(f"📊 Běžící procesy: {', '.join(pids)}")
+            # Poslední vzorek prostředků každého procesu (podrobně: ./run-dev.py resources)
+            samples = resource_sampler.read_samples(self.logs_dir, last=200)
+            recent = resource_sampler.latest_by_pid(samples, time.time() - 10)
+            for pid, series in sorted(recent.items()):
+                sample = series[-1]
+                print(f"📈 {pid} {resource_sampler.process_label(pid)}: CPU {sample['cpu']:.1f} %, "
+                      f"RSS {resource_sampler.megabytes(sample['rss'])} MB, GC {resource_sampler.megabytes(sample['gc'])} MB, "
+                      f"{sample['threads']} vláken, {sample['fds']} FD")
+            if proxied:
+                self.show_instances()
         else:
             print("❌ Aplikace neběží")
     
-    def show_logs(self, lines=50):
-        """Zobrazí posledních N řádků logů"""
-        # Najdeme nejnovější log soubor ve složce logs
-        result = subprocess.run(f"ls -t {self.logs_dir}/dev-runner-*.log 2>/dev/null | head -1", 
-                               shell=True, capture_output=True, text=True)
-        if result.stdout:
-            log_file = result.stdout.strip()
-            print(f"📝 Zobrazuji posledních {lines} řádků z {log_file}:")
-            subprocess.run(['tail', f'-{lines}', log_file])
-        else:
+    def show_instances(self):
+        """Zdraví a počty požadavků jednotlivých instancí (z proxy při --instances)"""
+        try:
+            connection = http.client.HTTPConnection('localhost', self.port, timeout=2)
+            connection.request('GET', instance_proxy.STATUS_PATH)
+            status = json.loads(connection.getresponse().read())
+            connection.close()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Proxy neodpovídá: {e}")
+            return
+        
+        print(f"\n🔀 Round-robin proxy, běží {status['uptime'] / 60:.0f} min:")
+        print(f"   {'Instance':<9} {'Port':>5}  {'Zdraví':<12} {'Požadavky':>9} {'Chyby':>6} {'Aktivní':>7} {'WS':>4} {'Průměr':>9}")
+        for instance in status['instances']:
+            health = f"✅ {instance['health_ms']:.0f} ms" if instance['healthy'] else "❌ nedostupná"
+            average = f"{instance['avg_ms']:.1f} ms" if instance['avg_ms'] is not None else "-"
+            print(f"   #{instance['index']:<8} {instance['port']:>5}  {health:<12} {instance['requests']:>9} "
+                  f"{instance['errors']:>6} {instance['active']:>7} {instance['websockets']:>4} {average:>9}")
+        print(f"   Celkem požadavků: {sum(instance['requests'] for instance in status['instances'])}")
+    
+    def show_stats(self):
+        """Zobrazí časy fází startu napříč restarty"""
+        records = startup_timing.load_history(self.logs_dir)
+        print(f"⏱️  Časy startu aplikace ({startup_timing.history_path(self.logs_dir)}):\n")
+        for line in startup_timing.render_stats(records):
+            print(line)
+    
+    def run_load(self, args):
+        """Zátěžový test běžící aplikace (Tools/dev-runner/load_generator.py)"""
+        parser = argparse.ArgumentParser(prog="run-dev.py load")
+        parser.add_argument("--scenario", action="append", choices=list(load_generator.SCENARIOS),
+                            help="scénář (lze opakovat, výchozí: všechny)")
+        parser.add_argument("-u", "--users", type=int, default=20, help="souběžní virtuální uživatelé (výchozí: 20)")
+        parser.add_argument("-d", "--duration", type=float, default=30, help="délka testu v sekundách (výchozí: 30)")
+        parser.add_argument("--connections", type=int, help="velikost poolu keep-alive spojení (výchozí: počet uživatelů)")
+        parser.add_argument("--url", help="adresa aplikace (výchozí: běžící aplikace nebo proxy z --instances)")
+        parser.add_argument("--mock-ollama", action="store_true",
+                            help="spustí náhradní Ollama API na portu 11434 (bez sítě a modelů)")
+        parser.add_argument("--token-delay", type=float, default=0.02, help="zpoždění mock Ollamy na token v s")
+        options = parser.parse_args(args)
+        
+        proxied = any(child['role'] == 'proxy' for child in process_supervisor.load_children(self.logs_dir))
+        url = options.url or (f"http://localhost:{self.port}" if proxied else self.url)
+        if not options.url and not self.is_port_in_use():
+            print(f"❌ Aplikace na portu {self.port} neběží, spusť ji přes ./run-dev.py")
+            return 1
+        scenarios = options.scenario or list(load_generator.SCENARIOS)
+        
+        async def run():
+            mock = None
+            if options.mock_ollama:
+                try:
+                    mock = await mock_ollama.MockOllama(token_delay=options.token_delay).start()
+                    print(f"🤖 Mock Ollama běží na http://localhost:{mock.port}")
+                except OSError:
+                    print("⚠️ Port 11434 je obsazený (běží skutečná Ollama?), mock se nespustí")
+            try:
+                return await load_generator.run_load(url, scenarios, options.users, options.duration,
+                                                     options.connections, log=print)
+            finally:
+                if mock:
+                    print(f"🤖 Mock Ollama obsloužila {mock.requests} požadavků")
+                    await mock.close()
+        
+        print(f"🔥 Zátěžový test {url}: {', '.join(scenarios)} ({options.users} uživatelů, {options.duration:.0f} s)")
+        report = asyncio.run(run())
+        report_file = os.path.join(self.logs_dir, f"load-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        load_generator.save_report(report_file, report)
+        
+        print()
+        for line in load_generator.render(report):
+            print(line)
+        print(f"\n📝 Report uložen do: {report_file}")
+        return 0 if report['operations'] else 1
+    
+    def show_resources(self, args):
+        """Živý přehled prostředků aplikace ze sampleru (Tools/dev-runner/resource_sampler.py)"""
+        parser = argparse.ArgumentParser(prog="run-dev.py resources")
+        parser.add_argument("-w", "--window", type=float, default=10, help="okno trendů a grafů v minutách (výchozí: 10)")
+        parser.add_argument("--once", action="store_true", help="vypíše jeden snímek a skončí")
+        parser.add_argument("--export", metavar="SOUBOR", help="uloží všechny vzorky do CSV (nebo JSON u *.json)")
+        options = parser.parse_args(args)
+        
+        if not os.path.exists(resource_sampler.ring_path(self.logs_dir)):
+            print("❌ Žádné vzorky, sampler se spouští s aplikací (./run-dev.py)")
+            return 1
+        if options.export:
+            count = resource_sampler.export(resource_sampler.read_samples(self.logs_dir), options.export)
+            print(f"📝 {count} vzorků uloženo do: {options.export}")
+            return 0
+        
+        window = options.window * 60
+        try:
+            while True:
+                samples = [sample for sample in resource_sampler.read_samples(self.logs_dir)
+                           if sample['time'] >= time.time() - window]
+                lines = resource_sampler.render(samples, window)
+                if options.once:
+                    print('\n'.join(lines))
+                    return 0
+                print("\033[H\033[2J📈 Prostředky aplikace (Ctrl+C pro ukončení)\n" + '\n'.join(lines), flush=True)
+                time.sleep(self.sample_interval or 1.0)
+        except KeyboardInterrupt:
+            return 0
+    
+    def show_logs(self, args):
+        """Zobrazí posledních N záznamů logů (indexované, Tools/dev-runner/log_index.py)"""
+        parser = argparse.ArgumentParser(prog="run-dev.py logs")
+        parser.add_argument("lines", nargs="?", type=int, default=50, help="počet záznamů (výchozí: 50)")
+        parser.add_argument("--level", help="minimální úroveň: VRB, DBG, INF, WRN, ERR, FTL")
+        parser.add_argument("--source", help="část SourceContextu, např. ChatHub nebo EntityFrameworkCore")
+        parser.add_argument("--since", help="od kdy: 30m, 2h, 1d, today, 2024-01-01 nebo '2024-01-01 12:00'")
+        parser.add_argument("--grep", help="regulární výraz v textu záznamu (bez ohledu na velikost písmen)")
+        parser.add_argument("-f", "--follow", action="store_true", help="sleduje nové záznamy")
+        parser.add_argument("--files", choices=["all", "app", "runner"], default="all",
+                            help="app = logs/optimaly-ai-*.log, runner = logs/dev-runner-*.log")
+        options = parser.parse_args(args)
+        
+        kinds = ('app', 'runner') if options.files == 'all' else (options.files,)
+        try:
+            since = log_index.parse_since(options.since) if options.since else None
+            query = log_index.LogQuery(options.level, options.source, since, options.grep)
+        except (ValueError, re.error) as e:
+            print(f"❌ {e}")
+            return 1
+        
+        start = time.perf_counter()
+        indexes = log_index.open_indexes(self.logs_dir, kinds, since)
+        if not indexes:
             print("❌ Žádné logy nenalezeny")
+            return 1
+        results = log_index.search(indexes, query, options.lines)
+        elapsed = time.perf_counter() - start
+        
+        current = None
+        def emit(index, number, text):
+            nonlocal current
+            if index.path != current:
+                current = index.path
+                print(f"── {os.path.basename(index.path)} ──")
+            print(text.rstrip('\r\n'))
+        
+        for index, number, text in results:
+            emit(index, number, text)
+        records = sum(len(index.offsets) for index in indexes)
+        print(f"📝 {len(results)} záznamů z {records} v {len(indexes)} souborech ({elapsed * 1000:.0f} ms)")
+        
+        if options.follow:
+            print("👀 Sleduji nové záznamy (Ctrl+C pro ukončení)...")
+            try:
+                log_index.follow(self.logs_dir, query, emit, kinds)
+            except KeyboardInterrupt:
+                pass
+        return 0
+    
+    def show_hotpaths(self, args):
+        """Nejpomalejší EF dotazy a doby requestů po routách z logů (Tools/dev-runner/log_hotpaths.py)"""
+        parser = argparse.ArgumentParser(prog="run-dev.py hotpaths")
+        parser.add_argument("--since", help="od kdy: 30m, 2h, 1d, today, 2024-01-01 nebo '2024-01-01 12:00'")
+        parser.add_argument("--top", type=int, default=15, help="počet dotazů a rout ve výpisu (výchozí: 15)")
+        parser.add_argument("--sort", choices=list(log_hotpaths.SORT_KEYS), default="total",
+                            help="řazení: celkový čas, p95, počet nebo maximum (výchozí: total)")
+        parser.add_argument("--workers", type=int, help="počet procesů (výchozí: počet CPU)")
+        parser.add_argument("--json", action="store_true", help="vypíše report jako JSON")
+        options = parser.parse_args(args)
+        
+        try:
+            since = log_index.parse_since(options.since) if options.since else None
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        
+        start = time.perf_counter()
+        result = log_hotpaths.analyze(self.logs_dir, since, options.workers)
+        if not result['files']:
+            print("❌ Žádné logy aplikace (logs/optimaly-ai-*.log) nenalezeny")
+            return 1
+        report = log_hotpaths.report(result, options.top, options.sort)
+        if options.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return 0
+        for line in log_hotpaths.render(report):
+            print(line)
+        print(f"\n⏱️ Analýza trvala {time.perf_counter() - start:.1f} s")
+        return 0
 
 def print_help():
     """Zobrazí nápovědu"""
@@ -175,9 +548,22 @@ def print_help():
 🚀 OptimalyAI Dev Runner - Příkazy:
     
     run-dev.py          - Restartuje a spustí aplikaci v pozadí
-    run-dev.py status   - Zobrazí status aplikace
-    run-dev.py logs     - Zobrazí posledních 50 řádků logů
-    run-dev.py logs N   - Zobrazí posledních N řádků logů
+    run-dev.py --instances N
+                        - Spustí N instancí (porty 5006…) za round-robin proxy na 5005
+    run-dev.py status   - Zobrazí status aplikace (u --instances zdraví a požadavky instancí)
+    run-dev.py logs     - Zobrazí posledních 50 záznamů logů
+    run-dev.py logs N   - Zobrazí posledních N záznamů logů
+                          [--level WRN] [--source ChatHub] [--since 1h] [--grep text] [-f]
+    run-dev.py hotpaths - Nejpomalejší EF dotazy a doby requestů po routách z logů
+                          [--since 1d] [--top 15] [--sort total|p95|count|max] [--json]
+    run-dev.py --sample-interval S
+                        - Interval sampleru prostředků v s (výchozí 1, 0 = vypnuto)
+    run-dev.py stats    - Zobrazí časy fází startu a regrese napříč restarty
+    run-dev.py resources
+                        - Živý přehled CPU, RSS, GC heapu, vláken a FD aplikace
+                          [-w 10] [--once] [--export resources.csv]
+    run-dev.py load     - Zátěžový test (API orchestrátorů a workflow, SignalR huby)
+                          [-u 20] [-d 30] [--scenario chat-hub ...] [--mock-ollama]
     run-dev.py stop     - Zastaví aplikaci
     run-dev.py restart  - Restartuje aplikaci
     run-dev.py help     - Zobrazí tuto nápovědu
@@ -187,21 +573,50 @@ def main():
     runner = DevRunner()
     
     # Parsování argumentů
-    if len(sys.argv) > 1:
-        command = sys.argv[1].lower()
+    args = sys.argv[1:]
+    instances = 1
+    if '--instances' in args:
+        position = args.index('--instances')
+        try:
+            instances = int(args[position + 1])
+        except (IndexError, ValueError):
+            print("❌ --instances vyžaduje počet instancí")
+            sys.exit(1)
+        del args[position:position + 2]
+    if '--sample-interval' in args:
+        position = args.index('--sample-interval')
+        try:
+            runner.sample_interval = float(args[position + 1])
+        except (IndexError, ValueError):
+            print("❌ --sample-interval vyžaduje počet sekund")
+            sys.exit(1)
+        del args[position:position + 2]
+    
+    if args:
+        command = args[0].lower()
         
         if command == 'status':
             runner.show_status()
         elif command == 'logs':
-            lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50
-            runner.show_logs(lines)
+            sys.exit(runner.show_logs(args[1:]))
+        elif command == 'hotpaths':
+            sys.exit(runner.show_hotpaths(args[1:]))
+        elif command == 'stats':
+            runner.show_stats()
+        elif command == 'resources':
+            sys.exit(runner.show_resources(args[1:]))
+        elif command == 'load':
+            sys.exit(runner.run_load(args[1:]))
         elif command == 'stop':
             print("🛑 Zastavuji aplikaci...")
             runner.kill_dotnet_processes()
             print("✅ Aplikace zastavena")
         elif command == 'restart':
             print("🔄 Restartuji aplikaci...")
-            runner.run_detached()
+            if instances > 1:
+                runner.run_instances(instances)
+            else:
+                runner.run_detached()
         elif command == 'help':
             print_help()
         else:
@@ -214,7 +629,10 @@ def main():
         print("║   Auto-restart & Background Mode       ║")
         print("╚════════════════════════════════════════╝\n")
         
-        runner.run_detached()
+        if instances > 1:
+            runner.run_instances(instances)
+        else:
+            runner.run_detached()
         
         print(f"\n🌐 Aplikace běží na: {runner.url}")
         print("📝 Pro zobrazení logů: ./run-dev.py logs")